@@ -1,14 +1,39 @@
-
-from web3 import Web3
 from dotenv import load_dotenv
 import json
 
 import csv
 import io
-import qrcode
-from flask import Flask, jsonify, request, send_file
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, redirect, request, send_file
 import os
-from models import create_all, User, session_scope
+from models import User, session_scope, read_session_scope
+from csv_import import import_csv, CsvImportError
+import jobs
+from jobs import job_handler
+import qr
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from pagination import page_args, keyset_page, paged_response
+import chain
+import txtracker
+import indexer
+import raffle_views
+from models import TxLog, TxType
+import stats
+import entries
+import exports
+import health as health_checks
+import metrics
+import passwords
+from cache import TTLCache
+import push
+import storage
+import auth
+from auth import require_auth, owns_event, remember_event_owner, current_user_id, AuthError
 import jwt
 import datetime
 
@@ -25,30 +50,22 @@ RPC_URL = os.environ.get("RPC_URL")
 
 from werkzeug.utils import secure_filename
 UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', '/tmp/uploads')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret')
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-create_all()  # 앱 인스턴스 생성 직후 DB 자동 생성
+QR_MAX_AGE = int(os.environ.get('QR_MAX_AGE', '86400'))
+# X-Real-IP 를 믿을 프록시 (IP, CIDR, 호스트명을 쉼표로. compose 에서는 nginx).
+# 그 밖의 주소(8123 포트로 직접 들어온 요청 등)는 헤더를 무시하고 접속 주소로 속도 제한
+TRUSTED_PROXIES = [p.strip() for p in os.environ.get('TRUSTED_PROXIES', '').split(',') if p.strip()]
 
+# 라우트는 블루프린트에 모으고 앱 인스턴스는 create_app() 에서 만든다.
+# import 만으로는 DB/네트워크/스레드에 손대지 않음 (스키마는 python models.py 로 별도 생성)
+api = Blueprint('api', __name__)
 
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from models import Event, Prize
+from models import Event, Prize, Job, Entry, EntryStatus
 # 경품 등록: JWT 인증 필요, 이미지 파일 업로드
-@app.route('/api/prizes', methods=['POST'])
+@api.route('/api/prizes', methods=['POST'])
+@require_auth
 def create_prize():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({'error': 'Authorization header required'}), 401
-    try:
-        token = token.replace('Bearer ', '')
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user_id = payload['user_id']
-    except Exception:
-        return jsonify({'error': 'invalid token'}), 401
-
+    user_id = g.user_id
     event_id = request.form.get('event_id')
     name = request.form.get('name')
     winners_count = request.form.get('winners_count')
@@ -56,62 +73,101 @@ def create_prize():
     file = request.files.get('image')
     if not event_id or not name or not winners_count:
         return jsonify({'error': 'event_id, name, winners_count required'}), 400
+    # 이벤트 소유자 확인 (캐시)
+    if not owns_event(user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    # 이미지 저장 전에 검증 (잘못된 폼이 고아 파일을 남기지 않도록)
+    try:
+        winners_count = int(winners_count)
+    except ValueError:
+        return jsonify({'error': 'winners_count must be an integer'}), 400
+    if winners_count < 1:
+        return jsonify({'error': 'winners_count must be positive'}), 400
 
     image_path = None
+    new_image = False
     if file:
-        filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        image_path = file_path
+        # 내용 주소 저장 (같은 이미지는 한 번만), 썸네일은 백그라운드 작업
+        try:
+            digest, image_path, new_image = storage.store_image(file.stream)
+        except storage.StorageError as e:
+            return jsonify({'error': str(e)}), 400
 
     with session_scope() as s:
-        # 이벤트 소유자 확인
-        event = s.query(Event).filter_by(id=event_id, owner_id=user_id).first()
-        if not event:
-            return jsonify({'error': 'event not found or not owned by user'}), 404
         prize = Prize(
             event_id=event_id,
             name=name.strip() if name else None,
-            winners_count=int(winners_count),
+            winners_count=winners_count,
             description=description.strip() if description else None,
             image_path=image_path
         )
         s.add(prize)
         s.flush()
-        return jsonify({'id': prize.id, 'name': prize.name, 'image_path': prize.image_path}), 201
+        result = {'id': prize.id, 'name': prize.name, 'image_path': prize.image_path,
+                  **storage.image_urls(prize.image_path)}
+    if new_image:
+        jobs.enqueue('prize_thumbnails', {'digest': digest, 'path': image_path},
+                     event_id=int(event_id), owner_id=user_id, max_attempts=2)
+    return jsonify(result), 201
+
+
+@job_handler('prize_thumbnails')
+def run_prize_thumbnails_job(ctx):
+    return {'thumbnails': storage.make_thumbnails(ctx.payload['digest'], ctx.payload['path'])}
+
+
+# 경품 이미지/썸네일 (내용 주소 URL → 1년 immutable 캐시). 파일 전송은 nginx X-Accel-Redirect
+@api.route('/api/media/<name>', methods=['GET'])
+def get_media(name):
+    path = storage.resolve(name)
+    if path is None:
+        original = storage.original_for(name)
+        if original:
+            # 썸네일 생성 전: 원본으로 (캐시 짧게)
+            resp = redirect(storage.MEDIA_URL + original, code=302)
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
+        return jsonify({'error': 'not found'}), 404
+    headers = {'Cache-Control': f'public, max-age={storage.MEDIA_MAX_AGE}, immutable'}
+    if storage.MEDIA_X_ACCEL:
+        headers['X-Accel-Redirect'] = storage.accel_uri(path)
+        # nginx 는 업스트림 Content-Type 을 그대로 쓰므로 Flask 기본값(text/html) 대신 확장자 기준으로
+        return Response(status=200, headers=headers, mimetype=storage.mimetype_for(name))
+    resp = send_file(path, mimetype=storage.mimetype_for(name), conditional=True)
+    resp.headers.update(headers)
+    return resp
 
 # 경품 목록 조회: JWT 인증 필요, event_id 쿼리 파라미터 필요
-@app.route('/api/prizes', methods=['GET'])
+@api.route('/api/prizes', methods=['GET'])
+@require_auth
 def list_prizes():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({'error': 'Authorization header required'}), 401
-    try:
-        token = token.replace('Bearer ', '')
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user_id = payload['user_id']
-    except Exception:
-        return jsonify({'error': 'invalid token'}), 401
+    user_id = g.user_id
     event_id = request.args.get('event_id')
     if not event_id:
         return jsonify({'error': 'event_id required'}), 400
-    with session_scope() as s:
-        # 이벤트 소유자 확인
-        event = s.query(Event).filter_by(id=event_id, owner_id=user_id).first()
-        if not event:
-            return jsonify({'error': 'event not found or not owned by user'}), 404
-        prizes = s.query(Prize).filter_by(event_id=event_id).order_by(Prize.created_at.desc()).all()
+    # 이벤트 소유자 확인 (캐시)
+    if not owns_event(user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    try:
+        cursor, limit = page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with read_session_scope() as s:
+        stmt = select(Prize.id, Prize.name, Prize.winners_count, Prize.description, Prize.image_path,
+                      Prize.created_at).where(Prize.event_id == event_id)
+        prizes, next_cursor = keyset_page(s, stmt, Prize.created_at, Prize.id, cursor, limit)
         result = [
             {
                 'id': p.id,
                 'name': p.name,
                 'winners_count': p.winners_count,
                 'description': p.description,
-                'image_path': p.image_path
+                'image_path': p.image_path,
+                **storage.image_urls(p.image_path)
             }
             for p in prizes
         ]
-        return jsonify(result)
+        return paged_response(jsonify(result), next_cursor)
 
 # 회원가입: 이메일, 비밀번호 필수
 
@@ -120,30 +176,30 @@ from flask import send_from_directory
 import uuid
 
 # 이벤트 생성: JWT 인증 필요, CSV 파일 업로드
-@app.route('/api/events', methods=['POST'])
+@api.route('/api/events', methods=['POST'])
+@require_auth
 def create_event():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({'error': 'Authorization header required'}), 401
-    try:
-        token = token.replace('Bearer ', '')
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user_id = payload['user_id']
-    except Exception:
-        return jsonify({'error': 'invalid token'}), 401
-
+    user_id = g.user_id
     name = request.form.get('name')
     start_at = request.form.get('start_at')
     end_at = request.form.get('end_at')
     participant_cap = request.form.get('participant_cap')
+    # 온체인 라플 연결 (인덱서가 이 (컨트랙트, raffleId) 의 로그를 이 이벤트에 반영)
+    contract_address = request.form.get('contract_address') or CONTRACT_ADDRESS
+    onchain_raffle_id = request.form.get('onchain_raffle_id')
     file = request.files.get('csv')
+    mapping = request.form.get('mapping')  # {"email": "CSV 컬럼명", ...} JSON, 없으면 헤더로 추정
     if not name or not start_at or not end_at:
         return jsonify({'error': 'name, start_at, end_at required'}), 400
+    try:
+        mapping = json.loads(mapping) if mapping else None
+    except ValueError:
+        return jsonify({'error': 'mapping must be JSON'}), 400
 
     upload_csv_path = None
     if file:
         filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
         file.save(file_path)
         upload_csv_path = file_path
 
@@ -154,26 +210,156 @@ def create_event():
             start_at=start_at,
             end_at=end_at,
             participant_cap=int(participant_cap) if participant_cap else None,
-            upload_csv_path=upload_csv_path
+            upload_csv_path=upload_csv_path,
+            consumer_contract_address=contract_address,
+            onchain_raffle_id=int(onchain_raffle_id) if onchain_raffle_id else None
         )
         s.add(event)
         s.flush()
-        return jsonify({'id': event.id, 'name': event.name, 'upload_csv_path': event.upload_csv_path}), 201
+        stats.ensure_row(s, event.id)
+        result = {'id': event.id, 'name': event.name, 'upload_csv_path': event.upload_csv_path}
+    remember_event_owner(user_id, result['id'])
+    try:
+        qr.prerender(result['id'])  # 첫 조회부터 캐시 히트
+    except Exception as e:
+        print("[WARN] QR 사전 렌더링 실패:", e)
+
+    # 이벤트 커밋 후 참가자 CSV 적재는 백그라운드 작업으로
+    if upload_csv_path:
+        result['import_job_id'] = jobs.enqueue('csv_import', {'mapping': mapping},
+                                               event_id=result['id'], owner_id=user_id)
+    return jsonify(result), 201
+
+
+# 참가자 CSV (재)임포트: body {"mapping": {...}} 선택
+@api.route('/api/events/<int:event_id>/import', methods=['POST'])
+@require_auth
+def import_event_csv(event_id):
+    user_id = g.user_id
+    mapping = (request.get_json(silent=True) or {}).get('mapping')
+    with session_scope() as s:
+        event = s.query(Event).filter_by(id=event_id, owner_id=user_id).first()
+        if not event:
+            return jsonify({'error': 'event not found or not owned by user'}), 404
+        csv_path = event.upload_csv_path
+    if not csv_path or not os.path.exists(csv_path):
+        return jsonify({'error': 'csv file not found'}), 404
+    job_id = jobs.enqueue('csv_import', {'mapping': mapping}, event_id=event_id, owner_id=user_id)
+    return jsonify({'job_id': job_id}), 202
+
+
+@job_handler('csv_import')
+def run_csv_import_job(ctx):
+    with session_scope() as s:
+        csv_path = s.get(Event, ctx.event_id).upload_csv_path
+    try:
+        report = import_csv(ctx.event_id, csv_path, ctx.payload.get('mapping'),
+                            on_progress=lambda r: ctx.set_progress(r.total))
+    except CsvImportError as e:
+        # 입력 문제는 재시도해도 같으므로 바로 failed
+        raise jobs.JobFailed(str(e)) from e
+    ctx.set_progress(report.total, report.total, force=True)
+    return report.to_dict()
+
+
+# 응모 서명(enterWithSig) 일괄 검증: lock() 전에 실행
+@api.route('/api/events/<int:event_id>/signatures/verify', methods=['POST'])
+@require_auth
+def verify_event_signatures(event_id):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    job_id = jobs.enqueue('verify_signatures', event_id=event_id, owner_id=g.user_id)
+    return jsonify({'job_id': job_id}), 202
+
+
+@job_handler('verify_signatures')
+def run_verify_signatures_job(ctx):
+    import sigverify  # eth_keys 는 작업 실행 시에만 로드
+    return sigverify.verify_event_signatures(ctx.event_id, on_progress=ctx.set_progress)
+
+
+# 검증된 서명 응모를 가스 대납(enterWithSig)으로 온체인 기록: verify 이후, lock() 전에 실행
+@api.route('/api/events/<int:event_id>/relay', methods=['POST'])
+@require_auth
+def relay_event_entries(event_id):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    if not chain.RPC_URLS:
+        return jsonify({'error': 'RPC not configured'}), 500
+    job_id = jobs.enqueue('relay_entries', event_id=event_id, owner_id=g.user_id)
+    return jsonify({'job_id': job_id}), 202
+
+
+@job_handler('relay_entries')
+def run_relay_entries_job(ctx):
+    import relayer  # eth_account 는 작업 실행 시에만 로드
+    try:
+        return relayer.relay_event(ctx.event_id, on_progress=ctx.set_progress)
+    except relayer.RelayError as e:
+        return {'error': str(e)}
+
+
+# VRF 난수로 당첨자 추첨 (재추첨은 body {"force": true}). 온체인 래플은 저장된 당첨자를 검증만 함
+@api.route('/api/events/<int:event_id>/draw', methods=['POST'])
+@require_auth
+def draw_winners(event_id):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    force = bool((request.get_json(silent=True) or {}).get('force'))
+    job_id = jobs.enqueue('draw', {'force': force}, event_id=event_id, owner_id=g.user_id)
+    return jsonify({'job_id': job_id}), 202
+
+
+@job_handler('draw')
+def run_draw_job(ctx):
+    import draw
+    try:
+        return draw.draw_event(ctx.event_id, force=ctx.payload.get('force', False))
+    except draw.DrawError as e:
+        return {'error': str(e)}
+
+
+# 작업 상태/진행률 조회 (소유자 지정 작업은 JWT 필요)
+@api.route('/api/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        if not job:
+            return jsonify({'error': 'job not found'}), 404
+        if job.owner_id is not None:
+            try:
+                user_id = current_user_id()
+            except AuthError as e:
+                return jsonify({'error': str(e)}), 401
+            if job.owner_id != user_id:
+                return jsonify({'error': 'job not found'}), 404
+        return jsonify(jobs.job_to_dict(job))
+
+
+# 이벤트별 작업 목록 (최근 50개)
+@api.route('/api/events/<int:event_id>/jobs', methods=['GET'])
+@require_auth
+def list_event_jobs(event_id):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    with session_scope() as s:
+        rows = (s.query(Job).filter_by(event_id=event_id)
+                .order_by(Job.created_at.desc(), Job.id.desc()).limit(50).all())
+        return jsonify([jobs.job_to_dict(j) for j in rows])
 
 # 유저가 만든 이벤트 목록 조회 (JWT 인증 필요)
-@app.route('/api/events', methods=['GET'])
+@api.route('/api/events', methods=['GET'])
+@require_auth
 def list_events():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({'error': 'Authorization header required'}), 401
+    user_id = g.user_id
     try:
-        token = token.replace('Bearer ', '')
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user_id = payload['user_id']
-    except Exception:
-        return jsonify({'error': 'invalid token'}), 401
-    with session_scope() as s:
-        events = s.query(Event).filter_by(owner_id=user_id).order_by(Event.created_at.desc()).all()
+        cursor, limit = page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with read_session_scope() as s:
+        stmt = select(Event.id, Event.name, Event.start_at, Event.end_at, Event.participant_cap,
+                      Event.upload_csv_path, Event.created_at).where(Event.owner_id == user_id)
+        events, next_cursor = keyset_page(s, stmt, Event.created_at, Event.id, cursor, limit)
         result = [
             {
                 'id': e.id,
@@ -185,8 +371,103 @@ def list_events():
             }
             for e in events
         ]
-        return jsonify(result)
-@app.route('/api/register', methods=['POST'])
+        return paged_response(jsonify(result), next_cursor)
+
+
+# 이벤트 집계 (event_stats, O(1))
+@api.route('/api/events/<int:event_id>/summary', methods=['GET'])
+@require_auth
+def event_summary(event_id):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    with read_session_scope() as s:
+        summary = stats.get_summary(s, event_id)
+    if summary is None:
+        return jsonify({'error': 'stats not initialized, run: python stats.py reconcile'}), 404
+    return jsonify(summary)
+
+
+# 이벤트 데이터 내보내기 (entries / winners / tx). ?format=csv|ndjson, ?gzip=1
+@api.route('/api/events/<int:event_id>/export/<kind>', methods=['GET'])
+@require_auth
+def export_event_data(event_id, kind):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    fmt = request.args.get('format', 'csv').lower()
+    gzip = request.args.get('gzip') in ('1', 'true')
+    try:
+        body = exports.export(kind, event_id, fmt, gzip)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    headers = {
+        'Content-Disposition': f'attachment; filename="{exports.filename(kind, event_id, fmt, gzip)}"',
+        'X-Accel-Buffering': 'no',  # nginx 가 전체를 모았다가 보내지 않도록
+    }
+    return Response(body, mimetype='application/gzip' if gzip else exports.FORMATS[fmt], headers=headers)
+
+
+# 참가자 응모 (공개, QR 응모 페이지에서 호출). body: {"nickname", "email", "wallet_address", ...추가 항목}
+# 쓰기 큐에 넣고 배치 저장 결과를 기다림 → 201 접수 / 409 중복·정원 초과 / 503 혼잡
+@api.route('/api/events/<int:event_id>/entries', methods=['POST'])
+def submit_entry(event_id):
+    try:
+        fut = entries.submit_entry(event_id, request.get_json(silent=True))
+        result = fut.result(timeout=entries.ENTRY_WAIT_TIMEOUT)
+    except entries.EntryError as e:
+        return jsonify({'error': str(e)}), e.status
+    except FuturesTimeout:
+        return jsonify({'error': 'busy, retry later'}), 503
+    body, status = entries.result_response(result)
+    return jsonify(body), status
+
+
+# 실시간 알림 (SSE, 공개): event: entries / state / winners. 대규모 시청은 ASGI 모드 (연결당 스레드 점유)
+@api.route('/api/events/<int:event_id>/stream', methods=['GET'])
+def event_stream(event_id):
+    if not push.event_exists(event_id):
+        return jsonify({'error': 'event not found'}), 404
+    # 스레드 모드는 연결마다 워커 스레드를 잡으므로 상한을 넘으면 거절 (클라이언트는 Retry-After 뒤 재연결)
+    release = push.thread_slots.acquire()
+    if release is None:
+        resp = jsonify({'error': 'too many live connections'})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = str(push.PUSH_BUSY_RETRY)
+        return resp
+    resp = Response(push.stream(event_id, release), mimetype='text/event-stream', headers=push.SSE_HEADERS)
+    resp.call_on_close(release)  # 제너레이터가 시작되기 전에 끊긴 경우
+    return resp
+
+
+# 이벤트 참가자 목록 (커서 페이지네이션, ?status= 필터)
+@api.route('/api/events/<int:event_id>/entries', methods=['GET'])
+@require_auth
+def list_entries(event_id):
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    try:
+        cursor, limit = page_args()
+        status = EntryStatus(request.args['status']) if request.args.get('status') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with read_session_scope() as s:
+        stmt = select(Entry.id, Entry.nickname, Entry.email, Entry.wallet_address, Entry.status,
+                      Entry.created_at).where(Entry.event_id == event_id)
+        if status:
+            stmt = stmt.where(Entry.status == status)
+        rows, next_cursor = keyset_page(s, stmt, Entry.created_at, Entry.id, cursor, limit)
+        result = [
+            {
+                'id': e.id,
+                'nickname': e.nickname,
+                'email': e.email,
+                'wallet_address': e.wallet_address,
+                'status': e.status.value,
+                'created_at': e.created_at
+            }
+            for e in rows
+        ]
+        return paged_response(jsonify(result), next_cursor)
+@api.route('/api/register', methods=['POST'])
 def register():
     data = request.json
     email = data.get('email')
@@ -194,105 +475,192 @@ def register():
     wallet_address = data.get('wallet_address')
     if not email or not password:
         return jsonify({'error': 'email, password required'}), 400
-    with session_scope() as s:
-        if s.query(User).filter_by(email=email).first():
-            return jsonify({'error': 'email already exists'}), 409
-        if wallet_address and s.query(User).filter_by(wallet_address=wallet_address).first():
-            return jsonify({'error': 'wallet_address already exists'}), 409
-        user = User(
-            email=email,
-            password_hash=generate_password_hash(password),
-            wallet_address=wallet_address
-        )
-        s.add(user)
-        s.flush()
-        return jsonify({'id': user.id, 'email': user.email, 'wallet_address': user.wallet_address}), 201
+    try:
+        passwords.throttle(_client_ip())
+    except passwords.PasswordError as e:
+        return _password_error(e)
+    with read_session_scope() as s:
+        # email / wallet 중복을 한 번에 조회
+        cond = User.email == email
+        if wallet_address:
+            cond = or_(cond, User.wallet_address == wallet_address)
+        taken = s.execute(select(User.email, User.wallet_address).where(cond).limit(2)).all()
+    if any(u.email and u.email.lower() == email.lower() for u in taken):
+        return jsonify({'error': 'email already exists'}), 409
+    if taken:
+        return jsonify({'error': 'wallet_address already exists'}), 409
+    # 해시는 DB 연결을 잡지 않은 채로 해시 풀에서 계산
+    try:
+        password_hash = passwords.hash_password(password)
+    except passwords.PasswordError as e:
+        return _password_error(e)
+    try:
+        with session_scope() as s:
+            user = User(email=email, password_hash=password_hash, wallet_address=wallet_address)
+            s.add(user)
+            s.flush()
+            return jsonify({'id': user.id, 'email': user.email, 'wallet_address': user.wallet_address}), 201
+    except IntegrityError:  # 조회와 저장 사이에 같은 email/wallet 이 먼저 들어옴
+        return jsonify({'error': 'email or wallet_address already exists'}), 409
+
+
+# 호스트명은 컨테이너 재시작으로 IP 가 바뀔 수 있어 60초마다 다시 조회
+_proxy_networks = TTLCache(maxsize=1, ttl=60)
+
+
+def _trusted_proxy_networks():
+    networks = _proxy_networks.get('all')
+    if networks is None:
+        networks = []
+        for proxy in TRUSTED_PROXIES:
+            try:
+                networks.append(ipaddress.ip_network(proxy, strict=False))
+                continue
+            except ValueError:
+                pass
+            try:
+                networks += {ipaddress.ip_network(info[4][0]) for info in socket.getaddrinfo(proxy, None)}
+            except OSError as e:
+                current_app.logger.warning('TRUSTED_PROXIES: cannot resolve %s: %s', proxy, e)
+        _proxy_networks.set('all', networks)
+    return networks
+
+
+def _client_ip():
+    # nginx 가 X-Real-IP 를 덮어써서 넘긴다 (nginx.conf). 믿을 수 있는 프록시에서 온 요청만 헤더를 사용
+    addr = request.remote_addr
+    real_ip = request.headers.get('X-Real-IP')
+    if not real_ip or not addr or not TRUSTED_PROXIES:
+        return addr
+    try:
+        peer = ipaddress.ip_address(addr)
+    except ValueError:
+        return addr
+    if any(peer in net for net in _trusted_proxy_networks()):
+        return real_ip
+    return addr
 
 
+def _password_error(e):
+    resp = jsonify({'error': str(e)})
+    resp.status_code = e.status
+    resp.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.999)))
+    return resp
 
 
 # 로그인: 이메일+비밀번호로 인증
-@app.route('/api/login', methods=['POST'])
+# 속도 제한(IP/이메일) → 사용자 조회 → 해시 풀에서 검증 → (해시 방식이 바뀌었으면) 새 해시 저장
+@api.route('/api/login', methods=['POST'])
 def login():
     data = request.json
     email = data.get('email')
     password = data.get('password')
     if not email or not password:
         return jsonify({'error': 'email, password required'}), 400
-    with session_scope() as s:
-        user = s.query(User).filter_by(email=email).first()
-        if not user or not user.password_hash or not check_password_hash(user.password_hash, password):
+    try:
+        passwords.throttle(_client_ip(), email)
+        # 가입 직후 로그인 / 방금 갱신된 해시가 복제 지연으로 안 보이지 않도록 primary 에서 읽음
+        with session_scope() as s:
+            user = s.execute(
+                select(User.id, User.email, User.wallet_address, User.password_hash).where(User.email == email)
+            ).first()
+        if not user or not user.password_hash:
             return jsonify({'error': 'invalid credentials'}), 401
-        token = jwt.encode({
-            'user_id': user.id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm='HS256')
-        return jsonify({'token': token, 'user': {'id': user.id, 'email': user.email, 'wallet_address': user.wallet_address}})
-
-
-# 이벤트 응모 QR코드 반환 (PNG)
-@app.route('/api/events/<int:event_id>/qr', methods=['GET'])
+        ok, new_hash = passwords.verify_password(user.password_hash, password)
+    except passwords.PasswordError as e:
+        return _password_error(e)
+    if not ok:
+        return jsonify({'error': 'invalid credentials'}), 401
+    if new_hash:
+        with session_scope() as s:
+            s.execute(update(User).where(User.id == user.id, User.password_hash == user.password_hash)
+                      .values(password_hash=new_hash))
+    token = jwt.encode({
+        'user_id': user.id,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+    }, current_app.config['SECRET_KEY'], algorithm='HS256')
+    return jsonify({'token': token, 'user': {'id': user.id, 'email': user.email, 'wallet_address': user.wallet_address}})
+
+
+# 이벤트 응모 QR코드 반환 (PNG 기본, ?format=svg, ?size=box 픽셀)
+# 응모 페이지 URL 은 ENTRY_PAGE_URL 환경변수 (qr.py)
+@api.route('/api/events/<int:event_id>/qr', methods=['GET'])
 def event_qr(event_id):
-    # 실제 서비스라면, 프론트엔드의 응모 페이지 URL을 아래에 맞게 작성
-    base_url = os.environ.get('ENTRY_PAGE_URL', 'http://localhost/mobile')
-    qr_url = f"{base_url}?event_id={event_id}"
-    img = qrcode.make(qr_url)
-    buf = io.BytesIO()
-    img.save(buf, format='PNG')
-    buf.seek(0)
-    return send_file(buf, mimetype='image/png', as_attachment=False, download_name=f'event_{event_id}_qr.png')
+    fmt = request.args.get('format', 'png').lower()
+    if fmt not in qr.FORMATS:
+        return jsonify({'error': 'format must be png or svg'}), 400
+    size = qr.clamp_size(request.args.get('size', qr.QR_DEFAULT_SIZE, type=int) or qr.QR_DEFAULT_SIZE)
+    if not qr.event_exists(event_id):
+        return jsonify({'error': 'event not found'}), 404
+    # ETag 는 내용 주소라 렌더링 없이 계산 → 304 는 이미지 생성/디스크 조회 없이 응답
+    etag = qr.cache_key(event_id, size, fmt)
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': f'public, max-age={QR_MAX_AGE}'}
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+    data, _ = qr.get_qr(event_id, size, fmt)
+    resp = send_file(io.BytesIO(data), mimetype=qr.FORMATS[fmt], as_attachment=False,
+                     download_name=f'event_{event_id}_qr.{fmt}', etag=False)
+    resp.headers.update(headers)
+    return resp
 
 
 # CSV 헤더(필드명) 추출 API
-@app.route('/api/events/<int:event_id>/csv-fields', methods=['GET'])
+@api.route('/api/events/<int:event_id>/csv-fields', methods=['GET'])
+@require_auth
 def get_event_csv_fields(event_id):
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({'error': 'Authorization header required'}), 401
+    if not owns_event(g.user_id, event_id):
+        return jsonify({'error': 'event not found or not owned by user'}), 404
+    with read_session_scope() as s:
+        csv_path = s.execute(select(Event.upload_csv_path).where(Event.id == event_id)).scalar()
+    if not csv_path or not os.path.exists(csv_path):
+        return jsonify({'error': 'csv file not found'}), 404
     try:
-        token = token.replace('Bearer ', '')
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user_id = payload['user_id']
-    except Exception:
-        return jsonify({'error': 'invalid token'}), 401
-    with session_scope() as s:
-        event = s.query(Event).filter_by(id=event_id, owner_id=user_id).first()
-        if not event:
-            return jsonify({'error': 'event not found or not owned by user'}), 404
-        if not event.upload_csv_path or not os.path.exists(event.upload_csv_path):
-            return jsonify({'error': 'csv file not found'}), 404
-        try:
-            with open(event.upload_csv_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                headers = next(reader)
-            return jsonify({'fields': headers})
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        with open(csv_path, newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            headers = next(reader)
+        return jsonify({'fields': headers})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 
+# ABI / web3 컨트랙트는 처음 필요할 때 로드 (web3 import 가 무거움)
+ABI_PATH = os.path.join(os.path.dirname(__file__), '../artifacts/contracts/SponsoredRaffle.sol/SponsoredRaffle.json')
+_contract = None
+_contract_lock = threading.Lock()
 
 
-# ABI 로드
-CONTRACT_ABI = None
-try:
-    abi_path = os.path.join(os.path.dirname(__file__), '../artifacts/contracts/SponsoredRaffle.sol/SponsoredRaffle.json')
-    with open(abi_path) as f:
-        CONTRACT_ABI = json.load(f)["abi"]
-except Exception as e:
-    print("[WARN] ABI 파일 로드 실패:", e)
+def contract_configured() -> bool:
+    return bool(CONTRACT_ADDRESS and chain.RPC_URLS)
 
-# web3 인스턴스 및 컨트랙트
-w3 = Web3(Web3.HTTPProvider(RPC_URL)) if RPC_URL else None
-raffle_contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=CONTRACT_ABI) if w3 and CONTRACT_ABI and CONTRACT_ADDRESS else None
 
+def get_contract():
+    """SponsoredRaffle web3 컨트랙트 (설정/ABI 가 없으면 None)"""
+    global _contract
+    if _contract is None and contract_configured():
+        with _contract_lock:
+            if _contract is None:
+                try:
+                    with open(ABI_PATH) as f:
+                        abi = json.load(f)["abi"]
+                except Exception as e:
+                    print("[WARN] ABI 파일 로드 실패:", e)
+                    return None
+                from web3 import Web3
+                # HTTP 세션은 chain 클라이언트의 keep-alive 풀 공유
+                w3 = Web3(Web3.HTTPProvider(chain.RPC_URLS[0], session=chain.get_client().session))
+                _contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=abi)
+    return _contract
 
 
-# 컨트랙트 config 정보 반환
-@app.route('/api/raffle/config', methods=['GET'])
+
+# 컨트랙트 config 정보 반환 (view 호출은 raffle_views 캐시 경유)
+@api.route('/api/raffle/config', methods=['GET'])
 def get_raffle_config():
-    if not raffle_contract:
+    if not contract_configured():
         return jsonify({'error': 'contract not configured'}), 500
     try:
-        raffle_id = raffle_contract.functions.raffleId().call()
+        raffle_id = raffle_views.raffle_state(CONTRACT_ADDRESS)['raffleId']
         return jsonify({
             'contract': CONTRACT_ADDRESS,
             'chainId': CHAIN_ID,
@@ -303,39 +671,152 @@ def get_raffle_config():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# 라플 락(lock) 트랜잭션
-@app.route('/api/raffle/lock', methods=['POST'])
-def raffle_lock():
-    if not raffle_contract:
+# 컨트랙트 상태 (raffleId, entrantsCount, winnersCount, phase)
+@api.route('/api/raffle/state', methods=['GET'])
+def get_raffle_state():
+    if not contract_configured():
         return jsonify({'error': 'contract not configured'}), 500
     try:
-        # PRIVATE_KEY로 서명자 계정 준비
-        private_key = os.environ.get('PRIVATE_KEY')
-        if not private_key:
-            return jsonify({'error': 'PRIVATE_KEY not set'}), 500
-        acct = w3.eth.account.from_key(private_key)
-        tx = raffle_contract.functions.lock().build_transaction({
-            'from': acct.address,
-            'nonce': w3.eth.get_transaction_count(acct.address),
-            'gas': 300000,
-            'gasPrice': w3.eth.gas_price,
-            'chainId': CHAIN_ID
-        })
-        signed = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-        rcpt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        return jsonify({'ok': True, 'txHash': rcpt.transactionHash.hex()})
+        return jsonify({'contract': CONTRACT_ADDRESS, **raffle_views.raffle_state(CONTRACT_ADDRESS)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/health')
+# view 캐시 적중률
+@api.route('/api/raffle/cache-stats', methods=['GET'])
+def get_raffle_cache_stats():
+    return jsonify(raffle_views.cache_stats())
+
+
+# 라플 락(lock) 트랜잭션: 작업 큐에 넣고 바로 job id 반환
+@api.route('/api/raffle/lock', methods=['POST'])
+def raffle_lock():
+    if not get_contract():
+        return jsonify({'error': 'contract not configured'}), 500
+    if not os.environ.get('PRIVATE_KEY'):
+        return jsonify({'error': 'PRIVATE_KEY not set'}), 500
+    job_id = jobs.enqueue('raffle_lock')
+    return jsonify({'ok': True, 'job_id': job_id}), 202
+
+
+@job_handler('raffle_lock')
+def run_raffle_lock_job(ctx):
+    # PRIVATE_KEY로 서명자 계정 준비
+    private_key = os.environ.get('PRIVATE_KEY')
+    if not private_key:
+        raise RuntimeError('PRIVATE_KEY not set')
+    # nonce 는 로컬 할당, gas/gasPrice 는 캐시 + 배치 조회. 영수증은 txtracker 폴러가 반영
+    contract = get_contract()
+    if not contract:
+        raise RuntimeError('contract not configured')
+    tx_hash = txtracker.submit(private_key, contract.functions.lock(), TxType.other,
+                               metadata={'fn': 'lock'})
+    return {'txHash': tx_hash}
+
+
+# 트랜잭션 상태 조회 (tx_logs)
+@api.route('/api/tx/<tx_hash>', methods=['GET'])
+def get_tx(tx_hash):
+    with session_scope() as s:
+        t = s.query(TxLog).filter_by(tx_hash=tx_hash.lower()).first()
+        if not t:
+            return jsonify({'error': 'tx not found'}), 404
+        return jsonify(txtracker.tx_to_dict(t))
+
+
+# 준비 상태: DB/RPC probe 결과 (HEALTH_CACHE_TTL 초 캐시). 하나라도 실패면 503
+@api.route('/api/health')
 def health():
-    try:
-        return jsonify({'status': 'ok'})
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+    result = health_checks.check()
+    return jsonify(result), 200 if result['status'] == 'ok' else 503
+
+
+# 생존 확인: 프로세스가 요청을 받을 수 있는지만 (의존성 확인 없음)
+@api.route('/api/health/live')
+def health_live():
+    return jsonify({'status': 'ok'})
+
+
+# Prometheus 지표. METRICS_TOKEN 을 설정하면 Authorization: Bearer <token> 필요
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+@api.route('/api/metrics')
+def get_metrics():
+    if METRICS_TOKEN and request.headers.get('Authorization', '') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({'error': 'unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@metrics.collector
+def _cache_gauges():
+    caches = {'qr': qr.cache_stats(), 'raffle_state': raffle_views.cache_stats(), **{
+        f'auth_{name}': st for name, st in auth.cache_stats().items()}}
+    for name, st in caches.items():
+        yield 'cache_entries', 'Entries held in a process-local cache', {'cache': name}, st['size']
+        yield 'cache_hits', 'Cache hits since process start', {'cache': name}, st['hits']
+        yield 'cache_misses', 'Cache misses since process start', {'cache': name}, st['misses']
+    if entries._writer is not None:
+        st = entries._writer.stats()
+        yield 'entry_writer_queued', 'Entries waiting for the batch writer', {}, st['queued']
+        yield 'entry_writer_flushes', 'Batch writer flushes since process start', {}, st['flushes']
+        yield 'entry_writer_rows', 'Rows written by the batch writer since process start', {}, st['rows']
+
+
+def _start_timer():
+    metrics.start_request()
+    g.request_started = time.perf_counter()
+
+
+def _record_request(resp):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # 라우트 템플릿(/api/events/<int:event_id>) 단위로 묶어 라벨 수를 제한
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.finish_request(route, request.method, resp.status_code, time.perf_counter() - started)
+    return resp
+
+
+def start_background() -> jobs.JobRunner:
+    """작업 러너 + (SCHEDULER / CHAIN_SYNC=embedded 면) 이벤트 스케줄러 / 영수증 폴러·인덱서. 프로세스당 한 번만 기동됨"""
+    runner = jobs.start_runner()
+    # 시작/종료 시각에 따른 상태 전환 + lock/VRF 요청. 워커마다 돌면 같은 단계 트랜잭션을 중복 전송하므로 기본은 off 이고
+    # python scheduler.py (compose 의 chain-sync 서비스) 한 곳에서 실행. 단일 프로세스 개발 환경만 SCHEDULER=embedded
+    if os.environ.get('SCHEDULER', 'off') == 'embedded':
+        import scheduler
+        scheduler.start_scheduler()
+    # 영수증 폴러/로그 인덱서/가스 교체는 체인 상태를 쓰는 단일 작업 (워커마다 돌면 같은 RPC 를 N 배로 호출하고
+    # 체크포인트를 두고 경쟁함). 기본은 off 이고 python scheduler.py (compose 의 chain-sync 서비스) 한 곳에서 실행
+    if chain.RPC_URLS and os.environ.get('CHAIN_SYNC', 'off') == 'embedded':
+        start_chain_sync()
+    return runner
+
+
+def start_chain_sync():
+    txtracker.start_poller()
+    indexer.start_indexer()
+    if os.environ.get('SPONSOR_PRIVATE_KEYS') or os.environ.get('PRIVATE_KEY'):
+        import relayer
+        relayer.start_bumper()
+
+
+def create_app(config: dict | None = None) -> Flask:
+    """gunicorn 'app:create_app()'. config 로 테스트/벤치 설정을 덮어쓸 수 있음"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret')
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    # 백그라운드 작업: embedded(기본, 워커 프로세스마다 스레드 풀) / off(python jobs.py 별도 실행)
+    app.config['JOB_RUNNER'] = os.environ.get('JOB_RUNNER', 'embedded')
+    app.config.update(config or {})
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app.register_blueprint(api)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    metrics.start_flusher()
+    if app.config['JOB_RUNNER'] == 'embedded':
+        start_background()
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    create_app().run(host='0.0.0.0', port=5000)
@@ -0,0 +1,385 @@
+# asgi.py — 비동기(ASGI) 서빙 모드
+# 실행: pip install -r requirements-async.txt
+#       gunicorn -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8123 'asgi:create_asgi_app()'
+#
+# DB/RPC 응답을 기다리는 시간이 대부분인 조회 라우트(목록, 집계, 컨트랙트 view, tx 상태)는
+# aiomysql + AsyncWeb3 로 이벤트 루프에서 직접 처리해 워커 하나가 수백 개 요청을 동시에 들고 있는다.
+# 나머지 라우트는 기존 Flask 앱(app.create_app())을 스레드 풀에서 그대로 실행한다 (WSGI 마운트).
+# 실시간 알림(SSE, push.py)도 연결당 코루틴으로 받으므로 수천 개 연결을 워커 하나가 유지할 수 있다.
+from __future__ import annotations
+import asyncio
+import contextlib
+import datetime
+import decimal
+import functools
+import json
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import http_date
+
+import app as flask_app
+import auth
+import chain
+import entries
+import metrics
+import models
+import push
+import raffle_views
+import stats
+import storage
+import txtracker
+from models import Entry, EntryStatus, Event, Prize, TxLog
+from pagination import keyset_page, parse_page_args
+
+SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret')
+# Flask 로 넘기는 요청을 처리할 스레드 수
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', '16'))
+
+
+def async_url(url: str) -> str:
+    """동기 드라이버 URL → async 드라이버 URL (pymysql → aiomysql, sqlite → aiosqlite)"""
+    if url.startswith("mysql+pymysql://"):
+        return "mysql+aiomysql://" + url[len("mysql+pymysql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# -------------------------
+# DB (async 엔진; 풀 설정은 models 와 동일)
+# -------------------------
+def async_engine_kwargs(url: str, name: str) -> dict:
+    kw = models.engine_kwargs(url, name)
+    if "poolclass" in kw:
+        kw["poolclass"] = models.TimedAsyncQueuePool
+    return kw
+
+
+async_engine = create_async_engine(async_url(models.DATABASE_URL),
+                                   **async_engine_kwargs(models.DATABASE_URL, "async_primary"))
+metrics.install_sqlalchemy_hooks(async_engine.sync_engine, "async_primary")
+if models.READ_DATABASE_URL:
+    async_read_engine = create_async_engine(async_url(models.READ_DATABASE_URL),
+                                            **async_engine_kwargs(models.READ_DATABASE_URL, "async_replica"))
+    metrics.install_sqlalchemy_hooks(async_read_engine.sync_engine, "async_replica")
+    if models.READ_DATABASE_URL.startswith("mysql"):
+        event.listen(async_read_engine.sync_engine, "connect", models.replica_read_only)
+else:
+    async_read_engine = async_engine
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, expire_on_commit=False)
+
+
+# -------------------------
+# RPC (AsyncWeb3 provider 로 raw JSON-RPC 호출)
+# -------------------------
+_w3 = None
+
+
+def _async_w3():
+    global _w3
+    if _w3 is None:
+        from web3 import AsyncWeb3
+        _w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(chain.RPC_URLS[0],
+                                                    request_kwargs={'timeout': chain.RPC_TIMEOUT}))
+    return _w3
+
+
+async def rpc_call(method: str, params: list):
+    metrics.RPC_CALLS.inc(method=method)
+    started = time.perf_counter()
+    try:
+        resp = await _async_w3().provider.make_request(method, params)
+    except Exception:
+        metrics.RPC_ERRORS.inc(method=method)
+        raise
+    finally:
+        metrics.RPC_LATENCY.observe(time.perf_counter() - started, method=method)
+    if resp.get("error"):
+        metrics.RPC_ERRORS.inc(method=method)
+        err = resp["error"]
+        raise chain.RpcError(err.get("message", str(err)), err.get("code"))
+    return resp.get("result")
+
+
+# -------------------------
+# 응답/인증 도우미
+# -------------------------
+def _json_default(o):
+    # Flask jsonify 와 같은 직렬화 (날짜는 HTTP date 문자열)
+    if isinstance(o, (datetime.datetime, datetime.date)):
+        return http_date(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FlaskJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return json.dumps(content, default=_json_default, separators=(",", ":")).encode()
+
+
+def error(message: str, status: int) -> FlaskJSONResponse:
+    return FlaskJSONResponse({'error': message}, status_code=status)
+
+
+def paged(result, next_cursor) -> FlaskJSONResponse:
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+    return FlaskJSONResponse(result, headers=headers)
+
+
+def user_id_of(request: Request) -> int:
+    header = request.headers.get('Authorization')
+    if not header:
+        raise auth.AuthError('Authorization header required')
+    return auth.decode_token(header.replace('Bearer ', ''), SECRET_KEY)['user_id']
+
+
+async def owns_event(user_id: int, event_id: int) -> bool:
+    owned = auth.cached_ownership(user_id, event_id)
+    if owned is None:
+        async with AsyncSessionLocal() as s:
+            owned = (await s.execute(
+                select(Event.id).where(Event.id == event_id, Event.owner_id == user_id)
+            )).first() is not None
+        auth.cache_ownership(user_id, event_id, owned)
+    return owned
+
+
+def requires_auth(handler):
+    """JWT 확인 + (경로에 event_id 가 있으면) 소유권 확인. 통과 시 handler(request, user_id)"""
+    async def endpoint(request: Request):
+        try:
+            user_id = user_id_of(request)
+        except auth.AuthError as e:
+            return error(str(e), 401)
+        event_id = request.path_params.get('event_id')
+        if event_id is not None and not await owns_event(user_id, event_id):
+            return error('event not found or not owned by user', 404)
+        return await handler(request, user_id)
+    return endpoint
+
+
+# -------------------------
+# async 라우트 (app.py 의 같은 경로와 응답 형식 동일)
+# -------------------------
+@requires_auth
+async def list_events(request: Request, user_id: int):
+    try:
+        cursor, limit = parse_page_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+    stmt = select(Event.id, Event.name, Event.start_at, Event.end_at, Event.participant_cap,
+                  Event.upload_csv_path, Event.created_at).where(Event.owner_id == user_id)
+    async with AsyncReadSessionLocal() as s:
+        events, next_cursor = await s.run_sync(keyset_page, stmt, Event.created_at, Event.id, cursor, limit)
+    return paged([
+        {
+            'id': e.id,
+            'name': e.name,
+            'start_at': e.start_at,
+            'end_at': e.end_at,
+            'participant_cap': e.participant_cap,
+            'upload_csv_path': e.upload_csv_path
+        }
+        for e in events
+    ], next_cursor)
+
+
+@requires_auth
+async def list_prizes(request: Request, user_id: int):
+    event_id = request.query_params.get('event_id')
+    if not event_id:
+        return error('event_id required', 400)
+    try:
+        event_id = int(event_id)
+    except ValueError:
+        return error('event not found or not owned by user', 404)
+    if not await owns_event(user_id, event_id):
+        return error('event not found or not owned by user', 404)
+    try:
+        cursor, limit = parse_page_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+    stmt = select(Prize.id, Prize.name, Prize.winners_count, Prize.description, Prize.image_path,
+                  Prize.created_at).where(Prize.event_id == event_id)
+    async with AsyncReadSessionLocal() as s:
+        prizes, next_cursor = await s.run_sync(keyset_page, stmt, Prize.created_at, Prize.id, cursor, limit)
+    return paged([
+        {
+            'id': p.id,
+            'name': p.name,
+            'winners_count': p.winners_count,
+            'description': p.description,
+            'image_path': p.image_path,
+            **storage.image_urls(p.image_path)
+        }
+        for p in prizes
+    ], next_cursor)
+
+
+@requires_auth
+async def list_entries(request: Request, user_id: int):
+    event_id = request.path_params['event_id']
+    try:
+        cursor, limit = parse_page_args(request.query_params)
+        status = request.query_params.get('status')
+        status = EntryStatus(status) if status else None
+    except ValueError as e:
+        return error(str(e), 400)
+    stmt = select(Entry.id, Entry.nickname, Entry.email, Entry.wallet_address, Entry.status,
+                  Entry.created_at).where(Entry.event_id == event_id)
+    if status:
+        stmt = stmt.where(Entry.status == status)
+    async with AsyncReadSessionLocal() as s:
+        rows, next_cursor = await s.run_sync(keyset_page, stmt, Entry.created_at, Entry.id, cursor, limit)
+    return paged([
+        {
+            'id': e.id,
+            'nickname': e.nickname,
+            'email': e.email,
+            'wallet_address': e.wallet_address,
+            'status': e.status.value,
+            'created_at': e.created_at
+        }
+        for e in rows
+    ], next_cursor)
+
+
+async def submit_entry(request: Request):
+    event_id = request.path_params['event_id']
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    try:
+        # 검증(설정 캐시 미스 시 DB 조회)은 스레드 풀에서, 배치 저장 결과는 루프에서 기다림
+        fut = await run_in_threadpool(entries.submit_entry, event_id, data)
+        result = await asyncio.wait_for(asyncio.wrap_future(fut), entries.ENTRY_WAIT_TIMEOUT)
+    except entries.EntryError as e:
+        return error(str(e), e.status)
+    except asyncio.TimeoutError:
+        return error('busy, retry later', 503)
+    body, status = entries.result_response(result)
+    return FlaskJSONResponse(body, status_code=status)
+
+
+async def event_stream(request: Request):
+    event_id = request.path_params['event_id']
+    async with AsyncReadSessionLocal() as s:
+        found = (await s.execute(select(Event.id).where(Event.id == event_id))).first()
+    if not found:
+        return error('event not found', 404)
+    release = push.async_slots.acquire()
+    if release is None:
+        return FlaskJSONResponse({'error': 'too many live connections'}, status_code=503,
+                                 headers={'Retry-After': str(push.PUSH_BUSY_RETRY)})
+    return StreamingResponse(push.astream(event_id, release), media_type='text/event-stream',
+                             headers=push.SSE_HEADERS, background=BackgroundTask(release))
+
+
+@requires_auth
+async def event_summary(request: Request, user_id: int):
+    event_id = request.path_params['event_id']
+    async with AsyncReadSessionLocal() as s:
+        summary = await s.run_sync(stats.get_summary, event_id)
+    if summary is None:
+        return error('stats not initialized, run: python stats.py reconcile', 404)
+    return FlaskJSONResponse(summary)
+
+
+async def get_raffle_config(request: Request):
+    if not flask_app.contract_configured():
+        return error('contract not configured', 500)
+    try:
+        state = await raffle_views.araffle_state(rpc_call, flask_app.CONTRACT_ADDRESS)
+    except Exception as e:
+        return error(str(e), 500)
+    return FlaskJSONResponse({
+        'contract': flask_app.CONTRACT_ADDRESS,
+        'chainId': flask_app.CHAIN_ID,
+        'name': flask_app.RAFFLE_NAME,
+        'version': flask_app.RAFFLE_VERSION,
+        'raffleId': int(state['raffleId'])
+    })
+
+
+async def get_raffle_state(request: Request):
+    if not flask_app.contract_configured():
+        return error('contract not configured', 500)
+    try:
+        state = await raffle_views.araffle_state(rpc_call, flask_app.CONTRACT_ADDRESS)
+    except Exception as e:
+        return error(str(e), 500)
+    return FlaskJSONResponse({'contract': flask_app.CONTRACT_ADDRESS, **state})
+
+
+async def get_tx(request: Request):
+    async with AsyncSessionLocal() as s:
+        t = (await s.execute(
+            select(TxLog).where(TxLog.tx_hash == request.path_params['tx_hash'].lower())
+        )).scalars().first()
+    if not t:
+        return error('tx not found', 404)
+    return FlaskJSONResponse(txtracker.tx_to_dict(t))
+
+
+# -------------------------
+# 앱
+# -------------------------
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    yield
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
+def instrumented(path: str, endpoint):
+    """라우트별 지연/DB 쿼리 수 기록 (Flask 쪽은 app.py 의 before/after_request 훅이 기록)"""
+    @functools.wraps(endpoint)
+    async def wrapper(request: Request):
+        metrics.start_request()
+        started = time.perf_counter()
+        status = 500
+        try:
+            resp = await endpoint(request)
+            status = resp.status_code
+            return resp
+        finally:
+            metrics.finish_request(path, request.method, status, time.perf_counter() - started)
+    return wrapper
+
+
+def route(path: str, endpoint, methods):
+    return Route(path, instrumented(path, endpoint), methods=methods)
+
+
+def create_asgi_app(config: dict | None = None) -> Starlette:
+    wsgi = flask_app.create_app(config)
+    routes = [
+        route('/api/events', list_events, methods=['GET']),
+        route('/api/prizes', list_prizes, methods=['GET']),
+        route('/api/events/{event_id:int}/entries', list_entries, methods=['GET']),
+        route('/api/events/{event_id:int}/entries', submit_entry, methods=['POST']),
+        route('/api/events/{event_id:int}/summary', event_summary, methods=['GET']),
+        # 장시간 연결이라 지연 시간 지표에서 제외
+        Route('/api/events/{event_id:int}/stream', event_stream, methods=['GET']),
+        route('/api/raffle/config', get_raffle_config, methods=['GET']),
+        route('/api/raffle/state', get_raffle_state, methods=['GET']),
+        route('/api/tx/{tx_hash}', get_tx, methods=['GET']),
+        # 그 외(쓰기, 업로드, QR, 작업 등)는 기존 Flask 라우트
+        Mount('/', app=WSGIMiddleware(wsgi, workers=WSGI_THREADS)),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,99 @@
+# auth.py — JWT 인증/이벤트 소유권 확인 공용 레이어
+# 검증된 토큰 클레임과 (user_id, event_id) 소유 여부를 프로세스 메모리에 캐시한다.
+from __future__ import annotations
+import hashlib
+import os
+import time
+from functools import wraps
+
+import jwt
+from flask import current_app, g, jsonify, request
+
+from cache import TTLCache
+from models import session_scope, Event
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# 토큰 exp 가 더 이르면 그때까지만 캐시
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+# 다른 워커에서의 삭제가 반영되기까지의 최대 지연
+OWNERSHIP_CACHE_TTL = float(os.getenv("OWNERSHIP_CACHE_TTL", "60"))
+
+_claims_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+_owner_cache = TTLCache(AUTH_CACHE_SIZE, OWNERSHIP_CACHE_TTL)
+
+
+class AuthError(Exception):
+    pass
+
+
+def decode_token(token: str, secret: str | None = None) -> dict:
+    """HS256 토큰 검증. 같은 토큰(sha256 digest 기준)은 캐시된 클레임 재사용"""
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _claims_cache.get(key)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, secret or current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        claims['user_id']
+    except Exception:
+        raise AuthError('invalid token')
+    ttl = AUTH_CACHE_TTL
+    if claims.get('exp') is not None:
+        ttl = min(ttl, claims['exp'] - time.time())
+    if ttl > 0:
+        _claims_cache.set(key, claims, ttl)
+    return claims
+
+
+def current_user_id() -> int:
+    header = request.headers.get('Authorization')
+    if not header:
+        raise AuthError('Authorization header required')
+    return decode_token(header.replace('Bearer ', ''))['user_id']
+
+
+def require_auth(fn):
+    """JWT 필수 라우트용. 통과하면 g.user_id 설정, 실패하면 401"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            g.user_id = current_user_id()
+        except AuthError as e:
+            return jsonify({'error': str(e)}), 401
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+# -------------------------
+# 이벤트 소유권
+# -------------------------
+def cached_ownership(user_id: int, event_id: int) -> bool | None:
+    """캐시에 있으면 소유 여부, 없으면 None (asgi.py 의 async 조회용)"""
+    return _owner_cache.get((user_id, event_id))
+
+
+def cache_ownership(user_id: int, event_id: int, owned: bool):
+    _owner_cache.set((user_id, int(event_id)), owned)
+
+
+def owns_event(user_id: int, event_id) -> bool:
+    try:
+        event_id = int(event_id)
+    except (TypeError, ValueError):
+        return False
+    owned = cached_ownership(user_id, event_id)
+    if owned is not None:
+        return owned
+    with session_scope() as s:
+        owned = s.query(Event.id).filter_by(id=event_id, owner_id=user_id).first() is not None
+    cache_ownership(user_id, event_id, owned)
+    return owned
+
+
+def remember_event_owner(user_id: int, event_id: int):
+    """이벤트 생성 직후 호출 (이전에 캐시된 '소유 아님' 결과도 덮어씀)"""
+    cache_ownership(user_id, event_id, True)
+
+
+def cache_stats() -> dict:
+    return {'claims': _claims_cache.stats(), 'ownership': _owner_cache.stats()}
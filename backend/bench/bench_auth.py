@@ -0,0 +1,70 @@
+# bench_auth.py — JWT 검증/소유권 확인 캐시 효과 측정
+# 실행: cd backend && python bench/bench_auth.py [반복횟수]
+# 소유권 조회는 임시 sqlite DB 를 사용한다 (MySQL 이면 DATABASE_URL 지정).
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db")
+
+import jwt  # noqa: E402
+
+import auth  # noqa: E402
+from models import Base, engine, session_scope, User, Event  # noqa: E402
+
+SECRET = "bench-secret"
+
+
+def timeit(fn, n):
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - started) / n * 1e6  # µs/회
+
+
+def main(n: int = 20000):
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Event.__table__])
+    with session_scope() as s:
+        user = User(email="bench@example.com")
+        s.add(user)
+        s.flush()
+        event = Event(owner_id=user.id, name="bench", start_at=datetime.datetime(2030, 1, 1),
+                      end_at=datetime.datetime(2030, 1, 2))
+        s.add(event)
+        s.flush()
+        user_id, event_id = user.id, event.id
+
+    token = jwt.encode({"user_id": user_id,
+                        "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+                       SECRET, algorithm="HS256")
+
+    def raw_decode():
+        jwt.decode(token, SECRET, algorithms=["HS256"])
+
+    def cached_decode():
+        auth.decode_token(token, SECRET)
+
+    def raw_owner():
+        with session_scope() as s:
+            s.query(Event).filter_by(id=event_id, owner_id=user_id).first()
+
+    def cached_owner():
+        auth.owns_event(user_id, event_id)
+
+    rows = [
+        ("jwt.decode", timeit(raw_decode, n), timeit(cached_decode, n)),
+        ("ownership SELECT", timeit(raw_owner, max(n // 10, 1)), timeit(cached_owner, n)),
+    ]
+    print(f"{'step':<20}{'uncached µs':>14}{'cached µs':>12}{'saved µs':>12}")
+    for name, raw, cached in rows:
+        print(f"{name:<20}{raw:>14.2f}{cached:>12.2f}{raw - cached:>12.2f}")
+    print(f"{'per request':<20}{sum(r[1] for r in rows):>14.2f}{sum(r[2] for r in rows):>12.2f}"
+          f"{sum(r[1] - r[2] for r in rows):>12.2f}")
+    print("cache:", auth.cache_stats())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
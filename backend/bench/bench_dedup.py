@@ -0,0 +1,53 @@
+# bench_dedup.py — 중복 사전 필터(Bloom filter) 거짓 양성률/메모리/처리량 측정
+# 실행: cd backend && python bench/bench_dedup.py [키 수] [목표 오차율]
+# 비교용으로 같은 키를 파이썬 set 에 넣었을 때의 메모리도 함께 출력한다.
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_dedup.db")
+
+import dedup  # noqa: E402
+
+
+def emails(start: int, n: int):
+    return [f"user{i}@example.com" for i in range(start, start + n)]
+
+
+def main(n: int = 1_000_000, error_rate: float = dedup.DEDUP_ERROR_RATE):
+    members = [dedup.email_key(e) for e in emails(0, n)]
+    probes = [dedup.email_key(e) for e in emails(n, n)]
+
+    bloom = dedup.BloomFilter(n, error_rate)
+    started = time.perf_counter()
+    for key in members:
+        bloom.add(key)
+    add_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    false_negatives = sum(1 for key in members if key not in bloom)
+    false_positives = sum(1 for key in probes if key in bloom)
+    lookup_sec = time.perf_counter() - started
+
+    tracemalloc.start()
+    exact = set(members)
+    set_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del exact
+
+    per_million = 1_000_000 / n
+    print(f"keys {n:,}  target error {error_rate}  hashes {bloom.num_hashes}  bits {bloom.num_bits:,}")
+    print(f"  false positive rate  {false_positives / n:.4%}  ({false_positives:,} / {n:,})")
+    print(f"  false negatives      {false_negatives}")
+    print(f"  memory / 1M keys     bloom {bloom.nbytes * per_million / 2 ** 20:.2f} MiB"
+          f"   set {set_bytes * per_million / 2 ** 20:.1f} MiB")
+    print(f"  add                  {n / add_sec:,.0f} keys/s")
+    print(f"  lookup               {2 * n / lookup_sec:,.0f} keys/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else dedup.DEDUP_ERROR_RATE)
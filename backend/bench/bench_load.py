@@ -0,0 +1,89 @@
+# bench_load.py — HTTP 부하 테스트 (동기 gunicorn vs ASGI 비교용)
+# 실행: cd backend && python bench/bench_load.py http://127.0.0.1:8123 [--concurrency 200] [--duration 30]
+#         [--token JWT] [--path /api/events --path /api/raffle/state ...] [--json]
+#
+# 비교 방법 (같은 컨테이너 크기, 예: --cpus 1 --memory 512m):
+#   1) 동기:  gunicorn -w 2 -b 0.0.0.0:8123 'app:create_app()'
+#   2) ASGI:  gunicorn -w 2 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8123 'asgi:create_asgi_app()'
+# 각각에 같은 인자로 실행해 처리량/지연 분포를 비교한다. 부하 생성기는 서버와 다른 코어에서 돌릴 것.
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+
+DEFAULT_PATHS = ["/api/events?limit=50", "/api/raffle/state"]
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def worker(session, base: str, paths, deadline: float, latencies, errors, offset: int):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            async with session.get(base + path) as resp:
+                await resp.read()
+                if resp.status >= 500:
+                    errors[f"HTTP {resp.status}"] = errors.get(f"HTTP {resp.status}", 0) + 1
+                    continue
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(base: str, paths, concurrency: int, duration: float, token: str = None) -> dict:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    latencies, errors = [], {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as session:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(session, base.rstrip("/"), paths, deadline, latencies, errors, n)
+                               for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "duration_sec": round(elapsed, 2),
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--token")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    result = asyncio.run(run(args.url, args.paths or DEFAULT_PATHS, args.concurrency, args.duration, args.token))
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(f"{args.url}  c={result['concurrency']}  {result['duration_sec']}s")
+    print(f"  requests {result['requests']}  ({result['rps']} req/s)")
+    print(f"  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  mean {result['mean_ms']} ms")
+    if result["errors"]:
+        print(f"  errors {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# bench_relayer.py — relayer 처리량 (entries/s) 측정: 로컬 Hardhat 노드에 SponsoredRaffle 배포 후
+# 서명 응모 N건을 만들어 relayer.relay_event 로 전송하고 전부 확정(entrantsCount == N)될 때까지 잰다.
+# 실행: npx hardhat compile && npx hardhat node     (다른 터미널)
+#       cd backend && python bench/bench_relayer.py [--entries 1000] [--sponsors 4] [--block-time 1000]
+#                                                   [--sequential] [--rpc http://127.0.0.1:8545] [--json]
+#       node 없이: python bench/bench_relayer.py --eth-tester   (pip install "eth-tester[py-evm]", 프로세스 내 EVM)
+# --block-time(ms) 을 주면 자동 채굴을 끄고 일정 간격으로 블록을 만든다 (실제 체인에 가까운 조건).
+# --sequential 은 비교용으로 1건 전송 → 영수증 대기를 반복한다.
+# --eth-tester 는 tx 마다 즉시 블록을 만드는 py-evm 이라 EVM 실행(CPU)이 병목 — 노드 간 비교용이 아니라 회귀 확인용.
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ARTIFACT = os.path.join(ROOT, "artifacts", "contracts", "SponsoredRaffle.sol", "SponsoredRaffle.json")
+# hardhat node 기본 계정 (공개된 테스트용 니모닉)
+HARDHAT_MNEMONIC = "test test test test test test test test test test test junk"
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--entries", type=int, default=1000)
+    p.add_argument("--sponsors", type=int, default=4)
+    p.add_argument("--block-time", type=int, default=0, help="ms, 0 = hardhat automine")
+    p.add_argument("--sequential", action="store_true")
+    p.add_argument("--rpc", default="http://127.0.0.1:8545")
+    p.add_argument("--eth-tester", action="store_true", help="Hardhat 대신 프로세스 내 eth-tester(py-evm) 체인")
+    p.add_argument("--json", action="store_true")
+    return p.parse_args()
+
+
+args = parse_args()
+os.environ["RPC_URL"] = args.rpc
+_tester = None
+if args.eth_tester:
+    from web3.providers.eth_tester import EthereumTesterProvider
+    _tester = EthereumTesterProvider()
+    os.environ["CHAIN_ID"] = str(_tester.make_request("eth_chainId", [])["result"])
+os.environ.setdefault("CHAIN_ID", "31337")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_relayer.db")
+
+from eth_account import Account  # noqa: E402
+from eth_keys import keys  # noqa: E402
+from eth_utils import keccak  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+import chain  # noqa: E402
+import models  # noqa: E402
+import relayer  # noqa: E402
+import sigverify  # noqa: E402
+from models import session_scope, Entry, EntryStatus, Event, Signature, SignatureType, User  # noqa: E402
+
+Account.enable_unaudited_hdwallet_features()
+
+
+def hardhat_key(i: int) -> str:
+    return Account.from_mnemonic(HARDHAT_MNEMONIC, account_path=f"m/44'/60'/0'/0/{i}").key.hex()
+
+
+def deploy(client, deployer_key: str) -> str:
+    with open(ARTIFACT) as f:
+        bytecode = json.load(f)["bytecode"]
+    owner = Account.from_key(deployer_key).address
+    # constructor(owner_, operator_, winnersCount_)
+    ctor = relayer._address_word(owner) + relayer._address_word(owner) + relayer._word(1)
+    data = bytecode + ctor.hex()
+    tx = {"data": data, "value": 0, "chainId": chain.CHAIN_ID, "gas": 6_000_000,
+          "gasPrice": int(client.call("eth_gasPrice"), 16),
+          "nonce": int(client.call("eth_getTransactionCount", [owner, "pending"]), 16)}
+    tx_hash = client.call("eth_sendRawTransaction", [chain.raw_tx_hex(Account.sign_transaction(tx, deployer_key))])
+    return chain.wait_for_receipt(tx_hash, client=client, poll=0.2)["contractAddress"]
+
+
+def seed(n: int, contract: str) -> int:
+    """사용자 N명의 enterWithSig 서명을 만들어 valid 응모로 저장"""
+    domain_sep = sigverify.domain_separator(sigverify.RAFFLE_NAME, sigverify.RAFFLE_VERSION,
+                                            chain.CHAIN_ID, contract)
+    deadline = int(time.time()) + 3600
+    sigs, users = [], []
+    for i in range(n):
+        pk = keys.PrivateKey(os.urandom(32))
+        user = pk.public_key.to_checksum_address()
+        sig = pk.sign_msg_hash(sigverify.entry_digest(domain_sep, user, 1, 0, deadline)).to_bytes()
+        sig = sig[:64] + bytes([sig[64] + 27])  # 지갑 형식 (v 27/28)
+        sigs.append({"id": i + 1, "wallet_address": user, "signature": "0x" + sig.hex(),
+                     "signature_type": SignatureType.eth_signTypedData_v4, "chain_id": chain.CHAIN_ID,
+                     "message": json.dumps({"user": user, "raffleId": 1, "nonce": 0, "deadline": deadline})})
+        users.append(user)
+    with session_scope() as s:
+        owner = User(email="bench@example.com", password_hash="x")
+        s.add(owner)
+        s.flush()
+        event = Event(owner_id=owner.id, name="relayer bench", start_at=datetime.datetime(2025, 1, 1),
+                      end_at=datetime.datetime(2030, 1, 1), consumer_contract_address=contract)
+        s.add(event)
+        s.flush()
+        for sig in sigs:
+            sig["event_id"] = event.id
+        s.execute(insert(Signature.__table__), sigs)
+        s.execute(insert(Entry.__table__), [
+            {"event_id": event.id, "wallet_address": u, "signature_id": i + 1, "status": EntryStatus.valid}
+            for i, u in enumerate(users)])
+        return event.id
+
+
+def entrants(client, contract: str) -> int:
+    data = "0x" + keccak(text="entrantsCount()")[:4].hex()
+    return int(client.call("eth_call", [{"to": contract, "data": data}, "latest"]), 16)
+
+
+def run_sequential(event_id: int, contract: str, sponsor, client) -> dict:
+    started = time.perf_counter()
+    items, _ = relayer._parse(relayer._queued(event_id, 0, 1_000_000))
+    for it in items:
+        data = relayer.encode_enter(it["user"], it["nonce"], it["deadline"], it["signature"])
+        tx_hash, _ = chain.send_transaction(sponsor.private_key, contract, data, client=client)
+        chain.wait_for_receipt(tx_hash, client=client, poll=0.05)
+    elapsed = time.perf_counter() - started
+    return {"sent": len(items), "elapsed_sec": round(elapsed, 3),
+            "entries_per_sec": round(len(items) / elapsed, 1) if elapsed else 0.0}
+
+
+def _camel(key: str) -> str:
+    head, *rest = key.split("_")
+    return head + "".join(w.title() for w in rest)
+
+
+def _rpc_value(value):
+    # eth-tester 는 web3 포매터 이전의 파이썬 값(int/bytes, snake_case 키)을 돌려주므로 JSON-RPC 형식으로 맞춤
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, dict):
+        return {_camel(k): _rpc_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rpc_value(v) for v in value]
+    return value
+
+
+def _tester_request(req: dict) -> dict:
+    out = {"jsonrpc": "2.0", "id": req.get("id")}
+    params = list(req.get("params") or [])
+    if req["method"] == "eth_getBlockByNumber" and str(params[0]).startswith("0x"):
+        params[0] = int(params[0], 16)  # eth-tester 는 블록 번호를 int 로만 받음
+    if req["method"] in ("eth_call", "eth_estimateGas") and "from" not in params[0]:
+        # eth-tester 는 from 필수이고 잔고로 가스를 검사하므로 자금 있는 테스트 계정으로 호출
+        params[0] = {**params[0], "from": _tester.ethereum_tester.get_accounts()[0]}
+    try:
+        resp = _tester.make_request(req["method"], params)
+    except Exception as e:
+        return {**out, "error": {"code": -32000, "message": str(e)}}
+    if "error" in resp:
+        err = resp["error"]
+        return {**out, "error": err if isinstance(err, dict) else {"code": -32000, "message": str(err)}}
+    return {**out, "result": _rpc_value(resp.get("result"))}
+
+
+def tester_client(fund: list) -> chain.RpcClient:
+    """eth-tester 를 transport 로 쓰는 RpcClient. fund 의 주소들에 테스트 계정에서 1000 ETH 씩 송금"""
+    t = _tester.ethereum_tester
+    source = t.get_accounts()[0]
+    for address in fund:
+        t.send_transaction({"from": source, "to": address, "value": 1000 * 10 ** 18, "gas": 21000,
+                            "gas_price": 10 ** 9})
+
+    def transport(url, payload, timeout):
+        if isinstance(payload, list):
+            return [_tester_request(r) for r in payload]
+        return _tester_request(payload)
+    return chain.RpcClient(["eth-tester"], transport=transport)
+
+
+def main():
+    models.create_all()
+    if args.eth_tester:
+        keys_ = [hardhat_key(i) for i in range(args.sponsors + 1)]
+        chain.set_client(tester_client([Account.from_key(k).address for k in keys_]))
+    client = chain.get_client()
+    if args.block_time:
+        client.call("evm_setAutomine", [False])
+        client.call("evm_setIntervalMining", [args.block_time])
+    contract = deploy(client, hardhat_key(0))
+    sponsors = relayer.sponsors([hardhat_key(i + 1) for i in range(args.sponsors)])
+    print(f"contract {contract}, seeding {args.entries} signed entries ...", file=sys.stderr)
+    event_id = seed(args.entries, contract)
+
+    started = time.perf_counter()
+    if args.sequential:
+        result = run_sequential(event_id, contract, sponsors[0], client)
+    else:
+        result = relayer.relay_event(event_id, sponsors, client, wait=True)
+    confirmed_sec = time.perf_counter() - started
+    onchain = entrants(client, contract)
+    result.update(mode="sequential" if args.sequential else "pipelined", sponsors=len(sponsors),
+                  block_time_ms=args.block_time, entries=args.entries, onchain_entrants=onchain,
+                  confirmed_sec=round(confirmed_sec, 3),
+                  confirmed_per_sec=round(onchain / confirmed_sec, 1) if confirmed_sec else 0.0)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for k, v in result.items():
+            print(f"  {k:<18} {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# bench_sigverify.py — EIP-712 서명 일괄 검증 처리량 (1 / N / 전체 코어)
+# 실행: cd backend && python bench/bench_sigverify.py [서명 수]
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_keys import keys  # noqa: E402
+
+import sigverify  # noqa: E402
+
+CONTRACT = "0x" + "11" * 20
+
+
+def make_items(n: int):
+    domain_sep = sigverify.domain_separator("SponsoredRaffle", "1", 10143, CONTRACT)
+    deadline = int(time.time()) + 3600
+    items = []
+    for i in range(n):
+        pk = keys.PrivateKey(os.urandom(32))
+        user = pk.public_key.to_checksum_address()
+        digest = sigverify.entry_digest(domain_sep, user, 1, 0, deadline)
+        sig = pk.sign_msg_hash(digest).to_bytes()
+        sig = sig[:64] + bytes([sig[64] + 27])  # eth_keys 는 v 0/1, 지갑/컨트랙트 형식은 27/28
+        msg = json.dumps({"user": user, "raffleId": 1, "nonce": 0, "deadline": deadline})
+        items.append((i, i, user, msg, "0x" + sig.hex()))
+    return items, domain_sep
+
+
+def main(n: int = 20000):
+    print(f"generating {n} signatures ...")
+    items, domain_sep = make_items(n)
+    cores = os.cpu_count() or 1
+    for workers in sorted({1, max(cores // 2, 1), cores}):
+        started = time.perf_counter()
+        ok = sum(r[2] for chunk in sigverify.verify_batch(items, workers, domain_sep=domain_sep) for r in chunk)
+        elapsed = time.perf_counter() - started
+        assert ok == n, f"{n - ok} signatures failed"
+        print(f"workers={workers:<3} {elapsed:8.2f}s  {n / elapsed:10.0f} sigs/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,48 @@
+# bench_startup.py — 콜드 스타트 측정 (import app / create_app 시간, RSS, 로드된 무거운 모듈)
+# 실행: cd backend && python bench/bench_startup.py [반복횟수]
+# 매 회 새 인터프리터에서 측정하며, 백그라운드 스레드는 띄우지 않는다 (JOB_RUNNER=off).
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("web3", "qrcode", "PIL", "eth_keys", "eth_account")
+
+PROBE = f"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app({{'JOB_RUNNER': 'off'}})
+t2 = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (t1 - t0) * 1000,
+    'create_app_ms': (t2 - t1) * 1000,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_loaded': [m for m in {HEAVY!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_once(env) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(n: int = 5):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db")
+    env.setdefault("UPLOAD_FOLDER", tempfile.mkdtemp())
+    runs = [run_once(env) for _ in range(n)]
+    print(f"startup ({n} runs, median)")
+    for key in ("import_ms", "create_app_ms", "max_rss_mb"):
+        print(f"  {key:15s} {statistics.median(r[key] for r in runs):8.1f}")
+    print(f"  heavy modules loaded at startup: {', '.join(runs[0]['heavy_loaded']) or '(none)'}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,154 @@
+# datagen.py — 벤치마크용 합성 데이터 (users / events / prizes / entries, 수백만 행까지) + CSV 생성기
+# 실행: cd backend && python bench/datagen.py [--users 100] [--events-per-user 20] [--prizes-per-event 5]
+#                                          [--entries-per-event 1000] [--big-event-entries 1000000]
+#                                          [--csv out.csv --csv-rows 100000]
+# DATABASE_URL 을 따른다 (sqlite 파일 또는 로컬 MySQL). 같은 --seed 면 같은 데이터가 만들어진다.
+# 모든 사용자의 비밀번호는 BENCH_PASSWORD (해시는 한 번만 계산해 공유).
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PASSWORD = "bench-password"
+INSERT_CHUNK = int(os.environ.get("BENCH_INSERT_CHUNK", "10000"))
+CSV_HEADERS = ["nickname", "email", "wallet_address", "phone"]
+
+
+def email_for(event_id: int, i: int) -> str:
+    return f"entrant{i}@e{event_id}.example.com"
+
+
+def wallet_for(event_id: int, i: int) -> str:
+    return "0x" + hashlib.sha256(f"{event_id}:{i}".encode()).hexdigest()[:40]
+
+
+def _insert(s, table, rows):
+    from sqlalchemy import insert
+    for i in range(0, len(rows), INSERT_CHUNK):
+        s.execute(insert(table), rows[i:i + INSERT_CHUNK])
+
+
+def generate(users: int = 100, events_per_user: int = 20, prizes_per_event: int = 5,
+             entries_per_event: int = 1000, big_event_entries: int = 0, seed: int = 42,
+             csv_path: str = None) -> dict:
+    """데이터를 넣고 시나리오가 쓸 id 들을 돌려준다.
+    첫 사용자(bench0@example.com)가 '대표 사용자'이며, big_event_entries 가 있으면 그 사용자의
+    별도 이벤트 하나에 몰아 넣는다 (추첨/내보내기 시나리오용)."""
+    import passwords
+    import stats
+    from models import create_all, session_scope, Entry, EntryStatus, Event, EventStatus, Prize, User
+
+    create_all()
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    password_hash = passwords.hash_password(BENCH_PASSWORD)
+    base = datetime.datetime(2030, 1, 1)
+    with session_scope() as s:
+        _insert(s, User.__table__, [
+            {"email": f"bench{u}@example.com", "password_hash": password_hash, "nickname": f"bench{u}"}
+            for u in range(users)])
+        user_ids = [row[0] for row in s.execute(
+            User.__table__.select().with_only_columns(User.id)
+            .where(User.email.like("bench%@example.com")).order_by(User.id))]
+
+        event_rows = []
+        for uid in user_ids:
+            for e in range(events_per_user):
+                start = base + datetime.timedelta(days=rng.randrange(365), hours=rng.randrange(24))
+                event_rows.append({"owner_id": uid, "name": f"event {uid}-{e}", "start_at": start,
+                                   "end_at": start + datetime.timedelta(hours=6), "status": EventStatus.open,
+                                   "participant_cap": None, "upload_csv_path": csv_path})
+        _insert(s, Event.__table__, event_rows)
+        event_ids = [row[0] for row in s.execute(
+            Event.__table__.select().with_only_columns(Event.id).where(Event.owner_id.in_(user_ids))
+            .order_by(Event.id))]
+
+        _insert(s, Prize.__table__, [
+            {"event_id": ev, "name": f"prize {p}", "winners_count": 1 + p, "description": "bench"}
+            for ev in event_ids for p in range(prizes_per_event)])
+
+    def fill(event_id: int, n: int):
+        for lo in range(0, n, INSERT_CHUNK):
+            with session_scope() as s:
+                _insert(s, Entry.__table__, [
+                    {"event_id": event_id, "nickname": f"n{i}", "email": email_for(event_id, i),
+                     "wallet_address": wallet_for(event_id, i), "status": EntryStatus.valid}
+                    for i in range(lo, min(lo + INSERT_CHUNK, n))])
+
+    for ev in event_ids:
+        fill(ev, entries_per_event)
+
+    big_event_id = None
+    if big_event_entries:
+        with session_scope() as s:
+            big = Event(owner_id=user_ids[0], name="big event", start_at=base,
+                        end_at=base + datetime.timedelta(days=1), status=EventStatus.closed,
+                        randomness_value="0x" + hashlib.sha256(str(seed).encode()).hexdigest())
+            s.add(big)
+            s.flush()
+            big_event_id = big.id
+            _insert(s, Prize.__table__, [
+                {"event_id": big_event_id, "name": f"big prize {p}", "winners_count": 100, "description": "bench"}
+                for p in range(10)])
+        fill(big_event_id, big_event_entries)
+
+    stats.reconcile()
+    total_entries = len(event_ids) * entries_per_event + big_event_entries
+    return {
+        "owner_email": "bench0@example.com",
+        "password": BENCH_PASSWORD,
+        "owner_id": user_ids[0],
+        "owner_event_ids": event_ids[:events_per_user],
+        "big_event_id": big_event_id,
+        "rows": {"users": users, "events": len(event_ids) + (1 if big_event_id else 0),
+                 "prizes": len(event_ids) * prizes_per_event + (10 if big_event_id else 0),
+                 "entries": total_entries},
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+    }
+
+
+def write_csv(path: str, rows: int, duplicate_rate: float = 0.01, invalid_rate: float = 0.01,
+              seed: int = 42) -> str:
+    """참가자 CSV (임포트 시나리오용). 일부러 중복/잘못된 행을 섞는다"""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS)
+        for i in range(rows):
+            r = rng.random()
+            if i and r < duplicate_rate:
+                j = rng.randrange(i)  # 앞 행과 같은 email
+                writer.writerow([f"dup{i}", f"csv{j}@example.com", wallet_for(-2, i), ""])
+            elif r < duplicate_rate + invalid_rate:
+                writer.writerow([f"bad{i}", "not-an-email", "0x1234", ""])
+            else:
+                writer.writerow([f"csv{i}", f"csv{i}@example.com", wallet_for(-1, i),
+                                 f"010-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}"])
+    return path
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--users", type=int, default=100)
+    p.add_argument("--events-per-user", type=int, default=20)
+    p.add_argument("--prizes-per-event", type=int, default=5)
+    p.add_argument("--entries-per-event", type=int, default=1000)
+    p.add_argument("--big-event-entries", type=int, default=0)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--csv")
+    p.add_argument("--csv-rows", type=int, default=100000)
+    a = p.parse_args()
+    csv_path = write_csv(a.csv, a.csv_rows, seed=a.seed) if a.csv else None
+    print(json.dumps(generate(a.users, a.events_per_user, a.prizes_per_event, a.entries_per_event,
+                              a.big_event_entries, a.seed, csv_path)))
+
+
+if __name__ == "__main__":
+    main()
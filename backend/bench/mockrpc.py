@@ -0,0 +1,129 @@
+# mockrpc.py — 벤치마크용 가짜 JSON-RPC 노드 (배치 요청 지원, 선택적 지연)
+# 실행: cd backend && python bench/mockrpc.py [--port 8545] [--latency-ms 20]
+# 실제 체인 없이 raffle/state, 트랜잭션 전송/영수증 경로를 재현한다. 값은 고정이며 상태는 메모리에만 둔다.
+#   eth_call                 → selector 별 값(calls) 또는 기본값 1 을 32바이트 워드로
+#   eth_sendRawTransaction   → keccak(raw) (실제 노드와 같은 tx hash), 다음 eth_getTransactionReceipt 에서 바로 성공
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from eth_utils import keccak
+
+CHAIN_ID = 31337
+
+
+class MockChain:
+    def __init__(self, latency_ms: float = 0, calls: Optional[Dict[str, int]] = None):
+        self.latency = latency_ms / 1000.0
+        self.calls = dict(calls or {})  # "0x" + selector(8 hex) → 반환 정수
+        self.block = 1
+        self.nonces: Dict[str, int] = {}
+        self.sent: Dict[str, int] = {}  # tx hash → 포함된 블록
+        self.raw_txs: Dict[str, str] = {}  # tx hash → 서명된 raw tx (테스트에서 복호화용)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def handle(self, req: dict) -> dict:
+        method, params = req.get("method"), req.get("params") or []
+        try:
+            result = self._dispatch(method, params)
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": req.get("id"),
+                    "error": {"code": -32601, "message": f"method not supported: {method}"}}
+        return {"jsonrpc": "2.0", "id": req.get("id"), "result": result}
+
+    def _dispatch(self, method: str, params: list):
+        with self._lock:
+            self.requests += 1
+            if method == "eth_blockNumber":
+                return hex(self.block)
+            if method == "eth_chainId":
+                return hex(CHAIN_ID)
+            if method in ("eth_gasPrice", "eth_maxPriorityFeePerGas"):
+                return hex(1_000_000_000)
+            if method == "eth_estimateGas":
+                return hex(150_000)
+            if method == "eth_getTransactionCount":
+                return hex(self.nonces.get(params[0].lower(), 0))
+            if method == "eth_call":
+                data = (params[0].get("data") or "0x")[:10]
+                return "0x" + self.calls.get(data, 1).to_bytes(32, "big").hex()
+            if method == "eth_sendRawTransaction":
+                tx_hash = "0x" + keccak(hexstr=params[0]).hex()
+                self.block += 1
+                self.sent[tx_hash] = self.block
+                self.raw_txs[tx_hash] = params[0]
+                return tx_hash
+            if method == "eth_getTransactionReceipt":
+                block = self.sent.get(params[0])
+                if block is None:
+                    return None
+                return {"transactionHash": params[0], "status": "0x1", "blockNumber": hex(block),
+                        "gasUsed": hex(100_000), "effectiveGasPrice": hex(1_000_000_000), "logs": []}
+            if method == "eth_getTransactionByHash":
+                # 이 목 체인은 보낸 tx 를 바로 블록에 넣으므로 모르는 hash 는 mempool 에도 없음
+                block = self.sent.get(params[0])
+                return None if block is None else {"hash": params[0], "blockNumber": hex(block)}
+            if method == "eth_getBlockByNumber":
+                return {"number": hex(self.block), "timestamp": hex(int(time.time())),
+                        "baseFeePerGas": hex(1_000_000_000), "transactions": []}
+            if method == "eth_getLogs":
+                return []
+        raise KeyError(method)
+
+    def respond(self, payload):
+        if self.latency:
+            time.sleep(self.latency)  # 배치는 왕복 1번으로 취급
+        if isinstance(payload, list):
+            return [self.handle(r) for r in payload]
+        return self.handle(payload)
+
+    def transport(self, url: str, payload, timeout: float = None):
+        """chain.RpcClient(transport=...) 에 바로 넣을 수 있는 in-process 전송 (HTTP 왕복 없이)"""
+        return self.respond(payload)
+
+
+def _handler(mock: MockChain):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            out = json.dumps(mock.respond(json.loads(body))).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start(port: int = 0, latency_ms: float = 0, calls: Optional[Dict[str, int]] = None):
+    """백그라운드 스레드로 띄우고 (url, MockChain, server) 를 돌려준다. port=0 이면 빈 포트"""
+    mock = MockChain(latency_ms, calls)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mockrpc", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", mock, server
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--port", type=int, default=8545)
+    p.add_argument("--latency-ms", type=float, default=0)
+    a = p.parse_args()
+    mock = MockChain(a.latency_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", a.port), _handler(mock))
+    print(f"mock rpc on http://127.0.0.1:{a.port} (latency {a.latency_ms}ms)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
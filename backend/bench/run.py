@@ -0,0 +1,345 @@
+# run.py — 엔드투엔드 벤치마크: 합성 데이터 생성 → 시나리오별 p50/p99 지연, 처리량, 최대 RSS → JSON 저장/비교
+# 실행: cd backend && python bench/run.py [--db sqlite|mysql+pymysql://user:pw@127.0.0.1/bench]
+#                                          [--scale small|medium|large] [--scenarios list_events,login,...]
+#                                          [--requests 500] [--concurrency 8]
+#                                          [--out bench/results/<commit>.json] [--compare 이전결과.json] [--threshold 0.2]
+# 기준값: bench/baseline-sqlite-small.json (기본 옵션으로 측정해 커밋한 결과) → --compare 로 비교
+# 시나리오마다 새 인터프리터(자식 프로세스)에서 돌려서 최대 RSS 가 시나리오별로 분리된다.
+# HTTP 시나리오는 Flask 테스트 클라이언트로 뷰 + DB 경로만 잰다 (네트워크/gunicorn 제외, 그쪽은 bench_load.py).
+# RPC 는 bench/mockrpc.py 가짜 노드를 쓴다. send_tx 는 chain.send_transaction (nonce 예약 + 서명 + 전송) 경로. MySQL 은 빈 데이터베이스를 넘길 것 (테이블은 create_all 로 만든다).
+# --compare 를 주면 p99 가 threshold 이상 늘거나 처리량이 threshold 이상 줄어든 시나리오를 표시하고 종료 코드 1.
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 데이터 규모 (users, events/user, prizes/event, entries/event, 추첨용 큰 이벤트 응모 수, CSV 행 수)
+SCALES = {
+    "small": dict(users=20, events_per_user=10, prizes_per_event=5, entries_per_event=200,
+                  big_event_entries=100_000, csv_rows=20_000),
+    "medium": dict(users=100, events_per_user=20, prizes_per_event=5, entries_per_event=1000,
+                   big_event_entries=1_000_000, csv_rows=100_000),
+    "large": dict(users=1000, events_per_user=20, prizes_per_event=5, entries_per_event=100,
+                  big_event_entries=5_000_000, csv_rows=1_000_000),
+}
+HTTP_SCENARIOS = ("list_events", "list_prizes", "event_qr", "get_event_csv_fields", "login", "raffle_state")
+TX_SCENARIOS = ("send_tx",)
+BATCH_SCENARIOS = ("csv_import", "draw")  # 한 번이 무거운 작업: --repeat 회 순차 실행
+SCENARIOS = HTTP_SCENARIOS + TX_SCENARIOS + BATCH_SCENARIOS
+MOCK_CONTRACT = "0x" + "ab" * 20
+# Hardhat 계정 #0 (공개된 테스트 키)
+MOCK_SENDER_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # Linux: KB
+
+
+def measure(fn, requests: int, concurrency: int) -> dict:
+    """fn() 을 concurrency 개 스레드로 총 requests 번 호출. fn 이 False 를 돌려주거나 예외면 오류로 센다"""
+    latencies, errors = [], [0]
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            t0 = time.perf_counter()
+            try:
+                ok = fn() is not False
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    return summarize(latencies, errors[0], wall, concurrency)
+
+
+def summarize(latencies, errors: int, wall: float, concurrency: int = 1) -> dict:
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(ms),
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 0.50), 2),
+        "p90_ms": round(percentile(ms, 0.90), 2),
+        "p99_ms": round(percentile(ms, 0.99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "throughput_rps": round(len(ms) / wall, 1) if wall else 0.0,
+        "wall_sec": round(wall, 3),
+    }
+
+
+# ── 자식 프로세스: 시나리오 하나 실행 ──────────────────────────────────────────
+
+def _http_scenario(name: str, setup: dict, requests: int, concurrency: int) -> dict:
+    from app import create_app
+
+    app = create_app({"JOB_RUNNER": "off", "TESTING": True})
+    creds = {"email": setup["owner_email"], "password": setup["password"]}
+    resp = app.test_client().post("/api/login", json=creds)
+    if resp.status_code != 200:
+        raise SystemExit(f"login failed: {resp.status_code} {resp.get_data(as_text=True)}")
+    auth = {"Authorization": f"Bearer {resp.get_json()['token']}"}
+    event_ids = setup["owner_event_ids"]
+    local = threading.local()
+    seq = iter(range(1 << 62))
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client
+
+    def ok(r, expected=200):
+        return r.status_code == expected
+
+    # 같은 이벤트만 반복하지 않도록 대표 사용자의 이벤트들을 돌아가며 조회
+    requests_by_name = {
+        "list_events": lambda: ok(client().get("/api/events?limit=20", headers=auth)),
+        "list_prizes": lambda: ok(client().get(f"/api/prizes?event_id={event_ids[next(seq) % len(event_ids)]}",
+                                               headers=auth)),
+        "event_qr": lambda: ok(client().get(f"/api/events/{event_ids[next(seq) % len(event_ids)]}/qr")),
+        "get_event_csv_fields": lambda: ok(client().get(
+            f"/api/events/{event_ids[next(seq) % len(event_ids)]}/csv-fields", headers=auth)),
+        "login": lambda: ok(client().post("/api/login", json=creds)),
+        "raffle_state": lambda: ok(client().get("/api/raffle/state")),
+    }
+    fn = requests_by_name[name]
+    fn()  # 워밍업 (지연 import, 캐시 채우기)
+    return measure(fn, requests, concurrency)
+
+
+def _send_tx(requests: int, concurrency: int) -> dict:
+    import chain
+    from eth_utils import to_checksum_address
+
+    to, data = to_checksum_address(MOCK_CONTRACT), "0x" + bytes(4).hex() + bytes(32).hex()
+    fn = lambda: chain.send_transaction(MOCK_SENDER_KEY, to, data)  # noqa: E731
+    fn()  # 워밍업 (nonce 행 생성, 가스 캐시)
+    return measure(fn, requests, concurrency)
+
+
+def _csv_import(setup: dict, repeat: int) -> dict:
+    import csv_import
+    from models import session_scope, Event
+
+    latencies, errors, report = [], 0, None
+    started = time.perf_counter()
+    for i in range(repeat):
+        with session_scope() as s:
+            event = Event(owner_id=setup["owner_id"], name=f"csv bench {i}", start_at=datetime.datetime(2030, 1, 1),
+                          end_at=datetime.datetime(2030, 1, 2))
+            s.add(event)
+            s.flush()
+            event_id = event.id
+        t0 = time.perf_counter()
+        try:
+            report = csv_import.import_csv(event_id, setup["csv_path"])
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    if report is not None:
+        result.update(rows=report.total, inserted=report.inserted, rejected=report.rejected,
+                      rows_per_sec=report.rows_per_sec)
+    return result
+
+
+def _draw(setup: dict, repeat: int) -> dict:
+    import draw
+
+    latencies, errors, last = [], 0, None
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        try:
+            last = draw.draw_event(setup["big_event_id"], force=True)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    if last:
+        result["entries"] = last["entry_count"]
+        result["winners"] = last["winners"]
+    return result
+
+
+def child(name: str, setup_path: str, requests: int, concurrency: int, repeat: int):
+    import mockrpc
+
+    with open(setup_path) as f:
+        setup = json.load(f)
+    url, mock, _ = mockrpc.start(latency_ms=setup.get("rpc_latency_ms", 0))
+    # chain / raffle_views 는 import 시점에 환경변수를 읽으므로 그 전에 설정
+    os.environ["RPC_URL"] = url
+    os.environ.setdefault("CONTRACT_ADDRESS", MOCK_CONTRACT)
+    os.environ.setdefault("CHAIN_ID", "31337")
+    if name in HTTP_SCENARIOS:
+        result = _http_scenario(name, setup, requests, concurrency)
+    elif name == "send_tx":
+        result = _send_tx(requests, concurrency)
+    elif name == "csv_import":
+        result = _csv_import(setup, repeat)
+    else:
+        result = _draw(setup, repeat)
+    result["rpc_requests"] = mock.requests
+    result["max_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+# ── 부모 프로세스: 데이터 생성, 시나리오 실행, 저장/비교 ───────────────────────
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> list:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base or "error" in cur or "error" in base:
+            continue
+        if base["p99_ms"] and cur["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {base['p99_ms']}ms → {cur['p99_ms']}ms")
+        if base["throughput_rps"] and cur["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} → {cur['throughput_rps']} req/s")
+    return regressions
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--db", default="sqlite", help="sqlite (임시 파일) 또는 SQLAlchemy URL")
+    p.add_argument("--scale", choices=SCALES, default="small")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS))
+    p.add_argument("--requests", type=int, default=500)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--repeat", type=int, default=3, help="csv_import / draw 반복 횟수")
+    p.add_argument("--rpc-latency-ms", type=float, default=0)
+    p.add_argument("--out")
+    p.add_argument("--compare")
+    p.add_argument("--threshold", type=float, default=0.2)
+    p.add_argument("--child", help=argparse.SUPPRESS)
+    p.add_argument("--setup", help=argparse.SUPPRESS)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        child(args.child, args.setup, args.requests, args.concurrency, args.repeat)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="debutler-bench-")
+    db_url = f"sqlite:///{workdir}/bench.db" if args.db == "sqlite" else args.db
+    env = dict(os.environ, DATABASE_URL=db_url, JOB_RUNNER="off", PYTHONPATH=BACKEND)
+    # login 시나리오는 해시 비용을 재는 것이므로 속도 제한은 끄고 해시 풀 대기열은 동시성만큼 허용
+    env.update(LOGIN_EMAIL_RATE="0", LOGIN_IP_RATE="0", PASSWORD_QUEUE_MAX=str(max(args.concurrency, 1)))
+    env.pop("METRICS_DIR", None)
+    os.environ.update(DATABASE_URL=db_url)
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    import datagen
+
+    scale = dict(SCALES[args.scale])
+    csv_rows = scale.pop("csv_rows")
+    print(f"generating {args.scale} dataset into {db_url.split('@')[-1]} ...", file=sys.stderr)
+    csv_path = datagen.write_csv(os.path.join(workdir, "entries.csv"), csv_rows)
+    setup = datagen.generate(csv_path=csv_path, **scale)
+    setup.update(csv_path=csv_path, csv_rows=csv_rows, rpc_latency_ms=args.rpc_latency_ms)
+    setup_path = os.path.join(workdir, "setup.json")
+    with open(setup_path, "w") as f:
+        json.dump(setup, f)
+    print(f"  {setup['rows']} in {setup['elapsed_sec']}s", file=sys.stderr)
+
+    results = {}
+    for name in scenarios:
+        print(f"running {name} ...", file=sys.stderr)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--setup", setup_path,
+                               "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                               "--repeat", str(args.repeat)],
+                              cwd=BACKEND, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            results[name] = {"error": (proc.stderr or proc.stdout).strip().splitlines()[-1:]}
+            continue
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db": db_url.split(":", 1)[0],
+            "scale": args.scale,
+            "rows": setup["rows"],
+            "datagen_sec": setup["elapsed_sec"],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "rpc_latency_ms": args.rpc_latency_ms,
+        },
+        "scenarios": results,
+    }
+    out = args.out or os.path.join(BACKEND, "bench", "results", f"{report['meta']['commit'] or 'local'}-"
+                                   f"{report['meta']['db']}-{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'scenario':<22}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}{'rss MB':>9}")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<22}  FAILED {r['error']}")
+            continue
+        print(f"{name:<22}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['throughput_rps']:>10}{r['errors']:>8}"
+              f"{r['max_rss_mb']:>9}")
+    print(f"saved {out}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
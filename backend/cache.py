@@ -0,0 +1,136 @@
+# cache.py — 스레드 안전한 LRU + TTL 메모리 캐시 (프로세스 로컬)
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """크기 제한 LRU. 항목마다 만료 시각을 따로 가질 수 있다 (ttl=None 이면 만료 없음)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ReadThroughCache(TTLCache):
+    """get_or_load: 캐시 미스 시 같은 키의 동시 호출자들은 첫 호출자의 로딩 결과를 함께 기다린다."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 60.0):
+        super().__init__(maxsize, ttl)
+        self._inflight: dict = {}
+        self._flight_lock = threading.Lock()
+        self._tasks: dict = {}  # aget_or_load 용 (이벤트 루프 1개 기준)
+        self.loads = 0
+        self.coalesced = 0
+
+    def get_or_load(self, key: Hashable, loader, ttl: Optional[float] = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._flight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            self.loads += 1
+            flight.value = loader()
+            self.set(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.event.set()
+            with self._flight_lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_load(self, key: Hashable, loader, ttl: Optional[float] = None) -> Any:
+        """get_or_load 의 asyncio 버전. loader 는 코루틴 함수이고, 같은 이벤트 루프 안의 동시 호출을 합친다"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        self.loads += 1
+        task = self._tasks[key] = asyncio.ensure_future(loader())
+        try:
+            value = await asyncio.shield(task)
+            self.set(key, value, ttl)
+            return value
+        finally:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def stats(self) -> dict:
+        return {**super().stats(), 'loads': self.loads, 'coalesced': self.coalesced}
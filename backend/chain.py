@@ -0,0 +1,340 @@
+# chain.py — JSON-RPC 클라이언트 (keep-alive 세션 풀, 배치 요청, RPC URL 페일오버),
+#            nonce 할당기, 가스 추정 캐시, 트랜잭션 전송
+#
+# 로컬 테스트: RPC_URL=http://127.0.0.1:8545 (hardhat node / anvil), 또는
+# RpcClient(transport=...) 로 (url, payload) -> 응답 JSON 을 돌려주는 가짜 전송을 주입
+from __future__ import annotations
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+import metrics
+from cache import TTLCache
+from models import engine, SessionLocal, ChainNonce
+
+log = logging.getLogger("chain")
+
+CHAIN_ID = int(os.environ.get("CHAIN_ID", "0"))
+# 쉼표로 여러 개 지정하면 앞에서부터 사용하고 장애 시 다음 URL 로 넘어감
+RPC_URLS = [u.strip() for u in (os.environ.get("RPC_URLS") or os.environ.get("RPC_URL") or "").split(",") if u.strip()]
+RPC_TIMEOUT = float(os.environ.get("RPC_TIMEOUT", "10"))
+RPC_POOL_SIZE = int(os.environ.get("RPC_POOL_SIZE", "16"))
+# 장애 난 URL 을 다시 시도하기까지의 시간(초)
+RPC_COOLDOWN = float(os.environ.get("RPC_COOLDOWN", "30"))
+
+GAS_CACHE_TTL = float(os.environ.get("GAS_CACHE_TTL", "300"))
+GAS_PRICE_TTL = float(os.environ.get("GAS_PRICE_TTL", "3"))
+GAS_MULTIPLIER = float(os.environ.get("GAS_MULTIPLIER", "1.2"))
+
+Transport = Callable[[str, Any, float], Any]
+
+
+class RpcError(Exception):
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class RpcUnavailable(RpcError):
+    pass
+
+
+# -------------------------
+# JSON-RPC 클라이언트
+# -------------------------
+class RpcClient:
+    def __init__(self, urls: Sequence[str] = RPC_URLS, transport: Optional[Transport] = None,
+                 timeout: float = RPC_TIMEOUT, pool_size: int = RPC_POOL_SIZE):
+        if not urls:
+            raise RpcUnavailable("no RPC URL configured")
+        self.urls = list(urls)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.urls), pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._transport = transport or self._http
+        self._ids = itertools.count(1)
+        self._down_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _http(self, url: str, payload: Any, timeout: float) -> Any:
+        resp = self.session.post(url, json=payload, timeout=timeout)
+        if resp.status_code >= 500 or resp.status_code == 429:
+            raise RpcUnavailable(f"{url} HTTP {resp.status_code}")
+        resp.raise_for_status()
+        return resp.json()
+
+    def _candidates(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            up = [u for u in self.urls if self._down_until.get(u, 0) <= now]
+        # 전부 장애 상태면 그래도 순서대로 시도
+        return up or list(self.urls)
+
+    def _post(self, payload: Any) -> Any:
+        last_error = None
+        for url in self._candidates():
+            try:
+                return self._transport(url, payload, self.timeout)
+            except (requests.ConnectionError, requests.Timeout, RpcUnavailable) as e:
+                last_error = e
+                with self._lock:
+                    self._down_until[url] = time.monotonic() + RPC_COOLDOWN
+        raise RpcUnavailable(f"all RPC endpoints failed: {last_error}")
+
+    @staticmethod
+    def _unwrap(resp: dict) -> Any:
+        if "error" in resp and resp["error"]:
+            err = resp["error"]
+            raise RpcError(err.get("message", str(err)), err.get("code"))
+        return resp.get("result")
+
+    def _timed_post(self, payload: Any, method: str) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._post(payload)
+        except RpcError:
+            metrics.RPC_ERRORS.inc(method=method)
+            raise
+        finally:
+            metrics.RPC_LATENCY.observe(time.perf_counter() - started, method=method)
+
+    def call(self, method: str, params: Optional[list] = None) -> Any:
+        metrics.RPC_CALLS.inc(method=method)
+        resp = self._timed_post({"jsonrpc": "2.0", "id": next(self._ids), "method": method,
+                                 "params": params or []}, method)
+        try:
+            return self._unwrap(resp)
+        except RpcError:
+            metrics.RPC_ERRORS.inc(method=method)
+            raise
+
+    def batch(self, calls: Sequence[Tuple[str, list]], raise_errors: bool = True) -> List[Any]:
+        """여러 호출을 HTTP 요청 1번으로. 결과는 입력 순서대로 (raise_errors=False 면 오류는 RpcError 객체로)"""
+        if not calls:
+            return []
+        ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in zip(ids, calls)]
+        for m, _ in calls:
+            metrics.RPC_CALLS.inc(method=m)
+        resp = self._timed_post(payload, "batch")
+        if isinstance(resp, dict):  # 배치 미지원 노드는 단일 오류로 응답
+            metrics.RPC_ERRORS.inc(method="batch")
+            raise RpcError(resp.get("error", {}).get("message", "batch not supported"))
+        by_id = {r.get("id"): r for r in resp}
+        results = []
+        for i, (m, _) in zip(ids, calls):
+            try:
+                results.append(self._unwrap(by_id.get(i, {"error": {"message": "missing response"}})))
+            except RpcError as e:
+                metrics.RPC_ERRORS.inc(method=m)
+                if raise_errors:
+                    raise
+                results.append(e)
+        return results
+
+
+_client: Optional[RpcClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> RpcClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RpcClient()
+    return _client
+
+
+def set_client(client: Optional[RpcClient]):
+    """테스트/벤치마크에서 가짜 RPC 로 교체"""
+    global _client
+    _client = client
+
+
+# -------------------------
+# nonce 할당 (스레드/워커 공용, DB 행 잠금)
+# -------------------------
+_local_locks: Dict[str, threading.Lock] = {}
+
+
+def _address_lock(address: str) -> threading.Lock:
+    with _client_lock:
+        return _local_locks.setdefault(address, threading.Lock())
+
+
+def allocate_nonce(address: str, client: Optional[RpcClient] = None) -> int:
+    """다음 nonce 를 원자적으로 예약. 처음 보는 주소면 체인의 pending 카운트로 초기화"""
+    return allocate_nonces(address, 1, client)
+
+
+def allocate_nonces(address: str, count: int, client: Optional[RpcClient] = None) -> int:
+    """연속된 nonce count 개를 한 번에 예약하고 첫 번째 값을 반환 (relayer 의 파이프라인 전송용)"""
+    client = client or get_client()
+    try:
+        return _allocate(address, client, count)
+    except IntegrityError:
+        # 다른 워커가 같은 주소 행을 먼저 만든 경우 → 이제 행이 있으므로 한 번 더
+        return _allocate(address, client, count)
+
+
+def _allocate(address: str, client: RpcClient, count: int = 1) -> int:
+    with _address_lock(address):
+        # 행 잠금(FOR UPDATE)은 이 트랜잭션이 끝날 때까지 유지됨
+        with engine.begin() as conn:
+            row = conn.execute(
+                select(ChainNonce.next_nonce).where(ChainNonce.address == address).with_for_update()
+            ).first()
+            if row is None:
+                nonce = int(client.call("eth_getTransactionCount", [address, "pending"]), 16)
+                conn.execute(ChainNonce.__table__.insert().values(
+                    address=address, chain_id=CHAIN_ID, next_nonce=nonce + count))
+            else:
+                nonce = row.next_nonce
+                conn.execute(ChainNonce.__table__.update().where(ChainNonce.address == address)
+                             .values(next_nonce=nonce + count))
+    return nonce
+
+
+def resync_nonce(address: str, client: Optional[RpcClient] = None) -> int:
+    """'nonce too low' 등으로 어긋났을 때 체인 값으로 되돌림"""
+    client = client or get_client()
+    nonce = int(client.call("eth_getTransactionCount", [address, "pending"]), 16)
+    with _address_lock(address):
+        with SessionLocal() as s, s.begin():
+            row = s.get(ChainNonce, address)
+            if row is None:
+                s.add(ChainNonce(address=address, chain_id=CHAIN_ID, next_nonce=nonce))
+            else:
+                row.next_nonce = nonce
+    return nonce
+
+
+# -------------------------
+# 가스
+# -------------------------
+_gas_cache = TTLCache(1024, GAS_CACHE_TTL)
+_gas_price_cache = TTLCache(4, GAS_PRICE_TTL)
+
+
+def _gas_key(tx: dict) -> tuple:
+    # 같은 컨트랙트 함수(selector)는 가스 사용량이 거의 같으므로 인자는 키에서 제외
+    return (tx.get("from"), tx.get("to"), (tx.get("data") or "")[:10])
+
+
+def gas_params(tx: dict, client: Optional[RpcClient] = None) -> Tuple[int, int]:
+    """(gas limit, gas price). 캐시에 없는 값만 배치 1회로 조회"""
+    client = client or get_client()
+    gas = _gas_cache.get(_gas_key(tx))
+    price = _gas_price_cache.get("gasPrice")
+    calls = []
+    if gas is None:
+        est = {k: v for k, v in tx.items() if k in ("from", "to", "data", "value")}
+        calls.append(("eth_estimateGas", [est]))
+    if price is None:
+        calls.append(("eth_gasPrice", []))
+    results = client.batch(calls)
+    if gas is None:
+        gas = int(int(results.pop(0), 16) * GAS_MULTIPLIER)
+        _gas_cache.set(_gas_key(tx), gas)
+    if price is None:
+        price = int(results.pop(0), 16)
+        _gas_price_cache.set("gasPrice", price)
+    return gas, price
+
+
+# -------------------------
+# 트랜잭션 전송
+# -------------------------
+def is_nonce_error(e: Exception) -> bool:
+    msg = str(e).lower()
+    return "nonce too low" in msg or "invalid nonce" in msg
+
+
+def is_already_known(e: Exception) -> bool:
+    """노드가 이미 같은 tx 를 갖고 있음 (재전송/중복 브로드캐스트) → 성공으로 취급"""
+    msg = str(e).lower()
+    return "already known" in msg or "known transaction" in msg or "already imported" in msg
+
+
+def raw_tx_hex(signed) -> str:
+    """서명된 tx 의 0x hex. eth-account 0.13+ 는 raw_transaction (이전 rawTransaction 은 0.14 에서 제거)"""
+    raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+    raw = raw.hex()
+    return raw if raw.startswith("0x") else "0x" + raw
+
+
+def sign_transaction(private_key: str, to: str, data: str, value: int = 0,
+                     gas: Optional[int] = None, client: Optional[RpcClient] = None) -> Tuple[str, str, dict]:
+    """가스/nonce 를 채워 로컬 서명만. (tx hash, raw tx, 서명 전 tx dict) 반환.
+    전송 전에 tx_logs 에 먼저 기록해야 하는 호출자(scheduler)용"""
+    from eth_account import Account
+    from eth_utils import to_checksum_address
+    client = client or get_client()
+    acct = Account.from_key(private_key)
+    # DB 에 소문자로 저장된 주소도 받음 (eth-account 는 체크섬 주소만 허용)
+    tx = {"from": acct.address, "to": to_checksum_address(to), "data": data, "value": value, "chainId": CHAIN_ID}
+    est_gas, gas_price = gas_params(tx, client)
+    tx["gas"] = gas or est_gas
+    tx["gasPrice"] = gas_price
+    tx["nonce"] = allocate_nonce(acct.address, client)
+    signed = Account.sign_transaction({k: v for k, v in tx.items() if k != "from"}, private_key)
+    tx_hash = signed.hash.hex()
+    return (tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash), raw_tx_hex(signed), tx
+
+
+def send_transaction(private_key: str, to: str, data: str, value: int = 0,
+                     gas: Optional[int] = None, client: Optional[RpcClient] = None) -> Tuple[str, dict]:
+    """서명 후 eth_sendRawTransaction. (tx hash, 서명 전 tx dict) 반환. 영수증은 기다리지 않음.
+    'already known' 은 같은 tx 가 이미 노드에 있는 것이므로 성공. 그 밖의 실패는 예약한 nonce 를
+    체인 값으로 되돌린 뒤 올린다 (구멍이 남으면 이 주소의 이후 tx 가 모두 멈춤)"""
+    client = client or get_client()
+    for attempt in range(2):
+        tx_hash, raw, tx = sign_transaction(private_key, to, data, value, gas, client)
+        try:
+            return client.call("eth_sendRawTransaction", [raw]) or tx_hash, tx
+        except RpcError as e:
+            if is_already_known(e):
+                return tx_hash, tx
+            release_nonce(tx["from"], client)
+            if attempt == 0 and is_nonce_error(e):
+                continue
+            raise
+    raise RpcError("unreachable")
+
+
+def release_nonce(address: str, client: Optional[RpcClient] = None):
+    """전송 실패로 쓰이지 않은 nonce 를 되돌림. 타임아웃이라 실제로는 노드에 들어갔어도
+    pending 카운트에 포함되므로 체인 값으로 맞추면 양쪽 모두 안전"""
+    try:
+        resync_nonce(address, client)
+    except RpcError as e:
+        log.warning("nonce resync for %s failed: %s", address, e)
+
+
+def send_contract_tx(private_key: str, contract_fn, value: int = 0, client: Optional[RpcClient] = None):
+    """web3 ContractFunction (예: contract.functions.lock()) 을 전송"""
+    data = contract_fn._encode_transaction_data()
+    return send_transaction(private_key, contract_fn.address, data, value, client=client)
+
+
+def wait_for_receipt(tx_hash: str, timeout: float = 120, poll: float = 1.0,
+                     client: Optional[RpcClient] = None) -> dict:
+    client = client or get_client()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        rcpt = client.call("eth_getTransactionReceipt", [tx_hash])
+        if rcpt:
+            return rcpt
+        time.sleep(poll)
+    raise TimeoutError(f"receipt not found for {tx_hash}")
@@ -0,0 +1,318 @@
+# csv_import.py — CSV 참가자 스트리밍 임포트 (entries 대량 INSERT)
+# 실행: python csv_import.py <event_id> <csv_path> [mapping_json]
+from __future__ import annotations
+import csv
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional, Dict, List, Tuple
+
+from eth_utils import to_checksum_address
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import IntegrityError
+
+import dedup
+import metrics
+import stats
+from models import session_scope, Event, EventStats, Entry, EntryStatus, EventFormConfig
+
+# 한 번의 INSERT 에 묶을 행 수 (MySQL max_allowed_packet 범위 안에서 조정)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+
+ENTRY_FIELDS = ("nickname", "email", "wallet_address")
+
+# 매핑이 없을 때 헤더 이름으로 추정 (소문자 비교)
+FIELD_ALIASES = {
+    "nickname": ("nickname", "name", "닉네임", "이름"),
+    "email": ("email", "e-mail", "mail", "이메일"),
+    "wallet_address": ("wallet_address", "wallet", "address", "지갑", "지갑주소"),
+}
+
+# insert_entry_rows 결과에서 저장된 행 표시 (나머지는 거절 사유)
+ACCEPTED = "accepted"
+
+_WALLET_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+@dataclass
+class ImportReport:
+    event_id: int
+    total: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    ignored: int = 0  # 확인 후 저장 사이에 DB 유니크 제약에 걸린 행 (동시 삽입 등, 거절 파일에도 기록)
+    elapsed_sec: float = 0.0
+    rows_per_sec: float = 0.0
+    reject_path: Optional[str] = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class CsvImportError(Exception):
+    pass
+
+
+# -------------------------
+# 정규화/검증
+# -------------------------
+def normalize_wallet(value: Optional[str]) -> Optional[str]:
+    v = (value or "").strip()
+    if not v:
+        return None
+    if not _WALLET_RE.match(v):
+        raise ValueError("invalid_wallet")
+    return to_checksum_address(v)
+
+
+def normalize_email(value: Optional[str]) -> Optional[str]:
+    v = (value or "").strip().lower()
+    if not v:
+        return None
+    if len(v) > 255 or not _EMAIL_RE.match(v):
+        raise ValueError("invalid_email")
+    return v
+
+
+def normalize_nickname(value: Optional[str]) -> Optional[str]:
+    v = (value or "").strip()
+    if not v:
+        return None
+    if len(v) > 50:
+        raise ValueError("nickname_too_long")
+    return v
+
+
+def guess_mapping(headers: List[str]) -> Dict[str, str]:
+    """헤더 이름으로 {Entry 필드: CSV 컬럼} 매핑 추정"""
+    mapping = {}
+    lowered = {h.strip().lower(): h for h in headers}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                mapping[field] = lowered[alias]
+                break
+    return mapping
+
+
+def form_rules(s, event_id: int) -> Dict[str, int]:
+    cfg = s.get(EventFormConfig, event_id)
+    # 설정 행이 없으면 모델 기본값과 동일하게
+    return {
+        "require_nickname": cfg.require_nickname if cfg else 1,
+        "require_email": cfg.require_email if cfg else 0,
+        "require_wallet_address": cfg.require_wallet_address if cfg else 1,
+        "unique_email_per_event": cfg.unique_email_per_event if cfg else 1,
+        "unique_wallet_per_event": cfg.unique_wallet_per_event if cfg else 1,
+    }
+
+
+def normalize_entry(row: Dict[str, str], mapping: Dict[str, str], rules: Dict[str, int]) -> dict:
+    values = {
+        "nickname": normalize_nickname(row.get(mapping["nickname"])) if "nickname" in mapping else None,
+        "email": normalize_email(row.get(mapping["email"])) if "email" in mapping else None,
+        "wallet_address": normalize_wallet(row.get(mapping["wallet_address"])) if "wallet_address" in mapping else None,
+    }
+    for field in ENTRY_FIELDS:
+        if rules[f"require_{field}"] and not values[field]:
+            raise ValueError(f"missing_{field}")
+    if not values["email"] and not values["wallet_address"]:
+        raise ValueError("missing_contact")
+    mapped_cols = set(mapping.values())
+    extra = {k: v for k, v in row.items() if k not in mapped_cols and k is not None and v not in (None, "")}
+    values["entry_metadata"] = extra or None
+    return values
+
+
+# -------------------------
+# 배치 처리
+# -------------------------
+def _existing_keys(s, event_id: int, batch: List[Tuple[int, dict, dict]], rules: Dict[str, int]):
+    """배치에 포함된 email/wallet 중 이미 DB 에 있는 값 (email 은 소문자, wallet 은 소문자로 비교).
+    중복 필터(dedup)가 '있을 수 있음' 이라고 한 값만 조회하므로 새 값뿐인 배치는 DB 를 보지 않는다."""
+    maybe_emails, maybe_wallets = dedup.maybe_duplicates(
+        event_id, [(v["email"], v["wallet_address"]) for _, _, v in batch])
+    emails, wallets = set(), set()
+    if rules["unique_email_per_event"]:
+        keys = {v["email"] for _, _, v in batch if v["email"] in maybe_emails}
+        if keys:
+            # email_hash = SHA2(LOWER(email)) 라 예전에 대소문자 섞어 저장된 값도 같은 키로 찾는다 (idx_entries_email_hash)
+            emails = {e.lower() for e in s.execute(
+                select(Entry.email).where(Entry.event_id == event_id,
+                                          Entry.email_hash.in_([dedup.email_digest(k) for k in keys]))
+            ).scalars() if e}
+    if rules["unique_wallet_per_event"]:
+        keys = {v["wallet_address"] for _, _, v in batch
+                if v["wallet_address"] and v["wallet_address"].lower() in maybe_wallets}
+        if keys:
+            wallets = {w.lower() for w in s.execute(
+                select(Entry.wallet_address).where(Entry.event_id == event_id, Entry.wallet_address.in_(keys))
+            ).scalars()}
+    return emails, wallets
+
+
+def conflict_reason(e: IntegrityError) -> str:
+    msg = str(e.orig).lower()
+    if "wallet" in msg:
+        return "duplicate_wallet"
+    if "email" in msg:
+        return "duplicate_email"
+    return "duplicate"
+
+
+def insert_entry_rows(s, rows: List[dict]) -> List[str]:
+    """다중 행 INSERT 1회, 제약 위반이 있으면 그 배치만 행 단위로 다시 넣어 어떤 행이 중복인지 가린다.
+    행마다 ACCEPTED 또는 거절 사유를 돌려준다 (INSERT IGNORE 와 달리 빠진 행을 알 수 있음)"""
+    try:
+        with s.begin_nested():
+            s.execute(insert(Entry.__table__).values(rows))
+        return [ACCEPTED] * len(rows)
+    except IntegrityError:
+        pass
+    results = []
+    for row in rows:
+        try:
+            with s.begin_nested():
+                s.execute(insert(Entry.__table__).values(row))
+            results.append(ACCEPTED)
+        except IntegrityError as e:
+            results.append(conflict_reason(e))
+    return results
+
+
+def _flush_batch(event_id: int, batch, rules, remaining_cap, reject) -> int:
+    """배치 1개를 중복 확인 후 다중 행 INSERT. 삽입 수 반환"""
+    with session_scope() as s:
+        seen_emails, seen_wallets = _existing_keys(s, event_id, batch, rules)
+        rows = []
+        for line_no, raw, v in batch:
+            email = v["email"]
+            wallet = v["wallet_address"].lower() if v["wallet_address"] else None
+            if rules["unique_email_per_event"] and email and email in seen_emails:
+                reject(line_no, raw, "duplicate_email")
+                continue
+            if rules["unique_wallet_per_event"] and wallet and wallet in seen_wallets:
+                reject(line_no, raw, "duplicate_wallet")
+                continue
+            if remaining_cap is not None and len(rows) >= remaining_cap:
+                reject(line_no, raw, "participant_cap")
+                continue
+            if email:
+                seen_emails.add(email)
+            if wallet:
+                seen_wallets.add(wallet)
+            rows.append((line_no, raw, {
+                "event_id": event_id,
+                "nickname": v["nickname"],
+                "email": email,
+                "wallet_address": v["wallet_address"],
+                "status": EntryStatus.valid,
+                "entry_metadata": v["entry_metadata"],
+            }))
+        if not rows:
+            return 0
+        # 확인과 저장 사이에 다른 경로(응모 API, 동시 임포트)가 같은 값을 넣었으면 그 행만 제약에 걸린다
+        results = insert_entry_rows(s, [row for _, _, row in rows])
+        inserted = results.count(ACCEPTED)
+        stats.add_entries(s, event_id, EntryStatus.valid, inserted)
+        for (line_no, raw, row), result in zip(rows, results):
+            if result != ACCEPTED:
+                reject(line_no, raw, result, ignored=True)
+            # 거절된 행도 이미 DB 에 있는 값이므로 함께 등록
+            dedup.remember(event_id, row["email"], row["wallet_address"])
+        return inserted
+
+
+def import_csv(event_id: int, csv_path: str, mapping: Optional[Dict[str, str]] = None,
+               batch_size: int = IMPORT_BATCH_SIZE, reject_path: Optional[str] = None,
+               on_progress: Optional[Callable[[ImportReport], None]] = None) -> ImportReport:
+    """CSV 를 한 줄씩 읽어 batch_size 단위로 entries 에 적재.
+
+    메모리는 배치 크기에만 비례하고, 거절된 행은 `<csv>.rejects.csv` 에
+    원본 컬럼 + 줄 번호 + 사유로 기록한다. on_progress 는 배치마다 호출된다.
+    """
+    report = ImportReport(event_id=event_id)
+    started = time.perf_counter()
+
+    with session_scope() as s:
+        event = s.get(Event, event_id)
+        if not event:
+            raise CsvImportError("event not found")
+        rules = form_rules(s, event_id)
+        cap = event.participant_cap
+        if cap is not None:
+            st = s.get(EventStats, event_id)
+            current = st.entries_total if st else s.execute(
+                select(func.count()).select_from(Entry).where(Entry.event_id == event_id)
+            ).scalar_one()
+            cap = max(cap - current, 0)
+
+    reject_path = reject_path or f"{csv_path}.rejects.csv"
+    reject_file = None
+    reject_writer = None
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        headers = reader.fieldnames or []
+        mapping = {k: v for k, v in (mapping or guess_mapping(headers)).items() if k in ENTRY_FIELDS}
+        missing = [c for c in mapping.values() if c not in headers]
+        if missing:
+            raise CsvImportError(f"unknown csv columns: {', '.join(missing)}")
+        if "email" not in mapping and "wallet_address" not in mapping:
+            raise CsvImportError("mapping must include email or wallet_address")
+
+        def reject(line_no, raw, reason, ignored=False):
+            nonlocal reject_file, reject_writer
+            if reject_writer is None:
+                reject_file = open(reject_path, "w", newline="", encoding="utf-8")
+                reject_writer = csv.writer(reject_file)
+                reject_writer.writerow(["_line", "_reason"] + headers)
+            reject_writer.writerow([line_no, reason] + [raw.get(h, "") for h in headers])
+            if ignored:
+                report.ignored += 1
+            else:
+                report.rejected += 1
+
+        try:
+            batch = []
+            for row in reader:
+                report.total += 1
+                line_no = reader.line_num
+                try:
+                    batch.append((line_no, row, normalize_entry(row, mapping, rules)))
+                except ValueError as e:
+                    reject(line_no, row, str(e))
+                if len(batch) >= batch_size:
+                    inserted = _flush_batch(event_id, batch, rules, cap, reject)
+                    report.inserted += inserted
+                    if cap is not None:
+                        cap = max(cap - inserted, 0)
+                    batch = []
+                    if on_progress:
+                        on_progress(report)
+            if batch:
+                report.inserted += _flush_batch(event_id, batch, rules, cap, reject)
+        finally:
+            if reject_file:
+                reject_file.close()
+
+    report.reject_path = reject_path if reject_writer is not None else None
+    report.elapsed_sec = round(time.perf_counter() - started, 3)
+    report.rows_per_sec = round(report.total / report.elapsed_sec, 1) if report.elapsed_sec else float(report.total)
+    metrics.CSV_ROWS.inc(report.inserted, result="inserted")
+    metrics.CSV_ROWS.inc(report.rejected, result="rejected")
+    metrics.CSV_ROWS.inc(report.ignored, result="ignored")
+    metrics.CSV_SECONDS.inc(report.elapsed_sec)
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("usage: python csv_import.py <event_id> <csv_path> [mapping_json]")
+        sys.exit(1)
+    m = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+    print(json.dumps(import_csv(int(sys.argv[1]), sys.argv[2], m).to_dict(), ensure_ascii=False))
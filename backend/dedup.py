@@ -0,0 +1,199 @@
+# dedup.py — 이벤트별 email/wallet 중복 사전 필터 (Bloom filter, 프로세스 로컬)
+# "확실히 새 값" 이면 DB 조회 없이 통과시키고, "중복일 수 있음" 일 때만 인덱스 조회 1번으로 확인한다.
+# 거짓 양성(새 값인데 있다고 답함)만 있고 거짓 음성은 없으므로 정상 응모를 잘못 거절하지 않는다.
+# 다른 워커가 넣은 값은 모를 수 있지만, 그 경우에도 최종 판정은 DB 유니크 제약이 한다.
+# 필터 적재(첫 사용, DEDUP_TTL 만료, 포화)는 백그라운드 스레드가 하며, 준비 전에는 DB 조회로 판정한다.
+# 측정: python bench/bench_dedup.py
+from __future__ import annotations
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from cache import TTLCache
+from models import session_scope, Entry, Event, EventStats
+
+log = logging.getLogger("dedup")
+
+DEDUP_ERROR_RATE = float(os.getenv("DEDUP_ERROR_RATE", "0.01"))
+DEDUP_MIN_CAPACITY = int(os.getenv("DEDUP_MIN_CAPACITY", "100000"))
+DEDUP_MAX_EVENTS = int(os.getenv("DEDUP_MAX_EVENTS", "64"))
+# 오래된 필터는 버리고 다시 적재 (다른 워커의 삽입 반영)
+DEDUP_TTL = float(os.getenv("DEDUP_TTL", "3600"))
+
+
+class BloomFilter:
+    """capacity 개를 넣었을 때 거짓 양성률이 error_rate 가 되도록 크기를 정한다"""
+
+    def __init__(self, capacity: int, error_rate: float = DEDUP_ERROR_RATE):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key: bytes):
+        d = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key: bytes):
+        positions = self._positions(key)
+        with self._lock:
+            for p in positions:
+                self.bits[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+
+# entries.email_hash 와 같은 값 (UNHEX(SHA2(LOWER(email), 256)))
+def email_digest(email: str) -> bytes:
+    return hashlib.sha256(email.lower().encode()).digest()
+
+
+def email_key(email: str) -> bytes:
+    return b"e" + email_digest(email)
+
+
+def wallet_key(wallet: str) -> bytes:
+    return b"w" + bytes.fromhex(wallet[2:].lower())
+
+
+def _keys(email: Optional[str], wallet: Optional[str]) -> Iterable[bytes]:
+    if email:
+        yield email_key(email)
+    if wallet:
+        yield wallet_key(wallet)
+
+
+# -------------------------
+# 이벤트별 필터
+# -------------------------
+# event_id → (필터, 적재 시각). 만료/포화된 필터도 새 필터가 준비될 때까지 계속 쓴다 (크기 제한만 LRU)
+_filters = TTLCache(DEDUP_MAX_EVENTS, ttl=None)
+# 백그라운드 적재 중인 event_id → 그동안 remember() 된 키 (새 필터에 다시 넣음)
+_rebuilding: Dict[int, List[bytes]] = {}
+_registry_lock = threading.Lock()
+
+
+def _warm(event_id: int, capacity: Optional[int] = None) -> BloomFilter:
+    """DB 의 기존 응모로 필터를 채운다 (email, wallet 만 스트리밍)"""
+    with session_scope() as s:
+        if capacity is None:
+            row = s.execute(
+                select(Event.participant_cap, EventStats.entries_total)
+                .outerjoin(EventStats, EventStats.event_id == Event.id)
+                .where(Event.id == event_id)
+            ).first()
+            existing = (row.entries_total or 0) if row else 0
+            cap = row.participant_cap if row else None
+            # 키는 응모당 최대 2개 (email, wallet)
+            capacity = 2 * max(cap or 0, existing * 2)
+        bloom = BloomFilter(max(capacity, DEDUP_MIN_CAPACITY))
+        rows = s.execute(
+            select(Entry.email, Entry.wallet_address).where(Entry.event_id == event_id)
+            .execution_options(yield_per=50000)
+        )
+        for email, wallet in rows:
+            for key in _keys(email, wallet):
+                bloom.add(key)
+    return bloom
+
+
+def _rebuild(event_id: int, capacity: Optional[int]):
+    try:
+        bloom = _warm(event_id, capacity)
+    except Exception as e:
+        log.warning("dedup filter warm failed (event %s): %s", event_id, e)
+        with _registry_lock:
+            _rebuilding.pop(event_id, None)
+        return
+    with _registry_lock:
+        for key in _rebuilding.pop(event_id, ()):
+            bloom.add(key)
+        _filters.set(event_id, (bloom, time.monotonic()))
+
+
+def get_filter(event_id: int) -> Optional[BloomFilter]:
+    """이벤트 필터. 아직 없으면 None (호출자는 모든 값을 '있을 수 있음' 으로 보고 DB 로 확인).
+    적재/재적재는 백그라운드 스레드가 하고, 그동안 요청 스레드는 기존 필터를 그대로 쓴다"""
+    entry = _filters.get(event_id)
+    bloom, built_at = entry if entry is not None else (None, None)
+    if bloom is not None and not bloom.saturated and built_at + DEDUP_TTL > time.monotonic():
+        return bloom
+    with _registry_lock:
+        if event_id in _rebuilding:
+            return bloom
+        _rebuilding[event_id] = []
+    # 넘친 필터는 두 배 크기로 다시 적재, 만료된 필터는 다른 워커의 삽입을 반영하려고 다시 적재
+    capacity = 2 * bloom.capacity if bloom is not None and bloom.saturated else None
+    threading.Thread(target=_rebuild, args=(event_id, capacity), name=f"dedup-warm-{event_id}",
+                     daemon=True).start()
+    return bloom
+
+
+def remember(event_id: int, email: Optional[str], wallet: Optional[str]):
+    """DB 에 들어간(또는 이미 있던) 값 등록. 필터가 아직 없으면 다음 적재 때 DB 에서 읽힘"""
+    keys = list(_keys(email, wallet))
+    # 새 필터로 바꾸는 _rebuild 와 같은 잠금 → 옛 필터에만 들어가고 새 필터에서 빠지는 값이 없음
+    with _registry_lock:
+        entry = _filters.get(event_id)
+        if entry is not None:
+            for key in keys:
+                entry[0].add(key)
+        if event_id in _rebuilding:
+            # 적재 중인 새 필터가 DB 를 읽은 뒤에 들어온 값일 수 있음
+            _rebuilding[event_id].extend(keys)
+
+
+def maybe_duplicates(event_id: int, values: Iterable[Tuple[Optional[str], Optional[str]]]
+                     ) -> Tuple[Set[str], Set[str]]:
+    """(email, wallet) 목록 중 필터가 '있을 수 있음' 이라고 답한 email / wallet(소문자) 집합"""
+    bloom = get_filter(event_id)
+    emails, wallets = set(), set()
+    for email, wallet in values:
+        if email and (bloom is None or email_key(email) in bloom):
+            emails.add(email)
+        if wallet and (bloom is None or wallet_key(wallet) in bloom):
+            wallets.add(wallet.lower())
+    return emails, wallets
+
+
+def check(event_id: int, email: Optional[str], wallet: Optional[str]) -> Optional[str]:
+    """응모 1건: 중복이면 사유('duplicate_email'/'duplicate_wallet'), 아니면 None.
+    필터가 '확실히 없음' 이면 DB 를 보지 않는다."""
+    maybe_emails, maybe_wallets = maybe_duplicates(event_id, [(email, wallet)])
+    if not maybe_emails and not maybe_wallets:
+        return None
+    with session_scope() as s:
+        # email 은 필터 키와 같은 정규화 값(email_hash = SHA2(LOWER(email)))으로 (idx_entries_email_hash)
+        if maybe_emails and s.execute(
+            select(Entry.id).where(Entry.event_id == event_id, Entry.email_hash == email_digest(email)).limit(1)
+        ).first():
+            return "duplicate_email"
+        if maybe_wallets and s.execute(
+            select(Entry.id).where(Entry.event_id == event_id, Entry.wallet_address == wallet).limit(1)
+        ).first():
+            return "duplicate_wallet"
+    return None
+
@@ -0,0 +1,212 @@
+# draw.py — VRF 난수 기반 결정적 당첨자 추첨 (부분 Fisher–Yates)
+# 실행: python draw.py <event_id> [--force]
+#
+# 재현 방법: valid 응모의 id 를 오름차순으로 나열한 배열 ids (길이 n) 와
+# seed = randomness_value 를 32바이트 big-endian 으로 둔 값에 대해
+#   i = 0..K-1:  j = i + keccak256(seed || uint256(i)) mod (n - i);  swap(ids[i], ids[j])
+# 앞의 K 개가 당첨 순서이고, 경품 id 오름차순으로 winners_count 만큼 차례로 배정한다.
+#
+# 온체인 래플(onchain_raffle_id 가 있는 이벤트)은 컨트랙트가 당첨자를 정하고 인덱서가 WinnersDrawn 을
+# 그대로 winners 에 넣는다 (당첨자의 출처는 하나). 이 경우 draw_event 는 새로 뽑지 않고,
+# 컨트랙트 규칙(idx = keccak256(randomWord, i) mod n, 이미 뽑힌 자리면 +1)을 인덱서가 Entered 로
+# 기록한 응모자 배열(entries.onchain_index 순)에 다시 적용해 저장된 당첨자와 같은지만 확인한다.
+#
+# 오프체인 이벤트에는 VRF 난수를 기록하는 경로가 없다 (Gelato VRF 는 컨트랙트 래플에만 연결).
+# 운영에서 지원하는 것은 온체인 검증뿐이고, 오프체인 추첨은 randomness_value 를 따로 넣어 둔
+# 경우(관리자 입력, bench/datagen.py)에만 같은 seed 로 재현 가능하게 뽑는다.
+from __future__ import annotations
+import hashlib
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from eth_utils import keccak
+from sqlalchemy import delete, insert, select, update
+
+import stats
+from models import session_scope, Event, EventStatus, Entry, EntryStatus, Prize, Winner
+
+WINNER_INSERT_BATCH = 1000
+
+
+class DrawError(Exception):
+    pass
+
+
+def seed_bytes(randomness_value: str) -> bytes:
+    """'0x..' hex 또는 10진 문자열 → 32바이트"""
+    return (int(str(randomness_value), 0) % 2 ** 256).to_bytes(32, "big")
+
+
+def sample_indices(seed: bytes, n: int, k: int) -> List[int]:
+    """[0, n) 에서 중복 없이 k 개를 뽑는다. 교체된 위치만 dict 에 담아 O(k) 메모리"""
+    k = min(k, n)
+    swapped: Dict[int, int] = {}
+    picked = []
+    for i in range(k):
+        r = int.from_bytes(keccak(seed + i.to_bytes(32, "big")), "big")
+        j = i + r % (n - i)
+        picked.append(swapped.get(j, j))
+        swapped[j] = swapped.get(i, i)
+    return picked
+
+
+def contract_winners(entrants: List[str], seed: bytes, k: int) -> List[str]:
+    """SponsoredRaffle._fulfillRandomness 와 같은 규칙 (선형 탐사)"""
+    n = len(entrants)
+    taken = [False] * n
+    winners = []
+    for i in range(min(k, n)):
+        idx = int.from_bytes(keccak(seed + i.to_bytes(32, "big")), "big") % n
+        while taken[idx]:
+            idx = (idx + 1) % n
+        taken[idx] = True
+        winners.append(entrants[idx])
+    return winners
+
+
+def load_entry_ids(s, event_id: int) -> array:
+    """valid 응모 id 를 int64 배열로 (100만 건 ≈ 8MB)"""
+    ids = array("q")
+    rows = s.execute(
+        select(Entry.id)
+        .where(Entry.event_id == event_id, Entry.status == EntryStatus.valid)
+        .order_by(Entry.id)
+        .execution_options(yield_per=50000)
+    ).scalars()
+    for chunk in rows.partitions():
+        ids.extend(chunk)
+    return ids
+
+
+def entries_digest(ids: array) -> str:
+    """검증용: int64 little-endian 으로 나열한 id 배열의 sha256"""
+    if ids.itemsize != 8 or array("q", [1]).tobytes()[0] != 1:
+        raise DrawError("unexpected platform int layout")
+    return hashlib.sha256(ids.tobytes()).hexdigest()
+
+
+def load_onchain_entrants(s, event_id: int) -> Optional[List[str]]:
+    """인덱서가 기록한 응모자 배열 (컨트랙트 entrants 와 같은 순서). 빈 자리가 있으면 None"""
+    entrants: List[str] = []
+    rows = s.execute(
+        select(Entry.onchain_index, Entry.wallet_address)
+        .where(Entry.event_id == event_id, Entry.onchain_index.is_not(None))
+        .order_by(Entry.onchain_index)
+        .execution_options(yield_per=50000)
+    )
+    for index, wallet in rows:
+        if index != len(entrants):
+            return None
+        entrants.append(wallet)
+    return entrants
+
+
+def verify_onchain(event_id: int) -> dict:
+    """인덱서가 저장한 온체인 당첨자를 컨트랙트 규칙으로 다시 계산해 비교한다 (DB 는 바꾸지 않음).
+    응모자 배열과 난수 모두 인덱싱된 로그에서 읽으므로 RPC 호출이 없고 라운드가 지나도 검증된다.
+    당첨 순서는 뽑는 개수와 무관하므로 저장된 당첨자 수만큼 다시 뽑아 비교한다"""
+    started = time.perf_counter()
+    with session_scope() as s:
+        event = s.get(Event, event_id)
+        if not event:
+            raise DrawError("event not found")
+        randomness = event.randomness_value
+        stored = s.execute(
+            select(Winner.prize_id, Entry.wallet_address).join(Entry, Entry.id == Winner.entry_id)
+            .where(Winner.event_id == event_id)
+        ).all()
+        prizes = s.execute(
+            select(Prize.id, Prize.winners_count).where(Prize.event_id == event_id).order_by(Prize.id)
+        ).all()
+        if not stored:
+            raise DrawError("winners not drawn on-chain yet")
+        entrants = load_onchain_entrants(s, event_id)
+    result = {"event_id": event_id, "source": "onchain", "winners": len(stored)}
+    if not randomness:
+        # 인덱서가 randomWord 를 구하지 못함 (indexer._random_words)
+        result.update(verified=None, reason="randomness_unknown")
+        return result
+    if not entrants:
+        # 인덱서가 아직 Entered 를 다 반영하지 못했거나 onchain_index 도입 이전 응모
+        result.update(verified=None, reason="entrants_incomplete")
+        return result
+    seed = seed_bytes(randomness)
+    expected = contract_winners(entrants, seed, len(stored))
+    # 인덱서와 같은 규칙: 당첨 순서대로 경품 id 오름차순 배정
+    want, cursor = set(), 0
+    for prize in prizes:
+        want.update((prize.id, addr.lower()) for addr in expected[cursor:cursor + prize.winners_count])
+        cursor += prize.winners_count
+    have = {(prize_id, (wallet or "").lower()) for prize_id, wallet in stored}
+    result.update(
+        verified=want == have,
+        seed="0x" + seed.hex(),
+        missing=sorted(addr for _, addr in want - have),
+        unexpected=sorted(addr for _, addr in have - want),
+        elapsed_sec=round(time.perf_counter() - started, 3),
+    )
+    return result
+
+
+def draw_event(event_id: int, force: bool = False) -> dict:
+    """오프체인 이벤트는 randomness_value 로 추첨해 저장, 온체인 래플은 verify_onchain 결과만 돌려준다"""
+    started = time.perf_counter()
+    with session_scope() as s:
+        event = s.get(Event, event_id)
+        if not event:
+            raise DrawError("event not found")
+        onchain = event.onchain_raffle_id is not None
+    if onchain:
+        return verify_onchain(event_id)
+    with session_scope() as s:
+        event = s.get(Event, event_id)
+        if not event.randomness_value:
+            raise DrawError("randomness not fulfilled")
+        existing = s.execute(select(Winner.id).where(Winner.event_id == event_id).limit(1)).first()
+        if existing and not force:
+            raise DrawError("winners already drawn")
+        seed = seed_bytes(event.randomness_value)
+        prizes = s.execute(
+            select(Prize.id, Prize.winners_count).where(Prize.event_id == event_id).order_by(Prize.id)
+        ).all()
+        if not prizes:
+            raise DrawError("no prizes")
+        ids = load_entry_ids(s, event_id)
+
+    n = len(ids)
+    wanted = sum(p.winners_count for p in prizes)
+    picked = sample_indices(seed, n, wanted)
+
+    rows, cursor = [], 0
+    for prize in prizes:
+        for idx in picked[cursor:cursor + prize.winners_count]:
+            rows.append({"event_id": event_id, "prize_id": prize.id, "entry_id": ids[idx]})
+        cursor += prize.winners_count
+
+    with session_scope() as s:
+        if existing:
+            s.execute(delete(Winner).where(Winner.event_id == event_id))
+        for i in range(0, len(rows), WINNER_INSERT_BATCH):
+            s.execute(insert(Winner.__table__).values(rows[i:i + WINNER_INSERT_BATCH]))
+        s.execute(update(Event).where(Event.id == event_id).values(status=EventStatus.drawn))
+        stats.refresh_winners(s, event_id)
+
+    return {
+        "event_id": event_id,
+        "seed": "0x" + seed.hex(),
+        "entry_count": n,
+        "entries_sha256": entries_digest(ids),
+        "winners": len(rows),
+        "shortfall": max(wanted - len(rows), 0),
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: python draw.py <event_id> [--force]")
+        sys.exit(1)
+    print(json.dumps(draw_event(int(sys.argv[1]), force="--force" in sys.argv)))
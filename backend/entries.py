@@ -0,0 +1,238 @@
+# entries.py — 참가자 응모 접수 (QR → 응모 페이지 → POST /api/events/<id>/entries)
+# 요청 스레드는 검증만 하고 프로세스 내 큐에 넣는다. 쓰기 스레드 하나가 ENTRY_FLUSH_MS 마다
+# (또는 ENTRY_BATCH_SIZE 건이 모이면) 이벤트별 다중 행 INSERT 로 한꺼번에 저장하고,
+# 각 요청은 자기 행의 결과(접수/중복/정원 초과)를 Future 로 받는다.
+# 중복 판정은 사전 SELECT 없이 uq_entries_event_email / uq_entries_event_wallet 제약에 맡기고,
+# 명백한 재응모는 dedup 필터로 미리 거른다.
+from __future__ import annotations
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+import dedup
+import stats
+from cache import TTLCache
+from csv_import import ACCEPTED, ENTRY_FIELDS, form_rules, insert_entry_rows, normalize_entry
+from models import session_scope, Event, EventStats, EventStatus, Entry, EntryStatus
+
+log = logging.getLogger("entries")
+
+ENTRY_BATCH_SIZE = int(os.getenv("ENTRY_BATCH_SIZE", "500"))
+ENTRY_FLUSH_MS = float(os.getenv("ENTRY_FLUSH_MS", "5"))
+# 큐가 이만큼 차 있으면 새 응모는 바로 503 (DB 가 못 따라오는 상황에서 메모리/대기 시간 제한)
+ENTRY_QUEUE_MAX = int(os.getenv("ENTRY_QUEUE_MAX", "20000"))
+ENTRY_WAIT_TIMEOUT = float(os.getenv("ENTRY_WAIT_TIMEOUT", "10"))
+# 폼 설정/정원/상태 캐시 (이 시간 동안의 설정 변경은 늦게 반영)
+ENTRY_RULES_TTL = float(os.getenv("ENTRY_RULES_TTL", "5"))
+# 공개 응모의 추가 항목(entry_metadata) 제한: 항목 수, 키/값 길이
+ENTRY_METADATA_MAX_KEYS = int(os.getenv("ENTRY_METADATA_MAX_KEYS", "10"))
+ENTRY_METADATA_MAX_KEY_LEN = int(os.getenv("ENTRY_METADATA_MAX_KEY_LEN", "64"))
+ENTRY_METADATA_MAX_VALUE_LEN = int(os.getenv("ENTRY_METADATA_MAX_VALUE_LEN", "500"))
+
+CLOSED_STATUSES = (EventStatus.closed, EventStatus.drawing, EventStatus.drawn, EventStatus.cancelled)
+_FIELD_MAPPING = {field: field for field in ENTRY_FIELDS}
+
+
+class EntryError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------------
+# 검증 (요청 스레드)
+# -------------------------
+_info_cache = TTLCache(4096, ENTRY_RULES_TTL)
+
+
+def _event_info(event_id: int) -> Optional[dict]:
+    info = _info_cache.get(event_id)
+    if info is None:
+        with session_scope() as s:
+            event = s.execute(
+                select(Event.status, Event.start_at, Event.end_at, Event.participant_cap, EventStats.entries_total)
+                .outerjoin(EventStats, EventStats.event_id == Event.id)
+                .where(Event.id == event_id)
+            ).first()
+            if event is None:
+                return None
+            info = {"status": event.status, "start_at": event.start_at, "end_at": event.end_at,
+                    "cap": event.participant_cap,
+                    "entries_total": event.entries_total or 0, "rules": form_rules(s, event_id)}
+        _info_cache.set(event_id, info)
+    return info
+
+
+def _check_metadata(extra: Optional[dict]):
+    """공개 엔드포인트라 추가 항목을 그대로 저장하면 행 크기를 마음대로 키울 수 있음 (CSV 가져오기는 소유자 입력이라 제외)"""
+    if not extra:
+        return
+    if len(extra) > ENTRY_METADATA_MAX_KEYS:
+        raise EntryError("too_many_fields")
+    if any(len(k) > ENTRY_METADATA_MAX_KEY_LEN or len(v) > ENTRY_METADATA_MAX_VALUE_LEN for k, v in extra.items()):
+        raise EntryError("field_too_long")
+
+
+def validate(event_id: int, data: dict) -> dict:
+    """요청 body → entries 행 값. 실패 시 EntryError"""
+    info = _event_info(event_id)
+    if info is None:
+        raise EntryError("event not found", 404)
+    if info["status"] in CLOSED_STATUSES:
+        raise EntryError("event closed", 409)
+    # 상태 전환(scheduler)이 늦거나 꺼져 있어도 응모 기간 밖은 거절
+    now = datetime.datetime.utcnow()
+    if info["start_at"] and now < info["start_at"]:
+        raise EntryError("event not started", 409)
+    if info["end_at"] and now >= info["end_at"]:
+        raise EntryError("event closed", 409)
+    if info["cap"] is not None and info["entries_total"] >= info["cap"]:
+        raise EntryError("participant_cap", 409)
+    if not isinstance(data, dict):
+        raise EntryError("json object required")
+    row = {k: str(v) for k, v in data.items()
+           if isinstance(k, str) and v is not None and not isinstance(v, (dict, list))}
+    try:
+        values = normalize_entry(row, _FIELD_MAPPING, info["rules"])
+    except ValueError as e:
+        raise EntryError(str(e))
+    _check_metadata(values["entry_metadata"])
+    # 같은 사람이 연달아 누르는 중복은 큐/INSERT 전에 거절 (새 값이면 DB 조회 없음)
+    duplicate = dedup.check(event_id, values["email"], values["wallet_address"])
+    if duplicate:
+        raise EntryError(duplicate, 409)
+    return {"event_id": event_id, "status": EntryStatus.valid, **values}
+
+
+# -------------------------
+# 배치 쓰기 (쓰기 스레드)
+# -------------------------
+def flush_event(event_id: int, rows: List[dict]) -> List[str]:
+    """한 이벤트의 응모 행들을 저장하고 행마다 결과(ACCEPTED 또는 거절 사유) 반환"""
+    with session_scope() as s:
+        # 정원은 집계 행을 잠가 워커/노드 간에 넘치지 않게 확인
+        current = s.execute(
+            select(Event.participant_cap, EventStats.entries_total)
+            .outerjoin(EventStats, EventStats.event_id == Event.id)
+            .where(Event.id == event_id)
+            .with_for_update(of=EventStats)
+        ).first()
+        if current is None:
+            return ["event not found"] * len(rows)
+        allowed = len(rows)
+        if current.participant_cap is not None:
+            allowed = max(min(allowed, current.participant_cap - (current.entries_total or 0)), 0)
+        results = insert_entry_rows(s, rows[:allowed]) if allowed else []
+        results += ["participant_cap"] * (len(rows) - allowed)
+        inserted = results.count(ACCEPTED)
+        if inserted:
+            stats.add_entries(s, event_id, EntryStatus.valid, inserted)
+    for row, result in zip(rows, results):
+        if result != "participant_cap":
+            dedup.remember(event_id, row["email"], row["wallet_address"])
+    info = _info_cache.get(event_id)
+    if info is not None:
+        info["entries_total"] = (current.entries_total or 0) + inserted
+    return results
+
+
+class EntryWriter:
+    def __init__(self, batch_size: int = ENTRY_BATCH_SIZE, flush_ms: float = ENTRY_FLUSH_MS,
+                 max_queue: int = ENTRY_QUEUE_MAX):
+        self.batch_size = batch_size
+        self.flush_sec = flush_ms / 1000
+        self._queue: "queue.Queue[Tuple[int, dict, Future]]" = queue.Queue(max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.rows = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="entry-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def submit(self, values: dict) -> Future:
+        fut: Future = Future()
+        try:
+            self._queue.put_nowait((values["event_id"], values, fut))
+        except queue.Full:
+            raise EntryError("busy, retry later", 503)
+        return fut
+
+    def _collect(self) -> List[Tuple[int, dict, Future]]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_sec
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            by_event: Dict[int, List[Tuple[dict, Future]]] = defaultdict(list)
+            for event_id, values, fut in batch:
+                by_event[event_id].append((values, fut))
+            for event_id, items in by_event.items():
+                try:
+                    results = flush_event(event_id, [v for v, _ in items])
+                except Exception as e:
+                    log.warning("entry flush failed (event %s, %d rows): %s", event_id, len(items), e)
+                    for _, fut in items:
+                        fut.set_exception(e)
+                    continue
+                for (_, fut), result in zip(items, results):
+                    fut.set_result(result)
+            self.flushes += 1
+            self.rows += len(batch)
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "flushes": self.flushes, "rows": self.rows,
+                "rows_per_flush": round(self.rows / self.flushes, 1) if self.flushes else 0.0}
+
+
+_writer: Optional[EntryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> EntryWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = EntryWriter().start()
+    return _writer
+
+
+def submit_entry(event_id: int, data: dict) -> Future:
+    """검증 후 쓰기 큐에 넣고 Future 반환 (결과: ACCEPTED 또는 거절 사유 문자열)"""
+    return get_writer().submit(validate(event_id, data))
+
+
+def result_response(result: str) -> Tuple[dict, int]:
+    """Future 결과 → (응답 body, HTTP 상태)"""
+    if result == ACCEPTED:
+        return {"ok": True, "status": EntryStatus.valid.value}, 201
+    return {"error": result}, 404 if result == "event not found" else 409
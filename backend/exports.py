@@ -0,0 +1,141 @@
+# exports.py — 이벤트 데이터 스트리밍 내보내기 (entries / winners / tx_logs → CSV 또는 NDJSON, 선택 gzip)
+# 서버 측 커서(stream_results)로 EXPORT_CHUNK 행씩 읽어 바로 내보내므로 이벤트 크기와 무관하게 메모리 일정.
+# 실행: python exports.py <entries|winners|tx> <event_id> [csv|ndjson] > out
+from __future__ import annotations
+import csv
+import datetime
+import decimal
+import enum
+import io
+import json
+import os
+import zlib
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import select
+
+from models import read_engine, Entry, Prize, TxLog, Winner
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "5000"))
+
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _entries(event_id: int):
+    return (select(Entry.id, Entry.nickname, Entry.email, Entry.wallet_address, Entry.status,
+                   Entry.entry_metadata, Entry.created_at)
+            .where(Entry.event_id == event_id)
+            .order_by(Entry.created_at, Entry.id))  # idx_entries_event_created
+
+
+def _winners(event_id: int):
+    return (select(Winner.id.label("winner_id"), Winner.prize_id, Prize.name.label("prize_name"),
+                   Winner.entry_id, Entry.nickname, Entry.email, Entry.wallet_address,
+                   Winner.claim_status, Winner.claim_tx_hash, Winner.assigned_at)
+            .join(Prize, Prize.id == Winner.prize_id)
+            .join(Entry, Entry.id == Winner.entry_id)
+            .where(Winner.event_id == event_id)
+            .order_by(Winner.id))
+
+
+def _tx_logs(event_id: int):
+    return (select(TxLog.tx_hash, TxLog.tx_type, TxLog.status, TxLog.from_address, TxLog.to_address,
+                   TxLog.block_number, TxLog.block_timestamp, TxLog.gas_used, TxLog.gas_price_wei,
+                   TxLog.fee_wei, TxLog.error_message, TxLog.created_at)
+            .where(TxLog.event_id == event_id)
+            .order_by(TxLog.created_at, TxLog.id))  # idx_tx_event_time
+
+
+EXPORTS: Dict[str, Callable] = {"entries": _entries, "winners": _winners, "tx": _tx_logs}
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    return value
+
+
+def _csv_cell(value) -> str:
+    value = _plain(value)
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    # 스프레드시트 수식 주입 방지 (닉네임 등 참가자 입력값)
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return str(value)
+
+
+def stream_rows(stmt, chunk: int = EXPORT_CHUNK) -> Tuple[List[str], Iterator[list]]:
+    """(컬럼명, 행 chunk 이터레이터). 커넥션은 이터레이터가 끝나거나 닫힐 때 반환"""
+    columns = [c.key for c in stmt.selected_columns]
+
+    def chunks():
+        with read_engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk).execute(stmt)
+            for part in result.partitions():
+                yield part
+    return columns, chunks()
+
+
+def _encode_csv(columns, chunks) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # 엑셀에서 한글이 깨지지 않도록 BOM
+    writer.writerow(columns)
+    for part in chunks:
+        writer.writerows([_csv_cell(v) for v in row] for row in part)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(columns, chunks) -> Iterator[bytes]:
+    for part in chunks:
+        yield "".join(
+            json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False, default=str) + "\n"
+            for row in part
+        ).encode("utf-8")
+
+
+def _gzip(blocks: Iterator[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip 헤더
+    for block in blocks:
+        out = z.compress(block)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def export(kind: str, event_id: int, fmt: str = "csv", gzip: bool = False) -> Iterator[bytes]:
+    """내보내기 바이트 스트림 (HTTP 응답 본문으로 그대로 사용)"""
+    if kind not in EXPORTS:
+        raise ValueError(f"unknown export: {kind}")
+    if fmt not in FORMATS:
+        raise ValueError("format must be csv or ndjson")
+    columns, chunks = stream_rows(EXPORTS[kind](event_id))
+    body = _encode_csv(columns, chunks) if fmt == "csv" else _encode_ndjson(columns, chunks)
+    return _gzip(body) if gzip else body
+
+
+def filename(kind: str, event_id: int, fmt: str, gzip: bool = False) -> str:
+    return f"event_{event_id}_{kind}.{fmt}" + (".gz" if gzip else "")
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("usage: python exports.py <entries|winners|tx> <event_id> [csv|ndjson]")
+        sys.exit(1)
+    out = sys.stdout.buffer
+    for block in export(sys.argv[1], int(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else "csv"):
+        out.write(block)
@@ -0,0 +1,62 @@
+# health.py — 준비 상태(readiness) 확인: DB(primary/복제본) SELECT 1, RPC eth_blockNumber
+# 로드밸런서가 자주 두드려도 DB/노드에 부담이 가지 않도록 결과(실패 포함)를 HEALTH_CACHE_TTL 초 캐시하고,
+# 동시에 들어온 확인 요청은 probe 1번으로 합친다.
+from __future__ import annotations
+import os
+import time
+from typing import Callable, Dict
+
+from sqlalchemy import text
+
+import chain
+from cache import ReadThroughCache
+from models import engine, read_engine
+
+HEALTH_CACHE_TTL = float(os.environ.get("HEALTH_CACHE_TTL", "5"))
+HEALTH_RPC_TIMEOUT = float(os.environ.get("HEALTH_RPC_TIMEOUT", "2"))
+
+_results = ReadThroughCache(8, HEALTH_CACHE_TTL)
+_rpc_client = None
+
+
+def _timed(fn: Callable[[], dict]) -> Callable[[], dict]:
+    def probe() -> dict:
+        started = time.perf_counter()
+        try:
+            result = {"ok": True, **(fn() or {})}
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"[:200]}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["checked_at"] = int(time.time())
+        return result
+    return probe
+
+
+def _db(eng) -> Callable[[], dict]:
+    def probe():
+        with eng.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    return _timed(probe)
+
+
+def _rpc() -> dict:
+    global _rpc_client
+    if _rpc_client is None:
+        # 일반 클라이언트(RPC_TIMEOUT 10초)와 별도로 짧은 타임아웃
+        _rpc_client = chain.RpcClient(timeout=HEALTH_RPC_TIMEOUT, pool_size=1)
+    return {"block": int(_rpc_client.call("eth_blockNumber"), 16)}
+
+
+def probes() -> Dict[str, Callable[[], dict]]:
+    checks = {"db": _db(engine)}
+    if read_engine is not engine:
+        checks["db_replica"] = _db(read_engine)
+    if chain.RPC_URLS:
+        checks["rpc"] = _timed(_rpc)
+    return checks
+
+
+def check() -> dict:
+    """{'status': 'ok'|'error', 'checks': {이름: {...}}}. 하나라도 실패면 error"""
+    checks = {name: _results.get_or_load(name, probe) for name, probe in probes().items()}
+    return {"status": "ok" if all(c["ok"] for c in checks.values()) else "error", "checks": checks}
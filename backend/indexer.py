@@ -0,0 +1,374 @@
+# indexer.py — SponsoredRaffle 로그 인덱서
+# eth_getLogs 를 구간 단위로 읽어 entries / vrf_requests / events.randomness_* / winners 에 반영하고
+# 마지막 처리 블록을 chain_checkpoints 에 저장한다. 확정 깊이(INDEXER_CONFIRMATIONS)만큼
+# 뒤처져서 읽고, 체크포인트 블록 해시가 바뀌었으면(reorg) 그만큼 되감아, 되감은 블록 이후에서
+# 반영했던 응모/VRF/당첨 기록을 되돌린 뒤 다시 처리한다.
+# 첫 실행(체크포인트 없음)에는 INDEXER_START_BLOCK(컨트랙트 배포 블록)이 있어야 한다.
+# 실행: python indexer.py
+from __future__ import annotations
+import datetime
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from eth_abi import decode as abi_decode
+from eth_utils import keccak, to_checksum_address
+from sqlalchemy import case, delete, func, insert, select, update
+
+import chain
+import stats
+from models import (
+    session_scope, ChainCheckpoint, Event, EventStatus, Entry, EntryStatus, Prize, Winner,
+    VRFRequest, VRFStatus,
+)
+
+log = logging.getLogger("indexer")
+
+CONTRACT_ADDRESS = os.environ.get("CONTRACT_ADDRESS")
+INDEXER_CONFIRMATIONS = int(os.environ.get("INDEXER_CONFIRMATIONS", "5"))
+INDEXER_BLOCK_RANGE = int(os.environ.get("INDEXER_BLOCK_RANGE", "2000"))
+INDEXER_START_BLOCK = os.environ.get("INDEXER_START_BLOCK")
+INDEXER_POLL_INTERVAL = float(os.environ.get("INDEXER_POLL_INTERVAL", "2"))
+CHECKPOINT_NAME = "sponsored_raffle"
+
+EVENT_SIGNATURES = {
+    "Entered": "Entered(address,uint256,uint256)",
+    "Locked": "Locked(uint256,uint256)",
+    "VRFRequested": "VRFRequested(uint256,uint256)",
+    "WinnersDrawn": "WinnersDrawn(uint256,address[])",
+    "NewRound": "NewRound(uint256,uint256)",
+}
+TOPICS = {"0x" + keccak(text=sig).hex(): name for name, sig in EVENT_SIGNATURES.items()}
+RANDOM_WORD_SELECTOR = "0x" + keccak(text="randomWord()")[:4].hex()
+# GelatoVRFConsumerBase.fulfillRandomness(requestId, randomness): WinnersDrawn 을 낸 트랜잭션의 입력
+FULFILL_SELECTOR = "0x" + keccak(text="fulfillRandomness(uint256,uint256)")[:4].hex()
+
+# 반영된 로그(dict)를 받는 콜백 (캐시 무효화, 실시간 푸시 등)
+_listeners: List[Callable[[dict], None]] = []
+
+
+def on_log(fn: Callable[[dict], None]):
+    _listeners.append(fn)
+    return fn
+
+
+def decode_log(raw: dict) -> Optional[dict]:
+    topics = raw.get("topics") or []
+    name = TOPICS.get(topics[0].lower()) if topics else None
+    if name is None:
+        return None
+    data = bytes.fromhex(raw["data"][2:])
+    item = {
+        "name": name,
+        "contract": raw["address"].lower(),
+        "raffle_id": int(topics[-1], 16),
+        "block_number": int(raw["blockNumber"], 16),
+        "log_index": int(raw["logIndex"], 16),
+        "tx_hash": raw["transactionHash"],
+    }
+    if name == "Entered":
+        item["user"] = to_checksum_address("0x" + topics[1][-40:])
+        item["total"] = int.from_bytes(data[:32], "big")
+    elif name == "Locked":
+        item["total"] = int.from_bytes(data[:32], "big")
+    elif name == "VRFRequested":
+        item["request_id"] = int.from_bytes(data[:32], "big")
+    elif name == "WinnersDrawn":
+        item["winners"] = [to_checksum_address(a) for a in abi_decode(["address[]"], data)[0]]
+    elif name == "NewRound":
+        item["winners_count"] = int.from_bytes(data[:32], "big")
+    return item
+
+
+def _contracts(s) -> List[str]:
+    addrs = set(s.execute(
+        select(Event.consumer_contract_address).where(Event.consumer_contract_address.is_not(None)).distinct()
+    ).scalars())
+    if CONTRACT_ADDRESS:
+        addrs.add(CONTRACT_ADDRESS)
+    return sorted({a.lower() for a in addrs})
+
+
+def _event_map(s, items: List[dict]) -> Dict[tuple, int]:
+    """(contract, raffleId) → events.id"""
+    raffle_ids = {i["raffle_id"] for i in items}
+    rows = s.execute(
+        select(Event.id, Event.consumer_contract_address, Event.onchain_raffle_id)
+        .where(Event.onchain_raffle_id.in_(raffle_ids))
+    ).all()
+    default = CONTRACT_ADDRESS.lower() if CONTRACT_ADDRESS else None
+    return {((addr or default or "").lower(), rid): eid for eid, addr, rid in rows}
+
+
+# -------------------------
+# 로그 반영
+# -------------------------
+def _apply_entered(s, event_id: int, items: List[dict]):
+    users = [i["user"] for i in items]
+    # 블록/응모자 배열 위치는 사용자마다 달라 CASE 로 한 번에 (draw.verify_onchain 이 위치 순으로 재구성)
+    onchain = {
+        "onchain_block": case({i["user"]: i["block_number"] for i in items}, value=Entry.wallet_address),
+        "onchain_index": case({i["user"]: i["total"] - 1 for i in items}, value=Entry.wallet_address),
+    }
+    n = s.execute(
+        update(Entry)
+        .where(Entry.event_id == event_id, Entry.wallet_address.in_(users), Entry.status == EntryStatus.pending)
+        .values(status=EntryStatus.valid, **onchain)
+    ).rowcount
+    stats.move_entries(s, event_id, EntryStatus.pending, EntryStatus.valid, n)
+    # 이미 valid 였던 응모(오프체인에서 먼저 확정)도 위치는 기록
+    s.execute(update(Entry).where(Entry.event_id == event_id, Entry.wallet_address.in_(users),
+                                  Entry.status == EntryStatus.valid, Entry.onchain_index.is_(None))
+              .values(**onchain))
+    rows = [{"event_id": event_id, "wallet_address": i["user"], "status": EntryStatus.valid,
+             "onchain_block": i["block_number"], "onchain_index": i["total"] - 1} for i in items]
+    inserted = s.execute(
+        insert(Entry.__table__).values(rows)
+        .prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+    ).rowcount
+    stats.add_entries(s, event_id, EntryStatus.valid, inserted)
+
+
+def _apply_winners(s, event_id: int, winners: List[str]):
+    entry_ids = dict(s.execute(
+        select(Entry.wallet_address, Entry.id).where(Entry.event_id == event_id, Entry.wallet_address.in_(winners))
+    ).all())
+    entry_ids = {k.lower(): v for k, v in entry_ids.items()}
+    prizes = s.execute(
+        select(Prize.id, Prize.winners_count).where(Prize.event_id == event_id).order_by(Prize.id)
+    ).all()
+    # 컨트랙트의 당첨 순서대로 경품 id 오름차순 배정 (draw.py 와 동일 규칙)
+    rows, cursor = [], 0
+    for prize in prizes:
+        for addr in winners[cursor:cursor + prize.winners_count]:
+            if addr.lower() in entry_ids:
+                rows.append({"event_id": event_id, "prize_id": prize.id, "entry_id": entry_ids[addr.lower()]})
+        cursor += prize.winners_count
+    if rows:
+        s.execute(insert(Winner.__table__).values(rows)
+                  .prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"))
+    stats.refresh_winners(s, event_id)
+
+
+def _fulfil_randomness(tx) -> Optional[str]:
+    """fulfillRandomness 호출 트랜잭션 입력에서 randomness 워드를 꺼낸다 (아카이브 노드 불필요)"""
+    data = (tx or {}).get("input") or ""
+    if not isinstance(tx, dict) or not data.startswith(FULFILL_SELECTOR) or len(data) < 10 + 128:
+        return None
+    return "0x" + data[10 + 64:10 + 128]
+
+
+def _random_words(drawn: List[dict], client: chain.RpcClient) -> Dict[int, Optional[str]]:
+    """WinnersDrawn 로그별 randomWord. 1순위는 VRF 이행 트랜잭션 입력, 안 되면(릴레이/멀티콜 경유)
+    해당 블록의 randomWord() eth_call (과거 상태라 아카이브 노드 필요). 실패한 로그만 None 으로 두고
+    나머지는 계속 반영한다 (한 로그 때문에 체크포인트가 멈추지 않도록)"""
+    txs = client.batch([("eth_getTransactionByHash", [i["tx_hash"]]) for i in drawn], raise_errors=False)
+    words = {id(i): _fulfil_randomness(tx) for i, tx in zip(drawn, txs)}
+    fallback = [i for i in drawn if words[id(i)] is None]
+    results = client.batch([("eth_call", [{"to": i["contract"], "data": RANDOM_WORD_SELECTOR},
+                                          hex(i["block_number"])]) for i in fallback], raise_errors=False)
+    for i, r in zip(fallback, results):
+        if isinstance(r, chain.RpcError) or not r:
+            log.warning("randomWord unavailable for raffle %s (tx %s): %s", i["raffle_id"], i["tx_hash"], r)
+            continue
+        words[id(i)] = r
+    return words
+
+
+def apply_logs(s, items: List[dict], client: chain.RpcClient):
+    if not items:
+        return
+    items.sort(key=lambda i: (i["block_number"], i["log_index"]))
+    events = _event_map(s, items)
+
+    # VRF/당첨 로그에 필요한 블록 시각은 배치 한 번에 (실패한 블록은 시각 없이 반영)
+    need_ts = sorted({i["block_number"] for i in items if i["name"] in ("VRFRequested", "WinnersDrawn")})
+    blocks = client.batch([("eth_getBlockByNumber", [hex(b), False]) for b in need_ts], raise_errors=False)
+    timestamps = {b: datetime.datetime.utcfromtimestamp(int(r["timestamp"], 16))
+                  for b, r in zip(need_ts, blocks) if isinstance(r, dict)}
+    drawn = [i for i in items if i["name"] == "WinnersDrawn"]
+    random_words = _random_words(drawn, client) if drawn else {}
+
+    entered = defaultdict(list)
+    for i in items:
+        event_id = events.get((i["contract"], i["raffle_id"]))
+        i["event_id"] = event_id
+        if event_id is None:
+            continue
+        if i["name"] == "Entered":
+            entered[event_id].append(i)
+            continue
+        # Entered 이외 로그는 순서가 중요하므로 앞선 응모를 먼저 반영
+        if entered.get(event_id):
+            _apply_entered(s, event_id, entered.pop(event_id))
+        if i["name"] == "Locked":
+            s.execute(update(Event).where(Event.id == event_id,
+                                          Event.status.in_([EventStatus.draft, EventStatus.open]))
+                      .values(status=EventStatus.closed))
+        elif i["name"] == "VRFRequested":
+            ts = timestamps.get(i["block_number"])
+            s.execute(insert(VRFRequest.__table__).values(
+                event_id=event_id, provider="gelato", request_tx_hash=i["tx_hash"],
+                request_id=str(i["request_id"]), status=VRFStatus.requested, requested_at=ts,
+                request_block=i["block_number"],
+            ).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"))
+            s.execute(update(Event).where(Event.id == event_id).values(
+                randomness_request_id=str(i["request_id"]), randomness_requested_at=ts,
+                status=EventStatus.drawing))
+        elif i["name"] == "WinnersDrawn":
+            ts = timestamps.get(i["block_number"])
+            word = random_words.get(id(i))
+            # word 를 못 구했으면 당첨자/상태만 반영 (기존 값을 NULL 로 덮지 않음)
+            fulfilled = {"random_value": word} if word else {}
+            # 스케줄러가 시간 초과로 failed 표시한 요청도 늦게 이행되면 fulfilled 로
+            s.execute(update(VRFRequest).where(VRFRequest.event_id == event_id,
+                                               VRFRequest.status.in_([VRFStatus.requested, VRFStatus.failed]))
+                      .values(status=VRFStatus.fulfilled, fulfill_tx_hash=i["tx_hash"], fulfilled_at=ts,
+                              fulfill_block=i["block_number"], **fulfilled))
+            randomness = {"randomness_value": word} if word else {}
+            s.execute(update(Event).where(Event.id == event_id).values(
+                randomness_fulfilled_at=ts, status=EventStatus.drawn, **randomness))
+            _apply_winners(s, event_id, i["winners"])
+    for event_id, entries in entered.items():
+        _apply_entered(s, event_id, entries)
+
+
+def unwind(s, block: int):
+    """block 이후(reorg 로 버려진 블록)에서 반영했던 기록을 되돌린다. 다시 처리하며 정식 체인 기준으로 재반영됨"""
+    # 응모: 인덱서가 확정한 것만 pending 으로 (정식 체인에 다시 포함되면 재처리 때 valid 로)
+    moved = s.execute(
+        select(Entry.event_id, func.count()).where(Entry.onchain_block > block, Entry.status == EntryStatus.valid)
+        .group_by(Entry.event_id)
+    ).all()
+    s.execute(update(Entry).where(Entry.onchain_block > block)
+              .values(status=EntryStatus.pending, onchain_block=None, onchain_index=None))
+    for event_id, n in moved:
+        stats.move_entries(s, event_id, EntryStatus.valid, EntryStatus.pending, n)
+
+    # 이행(WinnersDrawn): 당첨자/난수를 지우고 요청 상태로
+    drawn = s.execute(select(VRFRequest.event_id).where(VRFRequest.fulfill_block > block)).scalars().all()
+    if drawn:
+        s.execute(delete(Winner).where(Winner.event_id.in_(drawn)))
+        s.execute(update(VRFRequest).where(VRFRequest.fulfill_block > block).values(
+            status=VRFStatus.requested, fulfill_tx_hash=None, fulfilled_at=None, random_value=None,
+            fulfill_block=None))
+        s.execute(update(Event).where(Event.id.in_(drawn)).values(
+            status=EventStatus.drawing, randomness_value=None, randomness_fulfilled_at=None))
+        for event_id in set(drawn):
+            stats.refresh_winners(s, event_id)
+
+    # 요청(VRFRequested): 행을 지우고 Locked 상태로
+    requested = s.execute(select(VRFRequest.event_id).where(VRFRequest.request_block > block)).scalars().all()
+    if requested:
+        s.execute(delete(VRFRequest).where(VRFRequest.request_block > block))
+        s.execute(update(Event).where(Event.id.in_(requested)).values(
+            status=EventStatus.closed, randomness_request_id=None, randomness_requested_at=None))
+    if moved or drawn or requested:
+        log.warning("unwound blocks > %s: %d event(s) entries, %d fulfilment(s), %d request(s)",
+                    block, len(moved), len(drawn), len(requested))
+
+
+# -------------------------
+# 동기화 루프
+# -------------------------
+def _save_checkpoint(s, block_number: int, block_hash: Optional[str]):
+    row = s.get(ChainCheckpoint, CHECKPOINT_NAME)
+    if row is None:
+        s.add(ChainCheckpoint(name=CHECKPOINT_NAME, block_number=block_number, block_hash=block_hash))
+    else:
+        row.block_number = block_number
+        row.block_hash = block_hash
+
+
+def sync_once(client: Optional[chain.RpcClient] = None, max_ranges: int = 10) -> int:
+    """확정된 새 블록을 최대 max_ranges 구간까지 처리. 처리한 블록 수 반환"""
+    client = client or chain.get_client()
+    target = int(client.call("eth_blockNumber"), 16) - INDEXER_CONFIRMATIONS
+    with session_scope() as s:
+        cp = s.get(ChainCheckpoint, CHECKPOINT_NAME)
+        last = cp.block_number if cp else None
+        last_hash = cp.block_hash if cp else None
+        contracts = _contracts(s)
+    if not contracts or target < 0:
+        return 0
+    if last is None:
+        # 최근 구간부터 읽으면 그 이전 응모/추첨을 조용히 놓치므로 배포 블록 없이는 시작하지 않음
+        if not INDEXER_START_BLOCK:
+            raise RuntimeError("INDEXER_START_BLOCK (contract deployment block) is required on first run")
+        last = int(INDEXER_START_BLOCK) - 1
+    elif last_hash:
+        blk = client.call("eth_getBlockByNumber", [hex(last), False])
+        if not blk or blk["hash"] != last_hash:
+            rewind = max(last - INDEXER_CONFIRMATIONS * 2, 0)
+            log.warning("reorg detected at block %s, rewinding to %s", last, rewind)
+            with session_scope() as s:
+                unwind(s, rewind)
+                _save_checkpoint(s, rewind, None)
+            last = rewind
+
+    processed = 0
+    for _ in range(max_ranges):
+        if last >= target:
+            break
+        frm, to = last + 1, min(last + INDEXER_BLOCK_RANGE, target)
+        raw_logs, to_block = client.batch([
+            ("eth_getLogs", [{"fromBlock": hex(frm), "toBlock": hex(to), "address": contracts,
+                              "topics": [list(TOPICS)]}]),
+            ("eth_getBlockByNumber", [hex(to), False]),
+        ])
+        items = [d for d in (decode_log(r) for r in raw_logs if not r.get("removed")) if d]
+        with session_scope() as s:
+            apply_logs(s, items, client)
+            _save_checkpoint(s, to, to_block["hash"] if to_block else None)
+        for item in items:
+            for fn in _listeners:
+                try:
+                    fn(item)
+                except Exception as e:
+                    log.warning("indexer listener failed: %s", e)
+        processed += to - frm + 1
+        last = to
+    return processed
+
+
+class IndexerThread:
+    def __init__(self, interval: float = INDEXER_POLL_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._loop, name="log-indexer", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if sync_once() >= INDEXER_BLOCK_RANGE:
+                    continue  # 따라잡는 중이면 바로 다음 구간
+            except Exception as e:
+                log.warning("indexer sync failed: %s", e)
+            self._stop.wait(self.interval)
+
+
+_indexer: Optional[IndexerThread] = None
+
+
+def start_indexer() -> IndexerThread:
+    global _indexer
+    if _indexer is None:
+        _indexer = IndexerThread().start()
+    return _indexer
+
+
+if __name__ == "__main__":
+    import time
+    logging.basicConfig(level=logging.INFO)
+    start_indexer()
+    print("✅ log indexer 시작")
+    while True:
+        time.sleep(3600)
@@ -0,0 +1,257 @@
+# jobs.py — DB(jobs 테이블) 기반 백그라운드 작업 큐 + 워커 스레드 풀
+# 실행: python jobs.py  (API 와 분리된 전용 워커 프로세스)
+from __future__ import annotations
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import select, update, or_
+
+from models import session_scope, Job, JobStatus
+
+log = logging.getLogger("jobs")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# heartbeat 가 이 시간(초) 이상 끊긴 running 작업은 죽은 워커의 것으로 보고 회수
+JOB_STALE_SEC = int(os.getenv("JOB_STALE_SEC", "300"))
+# 핸들러 실행 중 heartbeat 주기 (한 단계가 오래 걸리는 draw / relay 도 회수되지 않도록)
+JOB_HEARTBEAT_SEC = float(os.getenv("JOB_HEARTBEAT_SEC", str(max(1, JOB_STALE_SEC // 5))))
+
+_HANDLERS: Dict[str, Callable[["JobContext"], Optional[dict]]] = {}
+
+
+def job_handler(kind: str):
+    """작업 종류별 핸들러 등록 데코레이터. 핸들러 반환값(dict)은 jobs.result 에 저장"""
+    def deco(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return deco
+
+
+class JobFailed(Exception):
+    """재시도해도 결과가 같은 실패 (잘못된 입력 등). 남은 시도 횟수와 관계없이 바로 failed"""
+
+
+def _now():
+    return datetime.datetime.utcnow()
+
+
+class JobContext:
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.kind = job.kind
+        self.event_id = job.event_id
+        self.owner_id = job.owner_id
+        self.payload = job.payload or {}
+        self._last_report = 0.0
+
+    def set_progress(self, done: int, total: Optional[int] = None, force: bool = False):
+        """진행률 기록 (DB 쓰기는 최대 초당 1회)"""
+        now = time.monotonic()
+        if not force and now - self._last_report < 1.0:
+            return
+        self._last_report = now
+        values = {"progress": int(done), "heartbeat_at": _now()}
+        if total is not None:
+            values["total"] = int(total)
+        with session_scope() as s:
+            s.execute(update(Job).where(Job.id == self.job_id).values(**values))
+
+
+# -------------------------
+# 큐 조작
+# -------------------------
+def enqueue(kind: str, payload: Optional[dict] = None, event_id: Optional[int] = None,
+            owner_id: Optional[int] = None, max_attempts: int = 1, run_after=None) -> int:
+    if kind not in _HANDLERS:
+        raise ValueError(f"unknown job kind: {kind}")
+    with session_scope() as s:
+        job = Job(kind=kind, payload=payload, event_id=event_id, owner_id=owner_id,
+                  max_attempts=max_attempts, run_after=run_after, status=JobStatus.queued)
+        s.add(job)
+        s.flush()
+        job_id = job.id
+    if _runner is not None:
+        _runner.wake()
+    return job_id
+
+
+def job_to_dict(job: Job) -> dict:
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status.value,
+        'event_id': job.event_id,
+        'progress': job.progress,
+        'total': job.total,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error_message,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+
+
+def _claim_next(worker_id: str) -> Optional[int]:
+    """queued 작업 하나를 조건부 UPDATE 로 선점 (여러 프로세스가 동시에 돌아도 한 곳만 성공)"""
+    with session_scope() as s:
+        candidates = s.execute(
+            select(Job.id)
+            .where(Job.status == JobStatus.queued,
+                   or_(Job.run_after.is_(None), Job.run_after <= _now()))
+            .order_by(Job.id)
+            .limit(10)
+        ).scalars().all()
+        for job_id in candidates:
+            res = s.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.queued)
+                .values(status=JobStatus.running, worker_id=worker_id, attempts=Job.attempts + 1,
+                        started_at=_now(), heartbeat_at=_now())
+            )
+            if res.rowcount == 1:
+                return job_id
+    return None
+
+
+def _requeue_stale():
+    cutoff = _now() - datetime.timedelta(seconds=JOB_STALE_SEC)
+    with session_scope() as s:
+        stale = Job.status == JobStatus.running
+        s.execute(update(Job).where(stale, Job.heartbeat_at < cutoff, Job.attempts < Job.max_attempts)
+                  .values(status=JobStatus.queued, worker_id=None))
+        s.execute(update(Job).where(stale, Job.heartbeat_at < cutoff, Job.attempts >= Job.max_attempts)
+                  .values(status=JobStatus.failed, error_message="worker lost", finished_at=_now()))
+
+
+class _Heartbeat:
+    """핸들러가 도는 동안 JOB_HEARTBEAT_SEC 마다 heartbeat_at 갱신 (set_progress 를 부르지 않는 긴 단계용)"""
+
+    def __init__(self, job_id: int, interval: Optional[float] = None):
+        self.job_id = job_id
+        self.interval = interval or JOB_HEARTBEAT_SEC
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"job-heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with session_scope() as s:
+                    s.execute(update(Job).where(Job.id == self.job_id, Job.status == JobStatus.running)
+                              .values(heartbeat_at=_now()))
+            except Exception as e:
+                log.warning("job %s heartbeat failed: %s", self.job_id, e)
+
+
+def run_job(job_id: int):
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        ctx = JobContext(job)
+        attempts, max_attempts = job.attempts, job.max_attempts
+    handler = _HANDLERS.get(ctx.kind)
+    try:
+        if handler is None:
+            raise RuntimeError(f"no handler for job kind {ctx.kind}")
+        with _Heartbeat(job_id):
+            result = handler(ctx)
+        values = {"status": JobStatus.succeeded, "result": result, "error_message": None}
+    except JobFailed as e:
+        log.warning("job %s (%s) failed: %s", job_id, ctx.kind, e)
+        values = {"status": JobStatus.failed, "error_message": str(e)}
+    except Exception as e:
+        log.warning("job %s (%s) failed: %s", job_id, ctx.kind, e)
+        retry = attempts < max_attempts
+        values = {
+            "status": JobStatus.queued if retry else JobStatus.failed,
+            "error_message": f"{e}\n{traceback.format_exc(limit=5)}",
+            # 재시도는 지수 백오프
+            "run_after": _now() + datetime.timedelta(seconds=2 ** attempts) if retry else None,
+        }
+    with session_scope() as s:
+        s.execute(update(Job).where(Job.id == job_id).values(finished_at=_now(), heartbeat_at=_now(), **values))
+
+
+# -------------------------
+# 워커 풀
+# -------------------------
+class JobRunner:
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, args=(f"{self.worker_prefix}#{i}",),
+                                 name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _loop(self, worker_id: str):
+        last_reap = 0.0
+        while not self._stop.is_set():
+            try:
+                if worker_id.endswith("#0") and time.monotonic() - last_reap > 60:
+                    last_reap = time.monotonic()
+                    _requeue_stale()
+                job_id = _claim_next(worker_id)
+            except Exception as e:
+                log.warning("job claim failed: %s", e)
+                job_id = None
+            if job_id is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            run_job(job_id)
+
+
+_runner: Optional[JobRunner] = None
+
+
+def start_runner(workers: int = JOB_WORKERS) -> JobRunner:
+    """프로세스당 1개 러너 시작 (중복 호출 시 기존 러너 반환)"""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(workers).start()
+    return _runner
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    import app  # 핸들러 등록 (import 만으로는 러너가 뜨지 않음)
+    runner = app.start_background()
+    print(f"✅ job worker 시작 ({runner.workers} threads, {runner.worker_prefix})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        runner.stop()
@@ -0,0 +1,270 @@
+# metrics.py — Prometheus 텍스트 형식 지표 (외부 의존성 없음)
+# GET /api/metrics 로 노출. 카운터/히스토그램은 프로세스 메모리에 쌓이고, gunicorn 처럼 워커가 여러 개면
+# METRICS_DIR 를 지정해 각 워커가 자기 값을 파일로 남기고 조회 시 합산한다.
+# 게이지(@collector)는 파일로 공유되지 않고 조회를 받은 워커에서만 계산된다. pid 라벨은 그 워커를 가리킬 뿐
+# 다른 워커의 게이지는 나오지 않는다 (스크레이프마다 다른 워커가 응답할 수 있음).
+from __future__ import annotations
+import bisect
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+# 이 시간 동안 갱신이 없는 워커 파일은 죽은 워커로 보고 무시
+METRICS_STALE_SEC = float(os.environ.get("METRICS_STALE_SEC", "300"))
+METRICS_FLUSH_SEC = float(os.environ.get("METRICS_FLUSH_SEC", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[dict]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help, self.type = name, help, "counter"
+        self.values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"values": [[list(map(list, k)), v] for k, v in self.values.items()]}
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.type = name, help, "histogram"
+        self.buckets = tuple(buckets)
+        # label → [버킷별 개수..., +Inf 개수, 합계]
+        self.values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"values": [[list(map(list, k)), list(v)] for k, v in self.values.items()]}
+
+
+class _Timer:
+    def __init__(self, hist: Histogram, labels: dict):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.started, **self.labels)
+
+
+_registry: Dict[str, object] = {}
+_collectors: List[Callable[[], Iterable[Tuple[str, str, dict, float]]]] = []
+
+
+def counter(name: str, help: str) -> Counter:
+    return _registry.setdefault(name, Counter(name, help))
+
+
+def histogram(name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+    return _registry.setdefault(name, Histogram(name, help, buckets))
+
+
+def collector(fn: Callable[[], Iterable[Tuple[str, str, dict, float]]]):
+    """조회 시점 게이지: fn() 이 (이름, 설명, 라벨, 값) 들을 돌려준다"""
+    _collectors.append(fn)
+    return fn
+
+
+# -------------------------
+# 공용 지표
+# -------------------------
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency by route")
+DB_QUERIES = counter("db_queries_total", "SQL statements executed")
+DB_QUERY_TIME = histogram("db_query_duration_seconds", "SQL statement latency")
+DB_PER_REQUEST = histogram("db_queries_per_request", "SQL statements per HTTP request", COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = histogram("db_time_per_request_seconds", "Total SQL time per HTTP request")
+POOL_WAIT = histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection",
+                      (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+RPC_LATENCY = histogram("rpc_request_duration_seconds", "JSON-RPC HTTP round trip by method ('batch' for batches)")
+RPC_CALLS = counter("rpc_calls_total", "JSON-RPC calls by method (batched calls counted individually)")
+RPC_ERRORS = counter("rpc_errors_total", "JSON-RPC failures by method")
+QR_RENDER = histogram("qr_render_seconds", "QR image render time (cache misses only)")
+CSV_ROWS = counter("csv_import_rows_total", "CSV import rows by result")
+CSV_SECONDS = counter("csv_import_seconds_total", "Wall time spent in CSV imports")
+
+# 요청 단위 DB 누적 (스레드/코루틴마다 따로)
+_request_db: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar("request_db", default=None)
+
+
+def start_request():
+    _request_db.set([0, 0.0])
+
+
+def record_query(elapsed: float, engine: str):
+    DB_QUERIES.inc(engine=engine)
+    DB_QUERY_TIME.observe(elapsed, engine=engine)
+    acc = _request_db.get()
+    if acc is not None:
+        acc[0] += 1
+        acc[1] += elapsed
+
+
+def finish_request(route: str, method: str, status: int, elapsed: float):
+    HTTP_LATENCY.observe(elapsed, route=route, method=method, status=status)
+    acc = _request_db.get()
+    if acc is not None:
+        DB_PER_REQUEST.observe(acc[0], route=route)
+        DB_TIME_PER_REQUEST.observe(acc[1], route=route)
+        _request_db.set(None)
+
+
+def install_sqlalchemy_hooks(engine, name: str):
+    """엔진별 쿼리 수/시간 (before/after_cursor_execute)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        record_query(time.perf_counter() - started, name)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        stack = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+# -------------------------
+# 출력
+# -------------------------
+def _snapshot() -> dict:
+    return {name: {"type": m.type, "help": m.help, "buckets": list(getattr(m, "buckets", ())), **m.snapshot()}
+            for name, m in _registry.items()}
+
+
+def flush_to_dir():
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _merged() -> dict:
+    if not METRICS_DIR:
+        return _snapshot()
+    flush_to_dir()
+    merged: dict = {}
+    now = time.time()
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        if now - os.path.getmtime(path) > METRICS_STALE_SEC:
+            continue
+        try:
+            with open(path) as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, m in snap.items():
+            target = merged.setdefault(name, {**m, "values": []})
+            index = {tuple(map(tuple, k)): v for k, v in target["values"]}
+            for k, v in m["values"]:
+                k = tuple(map(tuple, k))
+                if k not in index:
+                    index[k] = v
+                elif isinstance(v, list):
+                    index[k] = [a + b for a, b in zip(index[k], v)]
+                else:
+                    index[k] += v
+            target["values"] = [[list(map(list, k)), v] for k, v in index.items()]
+    return merged
+
+
+def _fmt_labels(pairs, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [tuple(p) for p in pairs] + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                          for k, v in pairs) + "}"
+
+
+def render() -> str:
+    lines = []
+    for name, m in sorted(_merged().items()):
+        lines.append(f"# HELP {name} {m['help']}")
+        lines.append(f"# TYPE {name} {m['type']}")
+        for labels, v in m["values"]:
+            if m["type"] == "counter":
+                lines.append(f"{name}{_fmt_labels(labels)} {v}")
+                continue
+            cumulative = 0
+            for bound, n in zip(m["buckets"] + ["+Inf"], v[:-1]):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', str(bound)))} {cumulative}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {v[-1]}")
+    seen = set()
+    pid = str(os.getpid())
+    for fn in _collectors:
+        try:
+            samples = list(fn())
+        except Exception:
+            continue
+        for name, help, labels, value in samples:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_fmt_labels(_labels(labels), ('pid', pid))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_flusher: Optional[threading.Thread] = None
+
+
+def start_flusher():
+    """METRICS_DIR 사용 시 주기적으로 자기 값을 파일에 기록 (조회가 다른 워커로 가도 반영되도록)"""
+    global _flusher
+    if not METRICS_DIR or _flusher is not None:
+        return
+
+    def loop():
+        while True:
+            time.sleep(METRICS_FLUSH_SEC)
+            try:
+                flush_to_dir()
+            except OSError:
+                pass
+    _flusher = threading.Thread(target=loop, name="metrics-flush", daemon=True)
+    _flusher.start()
@@ -0,0 +1,82 @@
+# pagination.py — (created_at, id) 기준 keyset(커서) 페이지네이션
+# 최신순 정렬. 다음 페이지 커서는 응답 헤더 X-Next-Cursor 로 전달한다.
+from __future__ import annotations
+import base64
+import datetime
+import json
+from typing import Optional, Tuple
+
+from flask import request
+from sqlalchemy import String, and_, literal, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, row_id: int) -> str:
+    if isinstance(created_at, datetime.datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def page_args() -> Tuple[Optional[Tuple[datetime.datetime, int]], int]:
+    """?cursor=&limit= 파싱. 잘못된 커서는 ValueError"""
+    return parse_page_args(request.args)
+
+
+def parse_page_args(args) -> Tuple[Optional[Tuple[datetime.datetime, int]], int]:
+    """page_args 의 프레임워크 무관 버전 (args: 쿼리 파라미터 매핑)"""
+    try:
+        limit = int(args.get("limit") or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = args.get("cursor")
+    return (decode_cursor(cursor) if cursor else None), limit
+
+
+def _second_bounds(s, created_at: datetime.datetime):
+    """커서 시각이 속한 1초 구간 [start, end). TIMESTAMP 는 초 단위이고 sqlite 는 문자열로 저장한다
+    (CURRENT_TIMESTAMP 는 'YYYY-MM-DD HH:MM:SS', ORM 이 넣은 값은 '.ffffff' 까지). datetime 을 그대로
+    바인딩해 같음 비교를 하면 형식이 달라 커서가 멈추므로, 같은 초는 구간으로 비교한다"""
+    start = created_at.replace(microsecond=0)
+    end = start + datetime.timedelta(seconds=1)
+    if s.get_bind().dialect.name == "sqlite":
+        return tuple(literal(v.strftime("%Y-%m-%d %H:%M:%S"), String) for v in (start, end))
+    return start, end
+
+
+def keyset_page(s, stmt, created_col, id_col, cursor, limit: int):
+    """stmt 에 커서 조건/정렬/limit 적용 후 (rows, next_cursor) 반환.
+
+    stmt 는 created_col, id_col 을 포함한 컬럼 select 여야 하고, 인덱스가
+    (필터 컬럼, created_at) 순이면 커서 깊이와 무관하게 범위 스캔만 한다.
+    """
+    if cursor:
+        created_at, row_id = cursor
+        start, end = _second_bounds(s, created_at)
+        stmt = stmt.where(or_(created_col < start,
+                              and_(created_col >= start, created_col < end, id_col < row_id)))
+    rows = s.execute(stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last[created_col.key], last[id_col.key])
+    return rows, next_cursor
+
+
+def paged_response(resp, next_cursor: Optional[str]):
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
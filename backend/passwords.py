@@ -0,0 +1,161 @@
+# passwords.py — 비밀번호 해시를 요청 스레드 밖(제한된 전용 풀)에서 계산 + 이메일/IP 별 로그인 속도 제한
+# PBKDF2/scrypt 는 한 번에 수십~수백 ms CPU 를 쓰므로 /api/login 에 몰리면 워커 스레드가 전부 해시 계산에 묶인다.
+#  - 해시 계산은 PASSWORD_HASH_WORKERS 개 스레드에서만 (hashlib 은 계산 중 GIL 을 놓으므로 다른 요청은 계속 처리됨)
+#  - 계산 중 + 대기 중인 작업이 PASSWORD_QUEUE_MAX 를 넘으면 바로 503 (대기열이 요청 스레드를 잡아먹지 않도록)
+#  - 이메일/IP 별 토큰 버킷을 해시 계산 전에 확인해서 크리덴셜 스터핑은 DB 조회/해시 없이 429
+#  - 저장된 해시의 방식/반복 횟수가 PASSWORD_HASH_METHOD 와 다르면 로그인 성공 시 새 방식으로 다시 저장
+# 버킷은 프로세스 로컬 (gunicorn 워커가 여럿이면 워커 수만큼 느슨해짐).
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Callable, Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import metrics
+from cache import TTLCache
+
+log = logging.getLogger("passwords")
+
+# werkzeug 형식 "scrypt:<n>:<r>:<p>" 또는 "pbkdf2:sha256:<반복>". 기본값은 werkzeug 기본(scrypt)과 같은 파라미터라
+# 기존 해시가 다시 계산되지 않는다. 바꾸면 기존 사용자는 다음 로그인 때 갱신됨
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# 계산 중 + 대기 중 해시 작업 상한 (넘으면 503)
+PASSWORD_QUEUE_MAX = int(os.getenv("PASSWORD_QUEUE_MAX", str(PASSWORD_HASH_WORKERS * 2)))
+PASSWORD_WAIT_TIMEOUT = float(os.getenv("PASSWORD_WAIT_TIMEOUT", "5"))
+
+# 토큰 버킷: 분당 보충 개수 / 최대 적립 (0 이면 해당 제한 끔)
+LOGIN_EMAIL_RATE = float(os.getenv("LOGIN_EMAIL_RATE", "5"))
+LOGIN_EMAIL_BURST = float(os.getenv("LOGIN_EMAIL_BURST", "10"))
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "30"))
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "60"))
+# 기억할 이메일/IP 수 (LRU, 넘치면 오래된 것부터 잊음 = 새 버킷)
+LOGIN_THROTTLE_KEYS = int(os.getenv("LOGIN_THROTTLE_KEYS", "100000"))
+
+HASH_SECONDS = metrics.histogram("password_hash_seconds", "Password hash/verify compute time")
+HASH_REJECTED = metrics.counter("password_hash_rejected_total", "Hash jobs rejected by admission control")
+THROTTLED = metrics.counter("login_throttled_total", "Login/register attempts rejected by rate limit")
+
+
+class PasswordError(Exception):
+    """status 429(속도 제한) / 503(해시 풀 혼잡). retry_after 는 Retry-After 헤더용 초"""
+
+    def __init__(self, message: str, status: int, retry_after: float = 1.0):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """키별 토큰 버킷. take() 는 통과면 0, 아니면 다음 토큰까지 남은 초를 돌려준다"""
+
+    def __init__(self, per_minute: float, burst: float, maxsize: int = LOGIN_THROTTLE_KEYS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._buckets = TTLCache(maxsize=maxsize, ttl=None)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        if self.rate <= 0 or not key:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (self.burst, now)
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < cost:
+                self._buckets.set(key, (tokens, now))
+                return (cost - tokens) / self.rate
+            self._buckets.set(key, (tokens - cost, now))
+            return 0.0
+
+
+_email_bucket = TokenBucket(LOGIN_EMAIL_RATE, LOGIN_EMAIL_BURST)
+_ip_bucket = TokenBucket(LOGIN_IP_RATE, LOGIN_IP_BURST)
+
+
+def throttle(ip: Optional[str], email: Optional[str] = None):
+    """해시/DB 작업 전에 호출. 제한에 걸리면 PasswordError(429)"""
+    for scope, bucket, key in (("ip", _ip_bucket, ip), ("email", _email_bucket, (email or "").strip().lower())):
+        wait = bucket.take(key)
+        if wait:
+            THROTTLED.inc(scope=scope)
+            raise PasswordError("too many attempts, retry later", 429, wait)
+
+
+class HashPool:
+    """해시 전용 스레드 풀 + 입장 제한"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_max: int = PASSWORD_QUEUE_MAX):
+        self.workers = workers
+        self.queue_max = queue_max
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(queue_max)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def run(self, op: str, fn: Callable, *args, timeout: float = PASSWORD_WAIT_TIMEOUT):
+        if not self._slots.acquire(blocking=False):
+            HASH_REJECTED.inc(op=op)
+            raise PasswordError("server busy, retry later", 503)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="pwhash")
+            self.in_flight += 1
+        try:
+            fut = self._executor.submit(self._timed, op, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(lambda _: self._release())
+        try:
+            return fut.result(timeout=timeout)
+        except FuturesTimeout:
+            # 계산은 끝까지 돌고 슬롯은 그때 풀린다. 요청 스레드만 먼저 돌려보냄
+            raise PasswordError("server busy, retry later", 503)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _timed(op: str, fn: Callable, *args):
+        with HASH_SECONDS.time(op=op):
+            return fn(*args)
+
+
+_pool = HashPool()
+
+
+@metrics.collector
+def _pool_gauges():
+    yield "password_hash_in_flight", "Hash jobs running or queued", {}, _pool.in_flight
+
+
+def hash_password(password: str) -> str:
+    return _pool.run("hash", generate_password_hash, password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+
+
+def needs_rehash(stored: str) -> bool:
+    """저장된 해시의 방식/파라미터(예: pbkdf2:sha256:260000)가 현재 설정과 다른지"""
+    method, _, rest = stored.partition("$")
+    salt = rest.partition("$")[0]
+    return method != PASSWORD_HASH_METHOD or len(salt) < PASSWORD_SALT_LENGTH
+
+
+def _verify(stored: str, password: str) -> Tuple[bool, Optional[str]]:
+    if not check_password_hash(stored, password):
+        return False, None
+    if needs_rehash(stored):
+        return True, generate_password_hash(password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+    return True, None
+
+
+def verify_password(stored: str, password: str) -> Tuple[bool, Optional[str]]:
+    """(일치 여부, 새 해시). 새 해시가 있으면 호출자가 저장한다 (같은 작업 안에서 계산하므로 풀 입장 1번)"""
+    return _pool.run("verify", _verify, stored, password)
@@ -0,0 +1,296 @@
+# push.py — 이벤트별 실시간 알림 (Server-Sent Events): 응모자 수, 상태/VRF 진행, 당첨자 발표
+# 화면마다 setInterval 로 폴링하던 것을 대체한다. 프로세스당 생산자 스레드 하나가 PUSH_INTERVAL 마다
+# 구독자가 있는 이벤트들만 한 번에 조회(events + event_stats + winners 집계)해서 바뀐 값만 구독자에게 보낸다.
+# → DB 부하는 구독자 수가 아니라 지켜보는 이벤트 수에 비례하고, 응모가 몰려도 이벤트당 초당 1/PUSH_INTERVAL 번만 갱신.
+# 다른 워커/프로세스가 쓴 값도 DB 에서 읽으므로 그대로 반영된다.
+#
+# 구독자 우편함은 종류(kind)별 최신 값만 들고 있어서, 느린 클라이언트가 있어도 큐가 쌓이지 않는다 (중간 값은 건너뜀).
+# 대규모 시청(수천 연결)은 ASGI 모드(asgi.py, 기본 배포)에서 연결당 코루틴으로 받는다. Flask 모드는 연결당 스레드를
+# 점유하므로 PUSH_MAX_THREAD_STREAMS 개까지만 받고 넘으면 503 (API 요청이 쓸 스레드를 남겨 둠).
+from __future__ import annotations
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import func, select
+
+import metrics
+from models import read_session_scope, Entry, Event, EventStats, Prize, Winner
+
+log = logging.getLogger("push")
+
+PUSH_INTERVAL = float(os.getenv("PUSH_INTERVAL", "0.5"))
+# 연결 유지용 주석 전송 간격 (프록시 유휴 타임아웃보다 짧게)
+PUSH_HEARTBEAT = float(os.getenv("PUSH_HEARTBEAT", "15"))
+# 당첨자 발표에 싣는 최대 인원 (나머지는 count 로만)
+PUSH_WINNERS_LIMIT = int(os.getenv("PUSH_WINNERS_LIMIT", "100"))
+# 클라이언트 재연결 대기(ms), SSE retry 필드
+PUSH_RETRY_MS = int(os.getenv("PUSH_RETRY_MS", "3000"))
+# 프로세스당 동시 스트림 상한. Flask(연결당 스레드)는 gunicorn --threads 보다 작게, ASGI 는 연결당 코루틴
+PUSH_MAX_THREAD_STREAMS = int(os.getenv("PUSH_MAX_THREAD_STREAMS", "4"))
+PUSH_MAX_STREAMS = int(os.getenv("PUSH_MAX_STREAMS", "5000"))
+# 상한에 걸렸을 때 Retry-After (초)
+PUSH_BUSY_RETRY = int(os.getenv("PUSH_BUSY_RETRY", "30"))
+
+STREAMS_REJECTED = metrics.counter("push_streams_rejected_total", "Event streams refused by the per-process cap")
+
+
+class Subscription:
+    """구독자 1명의 우편함. wake 는 새 값이 들어왔을 때 호출 (스레드 Event.set / 이벤트 루프 call_soon_threadsafe)"""
+
+    def __init__(self, event_id: int, wake: Callable[[], None]):
+        self.event_id = event_id
+        self._wake = wake
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def offer(self, kind: str, data: dict):
+        with self._lock:
+            self._pending[kind] = data
+        self._wake()
+
+    def drain(self) -> Dict[str, dict]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+
+class Broker:
+    def __init__(self, interval: float = PUSH_INTERVAL):
+        self.interval = interval
+        self._subs: Dict[int, Set[Subscription]] = {}
+        self._last: Dict[int, Dict[str, dict]] = {}  # 이벤트별 마지막으로 보낸 값
+        self._winner_marks: Dict[int, tuple] = {}  # 이벤트별 (당첨자 수, 마지막 id)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.ticks = 0
+        self.published = 0
+
+    def subscribe(self, event_id: int, wake: Callable[[], None]) -> Subscription:
+        sub = Subscription(event_id, wake)
+        with self._lock:
+            self._subs.setdefault(event_id, set()).add(sub)
+            last = dict(self._last.get(event_id, {}))
+        # 이미 알고 있는 현재 상태는 바로 전달 (모르면 다음 틱에 전달됨)
+        for kind, data in last.items():
+            sub.offer(kind, data)
+        self.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.event_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.event_id]
+                    self._last.pop(sub.event_id, None)
+                    self._winner_marks.pop(sub.event_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+    def publish(self, event_id: int, kind: str, data: dict):
+        with self._lock:
+            self._last.setdefault(event_id, {})[kind] = data
+            subs = list(self._subs.get(event_id, ()))
+        for sub in subs:
+            sub.offer(kind, data)
+        self.published += 1
+
+    def start(self) -> "Broker":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="push-producer", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            with self._lock:
+                watched = list(self._subs)
+            if watched:
+                try:
+                    self.tick(watched)
+                except Exception as e:
+                    log.warning("push tick failed: %s", e)
+            time.sleep(max(self.interval - (time.monotonic() - started), 0.05))
+
+    def tick(self, event_ids: List[int]):
+        """지켜보는 이벤트들의 현재 값을 읽어 바뀐 종류만 발행 (이벤트 수와 무관하게 쿼리 2~3번)"""
+        self.ticks += 1
+        with read_session_scope() as s:
+            rows = s.execute(
+                select(Event.id, Event.status, Event.participant_cap, Event.randomness_request_id,
+                       Event.randomness_requested_at, Event.randomness_fulfilled_at,
+                       EventStats.entries_total, EventStats.entries_valid)
+                .outerjoin(EventStats, EventStats.event_id == Event.id)
+                .where(Event.id.in_(event_ids))
+            ).all()
+            winner_marks = dict(
+                (r.event_id, (r.count, r.last_id)) for r in s.execute(
+                    select(Winner.event_id, func.count().label("count"), func.max(Winner.id).label("last_id"))
+                    .where(Winner.event_id.in_(event_ids))  # idx_winners_event
+                    .group_by(Winner.event_id)
+                )
+            )
+            for r in rows:
+                mark = winner_marks.get(r.id, (0, None))
+                current = {
+                    "entries": {"count": r.entries_total or 0, "valid": r.entries_valid or 0,
+                                "cap": r.participant_cap},
+                    "state": {"status": r.status.value, "vrf": _vrf_phase(r)},
+                }
+                with self._lock:
+                    last = dict(self._last.get(r.id, {}))
+                for kind, data in current.items():
+                    if last.get(kind) != data:
+                        self.publish(r.id, kind, data)
+                # 당첨자 목록은 추첨(재추첨 포함)으로 바뀐 경우에만 조회
+                with self._lock:
+                    changed = self._winner_marks.get(r.id) != mark
+                    self._winner_marks[r.id] = mark
+                if changed and mark[0]:
+                    self.publish(r.id, "winners", _winners(s, r.id, mark[0]))
+
+
+def _vrf_phase(row) -> Optional[str]:
+    if row.randomness_fulfilled_at:
+        return "fulfilled"
+    if row.randomness_request_id or row.randomness_requested_at:
+        return "requested"
+    return None
+
+
+def _mask_wallet(wallet: Optional[str]) -> Optional[str]:
+    return f"{wallet[:6]}…{wallet[-4:]}" if wallet else None
+
+
+def _winners(s, event_id: int, count: int) -> dict:
+    rows = s.execute(
+        select(Winner.prize_id, Prize.name.label("prize_name"), Entry.nickname, Entry.wallet_address)
+        .join(Prize, Prize.id == Winner.prize_id)
+        .join(Entry, Entry.id == Winner.entry_id)
+        .where(Winner.event_id == event_id)
+        .order_by(Winner.id)
+        .limit(PUSH_WINNERS_LIMIT)
+    ).all()
+    # 공개 스트림이므로 이메일은 싣지 않고 지갑 주소는 일부만
+    return {
+        "count": count,
+        "winners": [{"prize_id": r.prize_id, "prize_name": r.prize_name, "nickname": r.nickname,
+                     "wallet": _mask_wallet(r.wallet_address)} for r in rows],
+    }
+
+
+class StreamSlots:
+    """프로세스당 동시 스트림 수 제한. acquire() 는 반환된 release(여러 번 불러도 한 번만 반영) 또는 None"""
+
+    def __init__(self, limit: int, mode: str):
+        self.limit = limit
+        self.mode = mode
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[Callable[[], None]]:
+        with self._lock:
+            if self.open >= self.limit:
+                STREAMS_REJECTED.inc(mode=self.mode)
+                return None
+            self.open += 1
+        released = []
+
+        def release():
+            with self._lock:
+                if not released:
+                    released.append(True)
+                    self.open -= 1
+        return release
+
+
+thread_slots = StreamSlots(PUSH_MAX_THREAD_STREAMS, "thread")
+async_slots = StreamSlots(PUSH_MAX_STREAMS, "async")
+
+
+def format_sse(kind: str, data: dict) -> str:
+    return f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+_broker: Optional[Broker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = Broker()
+    return _broker
+
+
+def event_exists(event_id: int) -> bool:
+    with read_session_scope() as s:
+        return s.execute(select(Event.id).where(Event.id == event_id)).first() is not None
+
+
+@metrics.collector
+def _push_gauges():
+    if _broker is not None:
+        yield "push_subscribers", "Open event stream connections", {}, _broker.subscriber_count()
+        yield "push_published", "Updates published since process start", {}, _broker.published
+    for slots in (thread_slots, async_slots):
+        yield "push_streams_open", "Event streams holding a slot", {"mode": slots.mode}, slots.open
+
+
+def stream(event_id: int, release: Callable[[], None] = lambda: None):
+    """Flask 용 동기 SSE 제너레이터 (연결당 스레드 1개를 잡고 있음). release 는 thread_slots.acquire() 결과"""
+    ready = threading.Event()
+    broker = get_broker()
+    sub = broker.subscribe(event_id, ready.set)
+    try:
+        yield f"retry: {PUSH_RETRY_MS}\n\n"
+        while True:
+            if not ready.wait(PUSH_HEARTBEAT):
+                yield ": ping\n\n"
+                continue
+            ready.clear()
+            for kind, data in sub.drain().items():
+                yield format_sse(kind, data)
+    finally:
+        broker.unsubscribe(sub)
+        release()
+
+
+async def astream(event_id: int, release: Callable[[], None] = lambda: None):
+    """ASGI 용 SSE 제너레이터 (연결당 코루틴). release 는 async_slots.acquire() 결과"""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    broker = get_broker()
+    sub = broker.subscribe(event_id, lambda: loop.call_soon_threadsafe(ready.set))
+    try:
+        yield f"retry: {PUSH_RETRY_MS}\n\n"
+        while True:
+            try:
+                await asyncio.wait_for(ready.wait(), PUSH_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            ready.clear()
+            for kind, data in sub.drain().items():
+                yield format_sse(kind, data)
+    finally:
+        broker.unsubscribe(sub)
+        release()
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx 가 모았다가 보내지 않도록
+}
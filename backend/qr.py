@@ -0,0 +1,159 @@
+# qr.py — 이벤트 응모 QR 렌더링 + 내용 주소 기반 캐시 (메모리 LRU → 디스크)
+from __future__ import annotations
+import hashlib
+import io
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+import metrics
+from cache import TTLCache
+
+ENTRY_PAGE_URL = os.environ.get('ENTRY_PAGE_URL', 'http://localhost/mobile')
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', '512'))
+# 비우면 디스크 캐시 사용 안 함
+QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR', '')
+# 디스크 캐시 파일 수 상한. 넘으면 오래 안 쓰인(mtime) 파일부터 지움. 0 이면 무제한
+QR_DISK_MAX_FILES = int(os.environ.get('QR_DISK_MAX_FILES', '20000'))
+# 디스크에 새 파일을 이만큼 쓸 때마다 한 번 정리 (매번 디렉터리를 훑지 않도록)
+QR_DISK_PRUNE_EVERY = int(os.environ.get('QR_DISK_PRUNE_EVERY', '256'))
+QR_DEFAULT_SIZE = 10  # qrcode box_size (모듈 1칸의 픽셀 수)
+QR_MAX_SIZE = 40
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+log = logging.getLogger("qr")
+
+_memory = TTLCache(QR_CACHE_SIZE, ttl=None)
+# 존재가 확인된 이벤트 id (이벤트는 삭제되지 않으므로 만료 없음)
+_known_events = TTLCache(QR_CACHE_SIZE * 8, ttl=None)
+_disk_lock = threading.Lock()
+_disk_writes = 0
+
+
+def entry_url(event_id: int) -> str:
+    return f"{ENTRY_PAGE_URL}?event_id={event_id}"
+
+
+def clamp_size(size) -> int:
+    return max(1, min(int(size), QR_MAX_SIZE))
+
+
+def event_exists(event_id: int) -> bool:
+    """없는 이벤트 id 로 렌더링/디스크 캐시가 늘어나지 않도록 라우트에서 먼저 확인"""
+    if _known_events.get(event_id):
+        return True
+    from models import read_session_scope, Event
+    from sqlalchemy import select
+    with read_session_scope() as s:
+        found = s.execute(select(Event.id).where(Event.id == event_id)).first() is not None
+    if found:
+        _known_events.set(event_id, True)
+    return found
+
+
+def cache_key(event_id: int, size: int = QR_DEFAULT_SIZE, fmt: str = 'png') -> str:
+    """(ENTRY_PAGE_URL, event_id, size, format) 의 digest. ETag 로도 사용 (렌더링 없이 계산 가능)"""
+    raw = f"{ENTRY_PAGE_URL}|{event_id}|{size}|{fmt}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _render(event_id: int, size: int, fmt: str) -> bytes:
+    import qrcode  # PIL 까지 끌고 오므로 실제 렌더링 시점에 import
+    buf = io.BytesIO()
+    with metrics.QR_RENDER.time(format=fmt):
+        if fmt == 'svg':
+            import qrcode.image.svg
+            img = qrcode.make(entry_url(event_id), box_size=size, image_factory=qrcode.image.svg.SvgPathImage)
+            img.save(buf)
+        else:
+            img = qrcode.make(entry_url(event_id), box_size=size)
+            img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _disk_path(key: str, fmt: str) -> Optional[str]:
+    if not QR_CACHE_DIR:
+        return None
+    return os.path.join(QR_CACHE_DIR, key[:2], f"{key}.{fmt}")
+
+
+def prune_disk(max_files: int = QR_DISK_MAX_FILES) -> int:
+    """디스크 캐시가 max_files 를 넘으면 mtime 이 오래된 것부터 지운다. 지운 개수 반환"""
+    if not QR_CACHE_DIR or max_files <= 0:
+        return 0
+    files = []
+    for root, _, names in os.walk(QR_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                files.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue  # 다른 워커가 먼저 지움
+    excess = len(files) - max_files
+    if excess <= 0:
+        return 0
+    files.sort()
+    removed = 0
+    for _, path in files[:excess]:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    log.info("qr disk cache pruned %d files", removed)
+    return removed
+
+
+def _wrote_disk():
+    global _disk_writes
+    with _disk_lock:
+        _disk_writes += 1
+        due = QR_DISK_PRUNE_EVERY > 0 and _disk_writes % QR_DISK_PRUNE_EVERY == 0
+    if due:
+        prune_disk()
+
+
+def get_qr(event_id: int, size: int = QR_DEFAULT_SIZE, fmt: str = 'png') -> Tuple[bytes, str]:
+    """(이미지 바이트, etag) 반환. 메모리 → 디스크 → 렌더링 순으로 조회"""
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported format: {fmt}")
+    size = clamp_size(size)
+    key = cache_key(event_id, size, fmt)
+    data = _memory.get(key)
+    if data is not None:
+        return data, key
+
+    path = _disk_path(key, fmt)
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            os.utime(path)  # 정리 순서를 최근 사용 기준으로
+        except OSError:
+            pass
+    else:
+        data = _render(event_id, size, fmt)
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)  # 다른 워커와 경쟁해도 항상 완전한 파일만 보이게
+            _wrote_disk()
+    _memory.set(key, data)
+    return data, key
+
+
+def prerender(event_id: int):
+    """이벤트 생성 직후 기본 크기 PNG/SVG 를 미리 캐시"""
+    for fmt in FORMATS:
+        get_qr(event_id, QR_DEFAULT_SIZE, fmt)
+
+
+def cache_stats() -> dict:
+    return _memory.stats()
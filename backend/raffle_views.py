@@ -0,0 +1,59 @@
+# raffle_views.py — 컨트랙트 view 호출 읽기 캐시 (짧은 TTL + 동시 요청 합치기)
+# 무효화는 TTL 만으로 한다: 인덱서/영수증 폴러는 chain-sync 프로세스에서 돌아 API 워커의 캐시를
+# 비울 수 없으므로, 체인 상태 변화는 최대 VIEW_CACHE_TTL 초 늦게 보인다 (블록 주기 수준으로 짧게 유지).
+from __future__ import annotations
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+from eth_utils import keccak
+
+import chain
+from cache import ReadThroughCache
+
+CONTRACT_ADDRESS = os.environ.get("CONTRACT_ADDRESS")
+VIEW_CACHE_TTL = float(os.environ.get("VIEW_CACHE_TTL", "2"))
+
+VIEWS = ("raffleId", "entrantsCount", "winnersCount", "phase")
+SELECTORS = {name: "0x" + keccak(text=f"{name}()")[:4].hex() for name in VIEWS}
+PHASES = ("Enter", "Locked", "Requested", "Drawn")  # SponsoredRaffle.Phase
+
+_cache = ReadThroughCache(maxsize=256, ttl=VIEW_CACHE_TTL)
+
+
+def _calls(contract: str) -> list:
+    return [("eth_call", [{"to": contract, "data": SELECTORS[name]}, "latest"]) for name in VIEWS]
+
+
+def _decode(results) -> dict:
+    state = {name: int(r, 16) for name, r in zip(VIEWS, results)}
+    state["phaseName"] = PHASES[state["phase"]] if state["phase"] < len(PHASES) else str(state["phase"])
+    return state
+
+
+def _contract_key(contract: Optional[str]) -> str:
+    contract = (contract or CONTRACT_ADDRESS or "").lower()
+    if not contract:
+        raise chain.RpcError("contract not configured")
+    return contract
+
+
+def raffle_state(contract: Optional[str] = None) -> dict:
+    """raffleId / entrantsCount / winnersCount / phase (eth_call 4개를 배치 1회로)"""
+    contract = _contract_key(contract)
+    return _cache.get_or_load(contract, lambda: _decode(chain.get_client().batch(_calls(contract))))
+
+
+async def araffle_state(call: Callable[[str, list], Awaitable], contract: Optional[str] = None) -> dict:
+    """raffle_state 의 async 버전 (asgi.py). call(method, params) 는 결과를 돌려주는 코루틴. 캐시는 공유"""
+    contract = _contract_key(contract)
+
+    async def load():
+        return _decode(await asyncio.gather(*(call(m, p) for m, p in _calls(contract))))
+
+    return await _cache.aget_or_load(contract, load)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
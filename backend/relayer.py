@@ -0,0 +1,454 @@
+# relayer.py — 가스 대납 relayer: 검증된 서명 응모(valid + signature)를 enterWithSig 트랜잭션으로 전송
+# 영수증을 기다리지 않고 스폰서 키(SPONSOR_PRIVATE_KEYS)마다 nonce 를 미리 묶어 예약해 연속 전송(파이프라인)한다.
+#   1) RELAY_BATCH 건씩 읽고, entered(raffleId, user) / nonces(user) 를 JSON-RPC 배치로 한 번에 확인해
+#      이미 응모된 주소·nonce 가 어긋난 서명은 전송하지 않음
+#   2) 스폰서별 in-flight 여유(RELAY_MAX_INFLIGHT - 미확정 건수)만큼 나눠 로컬 서명 → eth_sendRawTransaction 배치 전송
+#   3) tx_logs(record_entry, pending) 다중 행 INSERT. 영수증은 txtracker 폴러가 반영
+#   4) RELAY_STUCK_SEC 넘게 확정되지 않은 트랜잭션은 같은 nonce 로 가스 가격을 올려 교체 (bump_stuck)
+# 중간 전송 실패로 nonce 구멍이 생기면 0 ETH 자기 전송으로 메워 뒤의 트랜잭션이 막히지 않게 한다.
+# 재실행해도 안전: 체인의 entered 가 최종 기준이라, 교체/유실된 트랜잭션이 있어도 중복 응모나 누락이 생기지 않는다.
+# 실행: python relayer.py <event_id>     측정: python bench/bench_relayer.py (Hardhat 노드)
+from __future__ import annotations
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from eth_utils import keccak, to_checksum_address
+from sqlalchemy import and_, exists, func, select, update
+
+import chain
+import metrics
+import txtracker
+from models import session_scope, ChainNonce, Entry, EntryStatus, Event, Signature, TxLog, TxStatus, TxType
+
+log = logging.getLogger("relayer")
+
+CONTRACT_ADDRESS = os.environ.get("CONTRACT_ADDRESS")
+# 쉼표로 여러 개. 없으면 PRIVATE_KEY 하나로 전송
+SPONSOR_PRIVATE_KEYS = [k.strip() for k in (os.environ.get("SPONSOR_PRIVATE_KEYS")
+                                            or os.environ.get("PRIVATE_KEY") or "").split(",") if k.strip()]
+RELAY_BATCH = int(os.environ.get("RELAY_BATCH", "200"))
+# 노드의 JSON-RPC 배치 크기 제한에 맞춰 나눠 보냄
+RELAY_RPC_BATCH = int(os.environ.get("RELAY_RPC_BATCH", "100"))
+# 스폰서 주소당 동시에 mempool 에 올려 둘 최대 건수 (노드 txpool 계정 한도 이하)
+RELAY_MAX_INFLIGHT = int(os.environ.get("RELAY_MAX_INFLIGHT", "64"))
+RELAY_STUCK_SEC = float(os.environ.get("RELAY_STUCK_SEC", "60"))
+# 교체 시 가스 가격 인상률(%). geth 는 최소 10% 인상이어야 교체를 받아줌
+RELAY_BUMP_PCT = int(os.environ.get("RELAY_BUMP_PCT", "15"))
+RELAY_MAX_GAS_PRICE = int(os.environ.get("RELAY_MAX_GAS_PRICE", "0"))  # wei, 0 이면 상한 없음
+# deadline 이 이 시간(초) 안에 끝나는 서명은 채굴 전에 만료될 수 있으므로 보내지 않음
+RELAY_DEADLINE_MARGIN = int(os.environ.get("RELAY_DEADLINE_MARGIN", "30"))
+RELAY_WAIT_POLL = float(os.environ.get("RELAY_WAIT_POLL", "0.5"))
+
+ENTER_SELECTOR = keccak(text="enterWithSig(address,uint256,uint256,bytes)")[:4]
+ENTERED_SELECTOR = keccak(text="entered(uint256,address)")[:4]
+NONCES_SELECTOR = keccak(text="nonces(address)")[:4]
+
+RELAY_TX = metrics.counter("relayer_transactions_total", "Relayer transactions by result")
+RELAY_SKIPPED = metrics.counter("relayer_skipped_total", "Signed entries not sent, by reason")
+
+
+class RelayError(Exception):
+    pass
+
+
+def _word(value: int) -> bytes:
+    return int(value).to_bytes(32, "big")
+
+
+def _address_word(addr: str) -> bytes:
+    return bytes(12) + bytes.fromhex(addr[2:])
+
+
+def encode_enter(user: str, nonce: int, deadline: int, signature: str) -> str:
+    """enterWithSig(address,uint256,uint256,bytes) calldata.
+    v 가 0/1 인 서명(eth_keys 등)은 27/28 로 바꿔 보낸다 — OpenZeppelin ECDSA 는 27/28 만 받음"""
+    sig = bytes.fromhex(signature[2:] if signature.startswith("0x") else signature)
+    if len(sig) == 65 and sig[64] < 27:
+        sig = sig[:64] + bytes([sig[64] + 27])
+    padded = sig + bytes(-len(sig) % 32)
+    data = (ENTER_SELECTOR + _address_word(user) + _word(nonce) + _word(deadline)
+            + _word(4 * 32) + _word(len(sig)) + padded)
+    return "0x" + data.hex()
+
+
+class Sponsor:
+    def __init__(self, private_key: str):
+        from eth_account import Account
+        self.private_key = private_key
+        self.address = Account.from_key(private_key).address
+
+
+def sponsors(keys: Sequence[str] = SPONSOR_PRIVATE_KEYS) -> List[Sponsor]:
+    return [Sponsor(k) for k in keys]
+
+
+def _sign(sponsor: Sponsor, tx: dict) -> Tuple[str, str]:
+    """(raw tx, tx hash)"""
+    from eth_account import Account
+    signed = Account.sign_transaction({k: v for k, v in tx.items() if k != "from"}, sponsor.private_key)
+    tx_hash = signed.hash.hex()
+    return chain.raw_tx_hex(signed), (tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash)
+
+
+def _batch(client: chain.RpcClient, calls: List[Tuple[str, list]]) -> list:
+    results = []
+    for i in range(0, len(calls), RELAY_RPC_BATCH):
+        results.extend(client.batch(calls[i:i + RELAY_RPC_BATCH], raise_errors=False))
+    return results
+
+
+# -------------------------
+# 대기열 (DB): valid + 서명 있음 + 진행 중/성공한 record_entry 트랜잭션 없음
+# -------------------------
+def _queued(event_id: int, after_id: int, limit: int) -> list:
+    relayed = exists().where(and_(
+        TxLog.entry_id == Entry.id, TxLog.tx_type == TxType.record_entry,
+        TxLog.status.in_((TxStatus.pending, TxStatus.success)),
+    ))
+    with session_scope() as s:
+        return s.execute(
+            select(Entry.id, Signature.message, Signature.signature)
+            .join(Signature, Signature.id == Entry.signature_id)
+            .where(Entry.event_id == event_id, Entry.status == EntryStatus.valid, Entry.id > after_id, ~relayed)
+            .order_by(Entry.id)
+            .limit(limit)
+        ).all()
+
+
+def _parse(rows) -> Tuple[list, int]:
+    items, malformed = [], 0
+    for entry_id, message, signature in rows:
+        try:
+            msg = json.loads(message)
+            items.append({"entry_id": entry_id, "user": to_checksum_address(msg["user"]),
+                          "raffle_id": int(msg["raffleId"]), "nonce": int(msg["nonce"]),
+                          "deadline": int(msg["deadline"]), "signature": signature})
+        except (ValueError, KeyError, TypeError):
+            malformed += 1
+    return items, malformed
+
+
+def screen(items: list, contract: str, client: chain.RpcClient) -> Tuple[list, Dict[str, int]]:
+    """entered / nonces 를 배치로 조회해 보낼 것만 남김. (보낼 목록, 사유별 제외 건수)"""
+    calls = []
+    for it in items:
+        calls.append(("eth_call", [{"to": contract, "data": "0x" + (
+            ENTERED_SELECTOR + _word(it["raffle_id"]) + _address_word(it["user"])).hex()}, "latest"]))
+        calls.append(("eth_call", [{"to": contract, "data": "0x" + (
+            NONCES_SELECTOR + _address_word(it["user"])).hex()}, "latest"]))
+    results = _batch(client, calls)
+    keep, skipped = [], {"already_entered": 0, "stale_nonce": 0, "expired": 0, "rpc_error": 0}
+    cutoff = int(time.time()) + RELAY_DEADLINE_MARGIN
+    for i, it in enumerate(items):
+        entered, nonce = results[2 * i], results[2 * i + 1]
+        if isinstance(entered, Exception) or isinstance(nonce, Exception):
+            reason = "rpc_error"
+        elif int(entered, 16):
+            reason = "already_entered"
+        elif int(nonce, 16) != it["nonce"]:
+            reason = "stale_nonce"
+        elif it["deadline"] < cutoff:
+            reason = "expired"
+        else:
+            keep.append(it)
+            continue
+        skipped[reason] += 1
+        RELAY_SKIPPED.inc(reason=reason)
+    return keep, skipped
+
+
+# -------------------------
+# 전송
+# -------------------------
+def _inflight(sponsor_list: List[Sponsor], client: chain.RpcClient) -> Dict[str, int]:
+    """스폰서별 미확정 건수 = 예약된 다음 nonce - 채굴된 nonce 수"""
+    mined = _batch(client, [("eth_getTransactionCount", [sp.address, "latest"]) for sp in sponsor_list])
+    with session_scope() as s:
+        reserved = dict(s.execute(
+            select(ChainNonce.address, ChainNonce.next_nonce)
+            .where(ChainNonce.address.in_([sp.address for sp in sponsor_list]))
+        ).all())
+    out = {}
+    for sp, m in zip(sponsor_list, mined):
+        if isinstance(m, Exception):
+            out[sp.address] = RELAY_MAX_INFLIGHT  # 모르면 이번 회차는 건너뜀
+        else:
+            out[sp.address] = max(reserved.get(sp.address, int(m, 16)) - int(m, 16), 0)
+    return out
+
+
+def _assign(items: list, sponsor_list: List[Sponsor], inflight: Dict[str, int]) -> Dict[str, list]:
+    """여유가 많은 스폰서부터 고르게 배분"""
+    room = {sp.address: RELAY_MAX_INFLIGHT - inflight.get(sp.address, 0) for sp in sponsor_list}
+    plan: Dict[str, list] = {sp.address: [] for sp in sponsor_list}
+    for it in items:
+        address = max(room, key=room.get)
+        if room[address] <= 0:
+            break
+        plan[address].append(it)
+        room[address] -= 1
+    return plan
+
+
+def _filler(sponsor: Sponsor, nonce: int, gas_price: int) -> dict:
+    # nonce 구멍 메우기 / 취소용 0 ETH 자기 전송
+    return {"from": sponsor.address, "to": sponsor.address, "data": "0x", "value": 0, "chainId": chain.CHAIN_ID,
+            "gas": 21000, "gasPrice": gas_price, "nonce": nonce}
+
+
+def send_items(event_id: int, contract: str, plan: Dict[str, list], sponsor_list: List[Sponsor],
+               client: chain.RpcClient) -> Tuple[int, int, list]:
+    """스폰서별로 nonce 를 묶어 예약 → 서명 → 배치 전송 → tx_logs 기록.
+    (전송 건수, 실패 건수, nonce 어긋남으로 실패해 다시 보낼 항목)"""
+    by_address = {sp.address: sp for sp in sponsor_list}
+    signed: List[Tuple[Sponsor, dict, dict, str, str]] = []
+    gas = price = None
+    for address, items in plan.items():
+        if not items:
+            continue
+        sp = by_address[address]
+        if gas is None:
+            probe = {"from": sp.address, "to": contract, "value": 0, "data": encode_enter(
+                items[0]["user"], items[0]["nonce"], items[0]["deadline"], items[0]["signature"])}
+            try:
+                gas, price = chain.gas_params(probe, client)
+            except chain.RpcError as e:
+                raise RelayError(f"gas estimation failed (phase not Enter?): {e}") from e
+        first = chain.allocate_nonces(sp.address, len(items), client)
+        for offset, it in enumerate(items):
+            tx = {"from": sp.address, "to": contract, "value": 0, "chainId": chain.CHAIN_ID, "gas": gas,
+                  "gasPrice": price, "nonce": first + offset,
+                  "data": encode_enter(it["user"], it["nonce"], it["deadline"], it["signature"])}
+            raw, tx_hash = _sign(sp, tx)
+            signed.append((sp, it, tx, raw, tx_hash))
+    if not signed:
+        return 0, 0, []
+
+    results = _batch(client, [("eth_sendRawTransaction", [raw]) for *_, raw, _ in signed])
+    rows, failed, retry, resync = [], 0, [], set()
+    for (sp, it, tx, raw, tx_hash), result in zip(signed, results):
+        if isinstance(result, Exception) and not chain.is_already_known(result):
+            failed += 1
+            RELAY_TX.inc(result="send_failed")
+            if chain.is_nonce_error(result):
+                resync.add(sp.address)  # nonce 가 이미 쓰였음 → 구멍은 없음, 새 nonce 로 한 번 더
+                if not it.get("retried"):
+                    retry.append({**it, "retried": True})
+            else:
+                _fill_gap(sp, tx["nonce"], price, client)
+            log.warning("relay send failed (entry %s): %s", it["entry_id"], result)
+            continue
+        RELAY_TX.inc(result="sent")
+        rows.append(txtracker.pending_values(
+            tx_hash, tx, TxType.record_entry, event_id=event_id, entry_id=it["entry_id"],
+            metadata={"fn": "enterWithSig", "user": it["user"], "sponsor": sp.address, "bumps": 0}))
+    txtracker.record_pending_many(rows)
+    for address in resync:
+        chain.resync_nonce(address, client)
+    return len(rows), failed, retry
+
+
+def _fill_gap(sponsor: Sponsor, nonce: int, gas_price: int, client: chain.RpcClient):
+    raw, tx_hash = _sign(sponsor, _filler(sponsor, nonce, gas_price))
+    try:
+        client.call("eth_sendRawTransaction", [raw])
+        RELAY_TX.inc(result="gap_filled")
+    except chain.RpcError as e:
+        log.warning("nonce gap fill failed (%s nonce %s): %s", sponsor.address, nonce, e)
+
+
+# -------------------------
+# 멈춘 트랜잭션 교체 (같은 nonce, 가스 가격 인상)
+# -------------------------
+def bump_stuck(sponsor_list: Optional[List[Sponsor]] = None, client: Optional[chain.RpcClient] = None,
+               stuck_sec: float = RELAY_STUCK_SEC) -> Dict[str, int]:
+    sponsor_list = sponsor_list if sponsor_list is not None else sponsors()
+    if not sponsor_list:
+        return {"bumped": 0, "dropped": 0}
+    client = client or chain.get_client()
+    by_address = {sp.address: sp for sp in sponsor_list}
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=stuck_sec)
+    with session_scope() as s:
+        stuck = s.execute(
+            select(TxLog.id, TxLog.tx_hash, TxLog.event_id, TxLog.entry_id, TxLog.from_address, TxLog.to_address,
+                   TxLog.chain_id, TxLog.gas_price_wei, TxLog.tx_metadata)
+            .where(TxLog.status == TxStatus.pending, TxLog.tx_type == TxType.record_entry,
+                   TxLog.from_address.in_(list(by_address)), TxLog.created_at < cutoff)
+            .order_by(TxLog.id).limit(RELAY_BATCH)
+        ).all()
+    if not stuck:
+        return {"bumped": 0, "dropped": 0}
+    addresses = sorted({t.from_address for t in stuck})
+    mined = dict(zip(addresses, _batch(client, [("eth_getTransactionCount", [a, "latest"]) for a in addresses])))
+    receipts = _batch(client, [("eth_getTransactionReceipt", [t.tx_hash]) for t in stuck])
+    network_price = int(client.call("eth_gasPrice"), 16)
+
+    bumped, dropped, rows, replaced, gone = 0, 0, [], [], []
+    for t, rcpt in zip(stuck, receipts):
+        if isinstance(rcpt, dict) and rcpt:
+            continue  # 채굴됨 → 폴러가 곧 반영
+        count = mined.get(t.from_address)
+        if isinstance(count, Exception) or isinstance(rcpt, Exception):
+            continue
+        meta = dict(t.tx_metadata or {})
+        if meta.get("nonce", 0) < int(count, 16):
+            # 같은 nonce 의 다른 트랜잭션(교체본/메우기)이 채굴됨 → 이 tx 는 영영 확정되지 않음
+            gone.append(t.id)
+            continue
+        price = max(int(t.gas_price_wei) * (100 + RELAY_BUMP_PCT) // 100, network_price)
+        if RELAY_MAX_GAS_PRICE and price > RELAY_MAX_GAS_PRICE:
+            log.warning("not bumping %s: %s wei exceeds RELAY_MAX_GAS_PRICE", t.tx_hash, price)
+            continue
+        sp = by_address[t.from_address]
+        tx = {"from": sp.address, "to": t.to_address, "value": meta.get("value", 0), "chainId": t.chain_id,
+              "gas": meta["gas"], "gasPrice": price, "nonce": meta["nonce"], "data": meta["data"]}
+        raw, tx_hash = _sign(sp, tx)
+        try:
+            client.call("eth_sendRawTransaction", [raw])
+        except chain.RpcError as e:
+            log.warning("fee bump failed for %s: %s", t.tx_hash, e)
+            continue
+        bumped += 1
+        RELAY_TX.inc(result="bumped")
+        replaced.append((t.id, tx_hash))
+        meta.update(replaces=t.tx_hash, bumps=meta.get("bumps", 0) + 1)
+        rows.append(txtracker.pending_values(tx_hash, tx, TxType.record_entry, event_id=t.event_id,
+                                             entry_id=t.entry_id, metadata=meta))
+    txtracker.record_pending_many(rows)
+    with session_scope() as s:
+        for tx_id, new_hash in replaced:
+            s.execute(update(TxLog).where(TxLog.id == tx_id, TxLog.status == TxStatus.pending)
+                      .values(status=TxStatus.failed, error_message=f"replaced by {new_hash}"))
+        if gone:
+            dropped = s.execute(update(TxLog).where(TxLog.id.in_(gone), TxLog.status == TxStatus.pending)
+                                .values(status=TxStatus.failed, error_message="dropped (nonce reused)")).rowcount
+    return {"bumped": bumped, "dropped": dropped}
+
+
+# -------------------------
+# 이벤트 단위 실행 (작업 큐 'relay_entries')
+# -------------------------
+def _pending_count(event_id: int) -> int:
+    with session_scope() as s:
+        return s.execute(
+            select(func.count()).select_from(TxLog)
+            .where(TxLog.event_id == event_id, TxLog.tx_type == TxType.record_entry,
+                   TxLog.status == TxStatus.pending)
+        ).scalar_one()
+
+
+def relay_event(event_id: int, sponsor_list: Optional[List[Sponsor]] = None,
+                client: Optional[chain.RpcClient] = None, wait: bool = False, wait_timeout: float = 600,
+                on_progress: Optional[Callable[[int], None]] = None) -> dict:
+    """이벤트의 대기 중인 서명 응모를 모두 전송. wait=True 면 전부 확정될 때까지 폴링/교체하며 기다림"""
+    sponsor_list = sponsor_list if sponsor_list is not None else sponsors()
+    if not sponsor_list:
+        raise RelayError("SPONSOR_PRIVATE_KEYS (or PRIVATE_KEY) not set")
+    client = client or chain.get_client()
+    with session_scope() as s:
+        event = s.get(Event, event_id)
+        if event is None:
+            raise RelayError("event not found")
+        contract = event.consumer_contract_address or CONTRACT_ADDRESS
+    if not contract:
+        raise RelayError("no contract address for event")
+
+    started = time.perf_counter()
+    totals = {"checked": 0, "sent": 0, "send_failed": 0, "malformed": 0, "already_entered": 0,
+              "stale_nonce": 0, "expired": 0, "rpc_error": 0, "bumped": 0, "dropped": 0}
+    after_id = 0
+    backlog: list = []
+    while True:
+        if len(backlog) < RELAY_BATCH:
+            rows = _queued(event_id, after_id, RELAY_BATCH)
+            if rows:
+                after_id = rows[-1].id
+                items, malformed = _parse(rows)
+                totals["malformed"] += malformed
+                totals["checked"] += len(rows)
+                keep, skipped = screen(items, contract, client)
+                for reason, n in skipped.items():
+                    totals[reason] += n
+                backlog.extend(keep)
+        if not backlog:
+            break
+        plan = _assign(backlog, sponsor_list, _inflight(sponsor_list, client))
+        planned = sum(len(v) for v in plan.values())
+        if not planned:
+            # 모든 스폰서가 in-flight 한도 → 채굴을 기다리며 멈춘 tx 교체
+            for k, v in bump_stuck(sponsor_list, client).items():
+                totals[k] += v
+            time.sleep(RELAY_WAIT_POLL)
+            continue
+        planned_ids = {it["entry_id"] for items in plan.values() for it in items}
+        backlog = [it for it in backlog if it["entry_id"] not in planned_ids]
+        sent, failed, retry = send_items(event_id, contract, plan, sponsor_list, client)
+        backlog.extend(retry)
+        totals["sent"] += sent
+        totals["send_failed"] += failed - len(retry)
+        if on_progress:
+            on_progress(totals["sent"])
+
+    if wait:
+        deadline = time.monotonic() + wait_timeout
+        while time.monotonic() < deadline:
+            txtracker.poll_once(client)
+            if not _pending_count(event_id):
+                break
+            for k, v in bump_stuck(sponsor_list, client).items():
+                totals[k] += v
+            time.sleep(RELAY_WAIT_POLL)
+        totals["unconfirmed"] = _pending_count(event_id)
+    elapsed = time.perf_counter() - started
+    totals["elapsed_sec"] = round(elapsed, 3)
+    totals["entries_per_sec"] = round(totals["sent"] / elapsed, 1) if elapsed else 0.0
+    return totals
+
+
+class StuckTxBumper:
+    """백그라운드에서 RELAY_STUCK_SEC 마다 멈춘 relayer 트랜잭션 교체"""
+
+    def __init__(self, interval: float = RELAY_STUCK_SEC):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="relay-bumper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        sponsor_list = sponsors()
+        while not self._stop.wait(self.interval):
+            try:
+                bump_stuck(sponsor_list)
+            except Exception as e:
+                log.warning("stuck tx bump failed: %s", e)
+
+
+_bumper: Optional[StuckTxBumper] = None
+
+
+def start_bumper() -> Optional[StuckTxBumper]:
+    global _bumper
+    if _bumper is None and SPONSOR_PRIVATE_KEYS:
+        _bumper = StuckTxBumper().start()
+    return _bumper
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: python relayer.py <event_id>")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(relay_event(int(sys.argv[1]), wait=True)))
@@ -0,0 +1,336 @@
+# scheduler.py — 이벤트 생명주기 자동 진행: draft → open → closed → (lock, requestRandomness) → drawing → drawn
+# SCHEDULER_INTERVAL 마다 한 번:
+#   1) idx_events_time(start_at, end_at) 범위 조건의 조건부 UPDATE 두 번으로 시작/종료 시각을 지난 이벤트를
+#      open / closed 로 바꾼다 (이벤트 수와 무관하게 쿼리 2번, 응모는 closed 가 되는 즉시 막힘)
+#   2) 체인 단계가 남은 closed 이벤트를 모아 컨트랙트별 phase()/raffleId() 를 JSON-RPC 배치 1번으로 읽고
+#      Enter → lock(), Locked → requestRandomness() 를 SCHEDULER_CONCURRENCY 개 스레드로 동시에 전송한다
+#      (nonce 는 chain 모듈이 로컬 할당하므로 같은 키로 병렬 전송해도 충돌하지 않음)
+#   3) drawing/drawn 전환과 당첨자 반영은 인덱서가 VRFRequested / WinnersDrawn 로그로 처리한다
+# 서명 → tx_logs 에 pending 기록 → 전송 순서라, 기록 전에 같은 단계를 다시 계획해 중복 전송(→ revert 가 시도 횟수로 잡힘)하는
+# 틈이 없다. 노드가 거부한 전송은 그 기록을 failed 로 바꾸고 nonce 를 체인 값으로 되돌린다.
+# 재시도: 전송 오류나 되돌려진(reverted) 트랜잭션은 SCHEDULER_RETRY_DELAY 부터 두 배씩 늘려 SCHEDULER_MAX_ATTEMPTS 번까지.
+# SCHEDULER_VRF_TIMEOUT 안에 이행되지 않은 VRF 요청은 VRFStatus.failed 로 표시만 한다 (컨트랙트는 Requested 에서
+# Locked 로 돌아가지 않으므로 재요청 경로가 없음). 늦게라도 이행되면 인덱서가 fulfilled 로 바꾼다.
+# 더 진행할 수 없는 이벤트(포기한 단계, 컨트랙트가 이미 다음 라운드)는 후보 창(SCHEDULER_BATCH)에서 빼서
+# 새 이벤트가 밀리지 않게 한다.
+# 체인의 phase 가 최종 기준이라 재시작/중복 실행해도 같은 단계 트랜잭션을 두 번 보내지 않는다 (미확정 tx 가 있으면 대기).
+# 프로세스 하나에서만 돌릴 것 (python scheduler.py, 또는 단일 프로세스 개발 환경에서 SCHEDULER=embedded 인 API).
+# 실행: python scheduler.py
+from __future__ import annotations
+import datetime
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from eth_utils import keccak
+from sqlalchemy import select, update
+
+import chain
+import metrics
+import txtracker
+from models import session_scope, Event, EventStatus, TxLog, TxStatus, TxType, VRFRequest, VRFStatus
+
+log = logging.getLogger("scheduler")
+
+CONTRACT_ADDRESS = os.environ.get("CONTRACT_ADDRESS")
+PRIVATE_KEY = os.environ.get("PRIVATE_KEY")
+SCHEDULER_INTERVAL = float(os.environ.get("SCHEDULER_INTERVAL", "5"))
+# 동시에 보낼 lock / requestRandomness 트랜잭션 수
+SCHEDULER_CONCURRENCY = int(os.environ.get("SCHEDULER_CONCURRENCY", "8"))
+# 한 번에 살펴볼 체인 단계 이벤트 수
+SCHEDULER_BATCH = int(os.environ.get("SCHEDULER_BATCH", "500"))
+# 종료 후 이 기간(초)이 지난 이벤트는 더 이상 자동 진행하지 않음 (시간 인덱스 범위를 좁게 유지)
+SCHEDULER_LOOKBACK = float(os.environ.get("SCHEDULER_LOOKBACK", str(7 * 86400)))
+SCHEDULER_MAX_ATTEMPTS = int(os.environ.get("SCHEDULER_MAX_ATTEMPTS", "5"))
+SCHEDULER_RETRY_DELAY = float(os.environ.get("SCHEDULER_RETRY_DELAY", "15"))
+SCHEDULER_VRF_TIMEOUT = float(os.environ.get("SCHEDULER_VRF_TIMEOUT", "600"))
+SCHEDULER_RPC_BATCH = int(os.environ.get("SCHEDULER_RPC_BATCH", "100"))
+
+LOCK_SELECTOR = keccak(text="lock()")[:4]
+REQUEST_SELECTOR = keccak(text="requestRandomness(bytes)")[:4]
+PHASE_SELECTOR = "0x" + keccak(text="phase()")[:4].hex()
+RAFFLE_ID_SELECTOR = "0x" + keccak(text="raffleId()")[:4].hex()
+PHASE_ENTER, PHASE_LOCKED, PHASE_REQUESTED, PHASE_DRAWN = range(4)  # SponsoredRaffle.Phase
+
+# 단계 → (tx_logs.tx_type, tx_metadata.fn). lock 은 /api/raffle/lock 과 같은 기록 형식
+STEPS = {
+    "lock": (TxType.other, "lock"),
+    "request": (TxType.request_randomness, "requestRandomness"),
+}
+
+TRANSITIONS = metrics.counter("scheduler_transitions_total", "Event status changes made by the scheduler")
+SCHEDULER_TXS = metrics.counter("scheduler_txs_total", "Lifecycle transactions sent by the scheduler")
+
+
+def _now():
+    return datetime.datetime.utcnow()
+
+
+def _encode(step: str) -> str:
+    if step == "lock":
+        return "0x" + LOCK_SELECTOR.hex()
+    # requestRandomness(bytes data) 에 빈 bytes: 오프셋 32 + 길이 0
+    return "0x" + (REQUEST_SELECTOR + (32).to_bytes(32, "big") + (0).to_bytes(32, "big")).hex()
+
+
+# -------------------------
+# 1) 시각 기반 상태 전환
+# -------------------------
+def advance_times(now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+    """시작 시각이 지난 draft → open, 종료 시각이 지난 draft/open → closed. 바뀐 건수 반환"""
+    now = now or _now()
+    since = now - datetime.timedelta(seconds=SCHEDULER_LOOKBACK)
+    with session_scope() as s:
+        opened = s.execute(
+            update(Event)
+            .where(Event.start_at <= now, Event.end_at > now, Event.status == EventStatus.draft)
+            .values(status=EventStatus.open)
+        ).rowcount
+        closed = s.execute(
+            update(Event)
+            .where(Event.start_at <= now, Event.end_at <= now, Event.end_at > since,
+                   Event.status.in_([EventStatus.draft, EventStatus.open]))
+            .values(status=EventStatus.closed)
+        ).rowcount
+    if opened:
+        TRANSITIONS.inc(opened, status="open")
+    if closed:
+        TRANSITIONS.inc(closed, status="closed")
+    return {"opened": opened, "closed": closed}
+
+
+def expire_vrf(now: Optional[datetime.datetime] = None) -> int:
+    """SCHEDULER_VRF_TIMEOUT 안에 이행되지 않은 요청을 failed 로 표시 (모니터링용, 이행되면 인덱서가 덮어씀)"""
+    cutoff = (now or _now()) - datetime.timedelta(seconds=SCHEDULER_VRF_TIMEOUT)
+    with session_scope() as s:
+        n = s.execute(
+            update(VRFRequest)
+            .where(VRFRequest.status == VRFStatus.requested, VRFRequest.requested_at < cutoff)  # idx_vrf_event_status
+            .values(status=VRFStatus.failed)
+        ).rowcount
+    if n:
+        log.warning("%d VRF request(s) not fulfilled within %ss, marked failed", n, SCHEDULER_VRF_TIMEOUT)
+    return n
+
+
+# -------------------------
+# 2) 체인 단계 (lock / requestRandomness)
+# -------------------------
+def _candidates(now: datetime.datetime, skip: frozenset = frozenset()) -> List[dict]:
+    """lock/requestRandomness 를 보낼 수 있는 closed 이벤트 (drawing 이후는 VRF 이행과 인덱서 몫).
+    컨트랙트가 없거나 skip 에 든 이벤트는 창에서 빼서 오래된 이벤트가 새 이벤트를 밀어내지 않게 한다"""
+    since = now - datetime.timedelta(seconds=SCHEDULER_LOOKBACK)
+    query = (select(Event.id, Event.consumer_contract_address, Event.onchain_raffle_id, Event.status)
+             .where(Event.start_at <= now, Event.end_at <= now, Event.end_at > since,
+                    Event.status == EventStatus.closed))
+    if not CONTRACT_ADDRESS:
+        query = query.where(Event.consumer_contract_address.is_not(None))
+    if skip:
+        query = query.where(Event.id.not_in(skip))
+    with session_scope() as s:
+        rows = s.execute(query.order_by(Event.end_at).limit(SCHEDULER_BATCH)).all()
+    return [{"event_id": r.id, "contract": (r.consumer_contract_address or CONTRACT_ADDRESS).lower(),
+             "raffle_id": r.onchain_raffle_id, "status": r.status} for r in rows]
+
+
+def _read_contracts(client: chain.RpcClient, contracts: List[str]) -> Dict[str, Tuple[int, int]]:
+    """컨트랙트별 (phase, raffleId). 읽기 실패한 컨트랙트는 빠짐"""
+    calls = []
+    for c in contracts:
+        calls.append(("eth_call", [{"to": c, "data": PHASE_SELECTOR}, "latest"]))
+        calls.append(("eth_call", [{"to": c, "data": RAFFLE_ID_SELECTOR}, "latest"]))
+    results = []
+    for i in range(0, len(calls), SCHEDULER_RPC_BATCH):
+        results.extend(client.batch(calls[i:i + SCHEDULER_RPC_BATCH], raise_errors=False))
+    state = {}
+    for j, c in enumerate(contracts):
+        phase, raffle_id = results[2 * j], results[2 * j + 1]
+        if isinstance(phase, str) and isinstance(raffle_id, str):
+            state[c] = (int(phase, 16), int(raffle_id, 16))
+    return state
+
+
+def _tx_history(event_ids: List[int]) -> Dict[Tuple[int, str], dict]:
+    """(event_id, 단계) → {"pending": bool, "failed": 되돌려진 횟수, "last_failed_at": 시각}"""
+    fn_to_step = {fn: step for step, (_, fn) in STEPS.items()}
+    history: Dict[Tuple[int, str], dict] = defaultdict(
+        lambda: {"pending": False, "failed": 0, "last_failed_at": None})
+    with session_scope() as s:
+        rows = s.execute(
+            select(TxLog.event_id, TxLog.status, TxLog.tx_metadata, TxLog.created_at)
+            .where(TxLog.event_id.in_(event_ids),  # idx_tx_event_time
+                   TxLog.tx_type.in_([t for t, _ in STEPS.values()]))
+        ).all()
+    for r in rows:
+        step = fn_to_step.get((r.tx_metadata or {}).get("fn"))
+        if step is None:
+            continue
+        h = history[(r.event_id, step)]
+        if r.status == TxStatus.pending:
+            h["pending"] = True
+        elif r.status == TxStatus.failed:
+            h["failed"] += 1
+            h["last_failed_at"] = max(filter(None, (h["last_failed_at"], r.created_at)), default=None)
+    return history
+
+
+class Scheduler:
+    def __init__(self, private_key: Optional[str] = PRIVATE_KEY, interval: float = SCHEDULER_INTERVAL,
+                 concurrency: int = SCHEDULER_CONCURRENCY, client: Optional[chain.RpcClient] = None):
+        self.private_key = private_key
+        self.interval = interval
+        self.concurrency = concurrency
+        self._client = client
+        self._stop = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # 서명 전(가스 추정/nonce 예약)에 난 오류 (tx_logs 에 남지 않는 것): (event_id, 단계) → (횟수, 마지막 오류 시각)
+        self._send_errors: Dict[Tuple[int, str], Tuple[int, datetime.datetime]] = {}
+        self._gave_up: set = set()
+        # 다시 후보로 볼 필요가 없는 이벤트 id (포기했거나 컨트랙트가 이미 다음 라운드)
+        self._skip: set = set()
+
+    @property
+    def client(self) -> chain.RpcClient:
+        return self._client or chain.get_client()
+
+    def start(self):
+        threading.Thread(target=self._loop, name="event-scheduler", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                log.warning("scheduler tick failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def tick(self, now: Optional[datetime.datetime] = None) -> dict:
+        now = now or _now()
+        result = advance_times(now)
+        if self.private_key and (self._client or chain.RPC_URLS):
+            expire_vrf(now)
+            result["sent"] = self.advance_chain(now)
+        return result
+
+    def plan(self, now: datetime.datetime) -> List[Tuple[dict, str]]:
+        """이번 틱에 보낼 (이벤트, 단계) 목록. 컨트랙트당 최대 1건"""
+        events = _candidates(now, frozenset(self._skip))
+        if not events:
+            return []
+        state = _read_contracts(self.client, sorted({e["contract"] for e in events}))
+        history = _tx_history([e["event_id"] for e in events])
+        by_contract: Dict[str, List[dict]] = defaultdict(list)
+        for e in events:
+            by_contract[e["contract"]].append(e)
+
+        actions = []
+        for contract, group in by_contract.items():
+            if contract not in state:
+                continue
+            phase, raffle_id = state[contract]
+            # 지난 라운드 이벤트는 그 라운드가 끝났으므로 더 보낼 것이 없음
+            self._skip.update(e["event_id"] for e in group
+                              if e["raffle_id"] is not None and e["raffle_id"] < raffle_id)
+            # 같은 컨트랙트를 쓰는 이벤트가 여럿이면 현재 라운드(raffleId)의 이벤트만 진행
+            matching = [e for e in group if e["raffle_id"] == raffle_id]
+            if not matching and len(group) == 1 and group[0]["raffle_id"] is None:
+                matching = group
+            if not matching:
+                continue
+            event = matching[0]
+            step = {PHASE_ENTER: "lock", PHASE_LOCKED: "request"}.get(phase)
+            if step is None:
+                continue  # Requested: VRF 이행 대기, Drawn: 인덱서가 반영
+            if self._ready(event["event_id"], step, history[(event["event_id"], step)], now):
+                actions.append((event, step))
+        return actions
+
+    def _ready(self, event_id: int, step: str, h: dict, now: datetime.datetime) -> bool:
+        if h["pending"]:
+            return False  # 영수증 대기 (txtracker 폴러가 반영)
+        errors, error_at = self._send_errors.get((event_id, step), (0, None))
+        attempts = h["failed"] + errors
+        if attempts >= SCHEDULER_MAX_ATTEMPTS:
+            if (event_id, step) not in self._gave_up:
+                self._gave_up.add((event_id, step))
+                self._skip.add(event_id)
+                log.error("event %s: %s failed %d times, giving up", event_id, step, attempts)
+            return False
+        if attempts:
+            backoff = datetime.timedelta(seconds=SCHEDULER_RETRY_DELAY * 2 ** (attempts - 1))
+            last = max(filter(None, (h["last_failed_at"], error_at)), default=None)
+            if last and last + backoff > now:
+                return False
+        return True
+
+    def advance_chain(self, now: datetime.datetime) -> int:
+        actions = self.plan(now)
+        if not actions:
+            return 0
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix="scheduler-tx")
+        results = list(self._pool.map(lambda a: self._send(*a, now=now), actions))
+        return sum(results)
+
+    def _send(self, event: dict, step: str, now: datetime.datetime) -> bool:
+        tx_type, fn = STEPS[step]
+        key = (event["event_id"], step)
+        client = self.client
+        try:
+            tx_hash, raw, tx = chain.sign_transaction(self.private_key, event["contract"], _encode(step),
+                                                      client=client)
+        except Exception as e:
+            count = self._send_errors.get(key, (0, None))[0] + 1
+            self._send_errors[key] = (count, now)
+            SCHEDULER_TXS.inc(step=step, result="error")
+            log.warning("event %s: %s send failed (%d): %s", event["event_id"], step, count, e)
+            return False
+        # 전송 전에 기록 → 다음 틱의 plan 은 pending 을 보고 기다린다
+        txtracker.record_pending(tx_hash, tx, tx_type, event_id=event["event_id"],
+                                 metadata={"fn": fn, "scheduler": True})
+        try:
+            client.call("eth_sendRawTransaction", [raw])
+        except Exception as e:
+            if not chain.is_already_known(e):
+                # 거부됨 → 이 시도는 failed 로 남고(재시도 횟수에 포함) 예약한 nonce 는 되돌림
+                txtracker.mark_failed(tx_hash, f"send failed: {e}")
+                chain.release_nonce(tx["from"], client)
+                SCHEDULER_TXS.inc(step=step, result="error")
+                log.warning("event %s: %s send failed: %s", event["event_id"], step, e)
+                return False
+        SCHEDULER_TXS.inc(step=step, result="sent")
+        log.info("event %s: %s sent %s", event["event_id"], step, tx_hash)
+        return True
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def start_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler().start()
+    return _scheduler
+
+
+if __name__ == "__main__":
+    import time
+    logging.basicConfig(level=logging.INFO)
+    if chain.RPC_URLS:
+        # lock/requestRandomness 영수증 반영과 drawing/drawn 전환에 필요 (API 워커는 기본 CHAIN_SYNC=off)
+        txtracker.start_poller()
+        import indexer
+        indexer.start_indexer()
+        import relayer
+        relayer.start_bumper()
+    start_scheduler()
+    print("✅ event scheduler + chain sync 시작")
+    while True:
+        time.sleep(3600)
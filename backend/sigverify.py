@@ -0,0 +1,243 @@
+# sigverify.py — enterWithSig EIP-712 서명 일괄 검증 (프로세스 풀)
+# 실행: python sigverify.py <event_id> [workers]
+from __future__ import annotations
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from eth_keys import keys
+from eth_utils import keccak, to_checksum_address
+from sqlalchemy import select, update
+
+import stats
+from models import session_scope, Entry, EntryStatus, Event, Signature, SignatureType
+
+CONTRACT_ADDRESS = os.environ.get("CONTRACT_ADDRESS")
+CHAIN_ID = int(os.environ.get("CHAIN_ID", "0"))
+RAFFLE_NAME = os.environ.get("RAFFLE_NAME", "SponsoredRaffle")
+RAFFLE_VERSION = os.environ.get("RAFFLE_VERSION", "1")
+
+SIG_VERIFY_WORKERS = int(os.environ.get("SIG_VERIFY_WORKERS", "0")) or (os.cpu_count() or 1)
+SIG_VERIFY_CHUNK = int(os.environ.get("SIG_VERIFY_CHUNK", "1000"))
+
+# SponsoredRaffle.sol 과 동일한 타입 문자열
+DOMAIN_TYPEHASH = keccak(text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+ENTRY_TYPEHASH = keccak(text="Entry(address user,uint256 raffleId,uint256 nonce,uint256 deadline)")
+
+# secp256k1 군의 차수. s 가 n/2 보다 크면 컨트랙트(OpenZeppelin ECDSA)가 거부하는 가변 서명
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+# (entry_id, signature_id, wallet_address, message JSON, signature hex)
+Item = Tuple[int, Optional[int], Optional[str], str, str]
+# (entry_id, signature_id, ok, 사유 또는 복원된 주소)
+Result = Tuple[int, Optional[int], bool, str]
+
+
+def _word(value: int) -> bytes:
+    return int(value).to_bytes(32, "big")
+
+
+def _address_word(addr: str) -> bytes:
+    return bytes(12) + bytes.fromhex(addr[2:])
+
+
+def domain_separator(name: str, version: str, chain_id: int, contract: str) -> bytes:
+    return keccak(
+        DOMAIN_TYPEHASH
+        + keccak(text=name)
+        + keccak(text=version)
+        + _word(chain_id)
+        + _address_word(contract)
+    )
+
+
+def entry_digest(domain_sep: bytes, user: str, raffle_id: int, nonce: int, deadline: int) -> bytes:
+    struct_hash = keccak(ENTRY_TYPEHASH + _address_word(user) + _word(raffle_id) + _word(nonce) + _word(deadline))
+    return keccak(b"\x19\x01" + domain_sep + struct_hash)
+
+
+def split_signature(signature_hex: str) -> Tuple[int, int, int]:
+    """65바이트 r||s||v → (v(0/1), r, s). 복원용이라 v 는 0/1/27/28 모두 받는다 (컨트랙트 기준 검사는 has_eth_v)"""
+    sig = bytes.fromhex(signature_hex[2:] if signature_hex.startswith("0x") else signature_hex)
+    if len(sig) != 65:
+        raise ValueError("bad signature length")
+    v = sig[64]
+    if v >= 27:
+        v -= 27
+    if v not in (0, 1):
+        raise ValueError("bad v")
+    return v, int.from_bytes(sig[:32], "big"), int.from_bytes(sig[32:64], "big")
+
+
+def is_low_s(s: int) -> bool:
+    return 0 < s <= SECP256K1_N // 2
+
+
+def has_eth_v(signature_hex: str) -> bool:
+    """v 바이트가 27/28 인지. ecrecover / OpenZeppelin ECDSA 는 0/1 을 거부하므로 그대로 제출하면 revert"""
+    return signature_hex[-2:].lower() in ("1b", "1c")
+
+
+def recover(digest: bytes, signature_hex: str) -> str:
+    sig_obj = keys.Signature(vrs=split_signature(signature_hex))
+    return sig_obj.recover_public_key_from_msg_hash(digest).to_checksum_address()
+
+
+# -------------------------
+# 워커 프로세스
+# -------------------------
+_domain_sep: Optional[bytes] = None
+_raffle_id: Optional[int] = None
+
+
+def _init_worker(domain_sep: bytes, raffle_id: Optional[int] = None):
+    global _domain_sep, _raffle_id
+    _domain_sep = domain_sep
+    _raffle_id = raffle_id
+
+
+def _verify_one(item: Item, now: int) -> Result:
+    entry_id, signature_id, wallet, message, signature = item
+    try:
+        msg = json.loads(message)
+        user = to_checksum_address(msg["user"])
+        deadline = int(msg["deadline"])
+        raffle_id = int(msg["raffleId"])
+        if wallet and user.lower() != wallet.lower():
+            return entry_id, signature_id, False, "user_mismatch"
+        if _raffle_id is not None and raffle_id != _raffle_id:
+            return entry_id, signature_id, False, "raffle_mismatch"
+        if deadline < now:
+            return entry_id, signature_id, False, "expired"
+        if not is_low_s(split_signature(signature)[2]):
+            return entry_id, signature_id, False, "high_s"
+        if not has_eth_v(signature):
+            return entry_id, signature_id, False, "bad_v"
+        digest = entry_digest(_domain_sep, user, raffle_id, int(msg["nonce"]), deadline)
+        signer = recover(digest, signature)
+    except Exception as e:
+        return entry_id, signature_id, False, f"malformed: {e}"
+    if signer != user:
+        return entry_id, signature_id, False, "bad_sig"
+    return entry_id, signature_id, True, signer
+
+
+def _verify_chunk(args: Tuple[List[Item], int]) -> List[Result]:
+    chunk, now = args
+    return [_verify_one(item, now) for item in chunk]
+
+
+def _chunks(items: Iterable[Item], size: int) -> Iterator[List[Item]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def verify_batch(items: Iterable[Item], workers: int = SIG_VERIFY_WORKERS, chunk_size: int = SIG_VERIFY_CHUNK,
+                 domain_sep: Optional[bytes] = None, raffle_id: Optional[int] = None) -> Iterator[List[Result]]:
+    """청크 단위 검증 결과를 순서대로 yield. workers=1 이면 현재 프로세스에서 처리.
+    raffle_id 가 주어지면 메시지의 raffleId 가 다른 서명은 raffle_mismatch"""
+    domain_sep = domain_sep or domain_separator(RAFFLE_NAME, RAFFLE_VERSION, CHAIN_ID, CONTRACT_ADDRESS)
+    now = int(time.time())
+    if workers <= 1:
+        _init_worker(domain_sep, raffle_id)
+        for chunk in _chunks(items, chunk_size):
+            yield _verify_chunk((chunk, now))
+        return
+    # Executor.map 은 입력을 한 번에 다 제출하므로, 진행 중 청크 수를 workers*2 로 제한
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(domain_sep, raffle_id)) as pool:
+        inflight = deque()
+        for chunk in _chunks(items, chunk_size):
+            inflight.append(pool.submit(_verify_chunk, (chunk, now)))
+            if len(inflight) >= workers * 2:
+                yield inflight.popleft().result()
+        while inflight:
+            yield inflight.popleft().result()
+
+
+# -------------------------
+# DB 반영
+# -------------------------
+def _pending_items(event_id: int, page_size: int = SIG_VERIFY_CHUNK) -> Iterator[Item]:
+    """id 순 페이지 단위로 읽는다. 페이지마다 짧은 트랜잭션이라 결과 반영(다른 세션의 UPDATE)과
+    읽기 커서가 겹치지 않는다 (sqlite 에서 열린 읽기 트랜잭션이 쓰기를 막는 문제)"""
+    after_id = 0
+    while True:
+        with session_scope() as s:
+            rows = s.execute(
+                select(Entry.id, Signature.id, Entry.wallet_address, Signature.message, Signature.signature)
+                .join(Signature, Signature.id == Entry.signature_id)
+                .where(Entry.event_id == event_id, Entry.status == EntryStatus.pending, Entry.id > after_id)
+                .order_by(Entry.id)
+                .limit(page_size)
+            ).all()
+        for row in rows:
+            yield tuple(row)
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1][0]
+
+
+def verify_event_signatures(event_id: int, workers: int = SIG_VERIFY_WORKERS,
+                            on_progress: Optional[Callable[[int], None]] = None) -> dict:
+    """이벤트의 pending 응모 서명을 검증해 Entry.status 를 valid/invalid 로 일괄 갱신.
+    도메인은 이벤트의 컨트랙트 주소(없으면 CONTRACT_ADDRESS), raffleId 는 이벤트의 onchain_raffle_id 와 비교"""
+    with session_scope() as s:
+        event = s.execute(select(Event.consumer_contract_address, Event.onchain_raffle_id)
+                          .where(Event.id == event_id)).first()
+    if event is None:
+        raise RuntimeError("event not found")
+    contract = event.consumer_contract_address or CONTRACT_ADDRESS
+    if not contract:
+        raise RuntimeError("no contract address for event")
+    domain_sep = domain_separator(RAFFLE_NAME, RAFFLE_VERSION, CHAIN_ID, contract)
+    started = time.perf_counter()
+    totals = {"checked": 0, "valid": 0, "invalid": 0, "reasons": {}}
+    for results in verify_batch(_pending_items(event_id), workers, domain_sep=domain_sep,
+                                raffle_id=event.onchain_raffle_id):
+        ok_entries = [r[0] for r in results if r[2]]
+        ok_sigs = [r[1] for r in results if r[2] and r[1]]
+        bad_entries = [r[0] for r in results if not r[2]]
+        with session_scope() as s:
+            if ok_entries:
+                n = s.execute(update(Entry).where(Entry.id.in_(ok_entries), Entry.status == EntryStatus.pending)
+                              .values(status=EntryStatus.valid)).rowcount
+                stats.move_entries(s, event_id, EntryStatus.pending, EntryStatus.valid, n)
+            if ok_sigs:
+                s.execute(update(Signature).where(Signature.id.in_(ok_sigs))
+                          .values(signature_type=SignatureType.eth_signTypedData_v4, chain_id=CHAIN_ID))
+            if bad_entries:
+                n = s.execute(update(Entry).where(Entry.id.in_(bad_entries), Entry.status == EntryStatus.pending)
+                              .values(status=EntryStatus.invalid)).rowcount
+                stats.move_entries(s, event_id, EntryStatus.pending, EntryStatus.invalid, n)
+        totals["checked"] += len(results)
+        totals["valid"] += len(ok_entries)
+        totals["invalid"] += len(bad_entries)
+        for r in results:
+            if not r[2]:
+                reason = r[3].split(":")[0]
+                totals["reasons"][reason] = totals["reasons"].get(reason, 0) + 1
+        if on_progress:
+            on_progress(totals["checked"])
+    elapsed = time.perf_counter() - started
+    totals["elapsed_sec"] = round(elapsed, 3)
+    totals["sigs_per_sec"] = round(totals["checked"] / elapsed, 1) if elapsed else 0.0
+    return totals
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: python sigverify.py <event_id> [workers]")
+        sys.exit(1)
+    w = int(sys.argv[2]) if len(sys.argv) > 2 else SIG_VERIFY_WORKERS
+    print(json.dumps(verify_event_signatures(int(sys.argv[1]), w)))
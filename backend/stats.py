@@ -0,0 +1,118 @@
+# stats.py — event_stats 증분 갱신/조회/재계산
+# 실행: python stats.py reconcile [event_id]
+from __future__ import annotations
+import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import func, insert, select, update
+
+from models import session_scope, Event, EventStats, Entry, EntryStatus, Winner, ClaimStatus
+
+
+def _now():
+    return datetime.datetime.utcnow()
+
+
+def ensure_row(s, event_id: int):
+    """이벤트 생성 트랜잭션에서 호출 (이미 있으면 무시)"""
+    s.execute(
+        insert(EventStats.__table__)
+        .values(event_id=event_id)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+
+def _apply(s, event_id: int, deltas: Dict[str, int]):
+    values = {col: getattr(EventStats, col) + n for col, n in deltas.items() if n}
+    if not values:
+        return
+    values["last_activity_at"] = _now()
+    stmt = update(EventStats).where(EventStats.event_id == event_id).values(**values)
+    if s.execute(stmt).rowcount == 0:
+        # 집계 행 생성 이전에 만들어진 이벤트
+        ensure_row(s, event_id)
+        s.execute(stmt)
+
+
+def add_entries(s, event_id: int, status: EntryStatus, n: int):
+    """새 응모 n 건 (entries INSERT 와 같은 세션에서 호출)"""
+    _apply(s, event_id, {"entries_total": n, f"entries_{status.value}": n})
+
+
+def move_entries(s, event_id: int, old: EntryStatus, new: EntryStatus, n: int):
+    """응모 n 건의 상태 변경"""
+    if old is new:
+        return
+    _apply(s, event_id, {f"entries_{old.value}": -n, f"entries_{new.value}": n})
+
+
+def refresh_winners(s, event_id: int):
+    """winners 를 새로 쓴 직후 해당 이벤트의 당첨/수령 집계만 다시 계산"""
+    counts = dict(s.execute(
+        select(Winner.claim_status, func.count()).where(Winner.event_id == event_id).group_by(Winner.claim_status)
+    ).all())
+    values = {f"claims_{st.value}": counts.get(st, 0) for st in ClaimStatus}
+    values["winners_total"] = sum(counts.values())
+    values["last_activity_at"] = _now()
+    ensure_row(s, event_id)
+    s.execute(update(EventStats).where(EventStats.event_id == event_id).values(**values))
+
+
+def get_summary(s, event_id: int) -> Optional[dict]:
+    st = s.get(EventStats, event_id)
+    if st is None:
+        return None
+    return {
+        'event_id': event_id,
+        'entries': {
+            'total': st.entries_total,
+            **{status.value: getattr(st, f"entries_{status.value}") for status in EntryStatus},
+        },
+        'winners': st.winners_total,
+        'claims': {status.value: getattr(st, f"claims_{status.value}") for status in ClaimStatus},
+        'last_activity_at': st.last_activity_at,
+    }
+
+
+def reconcile(event_id: Optional[int] = None) -> int:
+    """entries/winners 에서 집계를 다시 계산해 덮어쓴다 (event_id 없으면 전체). 갱신한 이벤트 수 반환"""
+    with session_scope() as s:
+        entry_q = select(Entry.event_id, Entry.status, func.count()).group_by(Entry.event_id, Entry.status)
+        winner_q = (select(Winner.event_id, Winner.claim_status, func.count())
+                    .group_by(Winner.event_id, Winner.claim_status))
+        if event_id is not None:
+            entry_q = entry_q.where(Entry.event_id == event_id)
+            winner_q = winner_q.where(Winner.event_id == event_id)
+
+        ids_q = select(Event.id)
+        if event_id is not None:
+            ids_q = ids_q.where(Event.id == event_id)
+        rows: Dict[int, Dict[str, int]] = {
+            eid: {col: 0 for col in ("entries_total", "winners_total")} for eid in s.execute(ids_q).scalars()
+        }
+        for eid, status, n in s.execute(entry_q):
+            r = rows.setdefault(eid, {"entries_total": 0, "winners_total": 0})
+            r[f"entries_{status.value}"] = n
+            r["entries_total"] += n
+        for eid, status, n in s.execute(winner_q):
+            r = rows.setdefault(eid, {"entries_total": 0, "winners_total": 0})
+            r[f"claims_{status.value}"] = n
+            r["winners_total"] += n
+
+        for eid, counts in rows.items():
+            values = {f"entries_{st.value}": 0 for st in EntryStatus}
+            values.update({f"claims_{st.value}": 0 for st in ClaimStatus})
+            values.update(counts)
+            ensure_row(s, eid)
+            s.execute(update(EventStats).where(EventStats.event_id == eid).values(**values))
+        return len(rows)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2 or sys.argv[1] != "reconcile":
+        print("usage: python stats.py reconcile [event_id]")
+        sys.exit(1)
+    n = reconcile(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(f"✅ event_stats 재계산 완료 ({n} events)")
@@ -0,0 +1,154 @@
+# storage.py — 경품 이미지 내용 주소(sha256) 저장소 + WebP 썸네일
+# 같은 이미지는 한 번만 저장되고, URL(/api/media/<digest>[_<width>].<ext>)이 내용으로 정해지므로
+# 응답은 1년 immutable 캐시. 파일 전송은 nginx 가 X-Accel-Redirect 로 직접 (MEDIA_X_ACCEL=1).
+#
+# 배치: <UPLOAD_FOLDER>/media/ab/<digest>.<ext>, 썸네일은 <UPLOAD_FOLDER>/media/ab/<digest>_<width>.webp
+from __future__ import annotations
+import hashlib
+import os
+import re
+import tempfile
+from typing import List, Optional, Tuple
+
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', '/tmp/uploads')
+MEDIA_DIR = os.path.join(UPLOAD_FOLDER, 'media')
+MEDIA_URL = '/api/media/'
+# nginx internal location (UPLOAD_FOLDER 를 alias)
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/_media/')
+MEDIA_X_ACCEL = os.environ.get('MEDIA_X_ACCEL', '0') == '1'
+MEDIA_MAX_AGE = 31536000
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_BYTES', str(10 * 1024 * 1024)))
+THUMB_WIDTHS = tuple(int(w) for w in os.environ.get('THUMB_WIDTHS', '160,480').split(','))
+THUMB_QUALITY = int(os.environ.get('THUMB_QUALITY', '80'))
+
+# 확장자 → 파일 시그니처 (업로드 파일명/Content-Type 은 믿지 않음)
+_SIGNATURES = (
+    ('png', lambda h: h.startswith(b'\x89PNG\r\n\x1a\n')),
+    ('jpg', lambda h: h.startswith(b'\xff\xd8\xff')),
+    ('gif', lambda h: h[:6] in (b'GIF87a', b'GIF89a')),
+    ('webp', lambda h: h[:4] == b'RIFF' and h[8:12] == b'WEBP'),
+)
+MIME_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'gif': 'image/gif', 'webp': 'image/webp'}
+MEDIA_NAME_RE = re.compile(r'^(?P<digest>[0-9a-f]{64})(?:_(?P<width>\d+))?\.(?P<ext>png|jpg|gif|webp)$')
+
+
+class StorageError(Exception):
+    pass
+
+
+def _sniff(head: bytes) -> str:
+    for ext, match in _SIGNATURES:
+        if match(head):
+            return ext
+    raise StorageError('unsupported image type (png, jpg, gif, webp)')
+
+
+def media_path(name: str) -> str:
+    return os.path.join(MEDIA_DIR, name[:2], name)
+
+
+def store_image(stream, chunk_size: int = 64 * 1024) -> Tuple[str, str, bool]:
+    """업로드 스트림을 해시하면서 임시 파일로 받은 뒤 내용 주소 위치로 옮긴다.
+    (digest, 저장 경로, 새로 저장했는지) 반환. 같은 내용이 이미 있으면 임시 파일만 지움"""
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    sha = hashlib.sha256()
+    size = 0
+    head = b''
+    fd, tmp = tempfile.mkstemp(dir=MEDIA_DIR, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise StorageError(f'image too large (max {MAX_IMAGE_BYTES} bytes)')
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                sha.update(chunk)
+                out.write(chunk)
+        digest = sha.hexdigest()
+        path = media_path(f'{digest}.{_sniff(head)}')
+        if os.path.exists(path):
+            return digest, path, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+        tmp = None
+        return digest, path, True
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def parse_path(image_path: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Prize.image_path → (digest, ext). 내용 주소 저장 이전의 파일이면 None"""
+    if not image_path:
+        return None
+    m = MEDIA_NAME_RE.match(os.path.basename(image_path))
+    if not m or m.group('width'):
+        return None
+    return m.group('digest'), m.group('ext')
+
+
+def image_urls(image_path: Optional[str]) -> dict:
+    """응답용 {'image_url', 'thumb_url'} (썸네일은 가장 작은 폭)"""
+    parsed = parse_path(image_path)
+    if not parsed:
+        return {'image_url': None, 'thumb_url': None}
+    digest, ext = parsed
+    return {
+        'image_url': f'{MEDIA_URL}{digest}.{ext}',
+        'thumb_url': f'{MEDIA_URL}{digest}_{min(THUMB_WIDTHS)}.webp',
+    }
+
+
+def make_thumbnails(digest: str, src_path: str, widths=THUMB_WIDTHS) -> List[str]:
+    """원본에서 폭별 WebP 썸네일 생성 (이미 있으면 건너뜀). 만든/있는 썸네일 이름 목록 반환"""
+    from PIL import Image  # 썸네일 작업에서만 로드
+    names = []
+    with Image.open(src_path) as img:
+        img.load()
+        if img.mode not in ('RGB', 'RGBA'):
+            alpha = img.mode in ('LA', 'PA') or 'transparency' in img.info
+            img = img.convert('RGBA' if alpha else 'RGB')
+        for width in widths:
+            name = f'{digest}_{width}.webp'
+            path = media_path(name)
+            if not os.path.exists(path):
+                thumb = img.copy()
+                thumb.thumbnail((width, width * 4))  # 폭 기준, 비율 유지 (확대하지 않음)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.thumb-')
+                with os.fdopen(fd, 'wb') as out:
+                    thumb.save(out, format='WEBP', quality=THUMB_QUALITY, method=4)
+                os.replace(tmp, path)
+            names.append(name)
+    return names
+
+
+def resolve(name: str) -> Optional[str]:
+    """/api/media/<name> → 실제 파일 경로 (이름 형식이 틀리거나 파일이 없으면 None)"""
+    if not MEDIA_NAME_RE.match(name):
+        return None
+    path = media_path(name)
+    return path if os.path.exists(path) else None
+
+
+def original_for(name: str) -> Optional[str]:
+    """아직 만들어지지 않은 썸네일 요청 → 원본 media 이름"""
+    m = MEDIA_NAME_RE.match(name)
+    if not m or not m.group('width'):
+        return None
+    digest = m.group('digest')
+    for ext, _ in _SIGNATURES:
+        if os.path.exists(media_path(f'{digest}.{ext}')):
+            return f'{digest}.{ext}'
+    return None
+
+
+def mimetype_for(name: str) -> str:
+    return MIME_TYPES.get(name.rsplit('.', 1)[-1], 'application/octet-stream')
+
+
+def accel_uri(path: str) -> str:
+    return MEDIA_ACCEL_PREFIX + os.path.relpath(path, UPLOAD_FOLDER).replace(os.sep, '/')
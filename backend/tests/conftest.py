@@ -0,0 +1,77 @@
+# conftest.py — 테스트 공용 설정: 임시 sqlite 파일 하나를 primary/replica 로 함께 사용
+# 실행: cd backend && python -m pytest -q
+# models 는 import 시점에 DATABASE_URL 을 읽으므로 환경변수를 가장 먼저 설정한다.
+import datetime
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="raffle-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+# 같은 파일을 가리키는 별도 엔진 → read_engine 쪽 sqlite 함수 등록도 함께 검증됨
+os.environ["READ_DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["UPLOAD_FOLDER"] = os.path.join(_tmp, "uploads")
+os.environ["SECRET_KEY"] = "test-secret-key-at-least-32-bytes-long"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def db():
+    import models
+    models.create_all()
+    return models
+
+
+@pytest.fixture
+def event_id(db):
+    """소유자 1명 + 열린 이벤트 1개를 만들고 event id 반환"""
+    with db.session_scope() as s:
+        user = db.User(email=f"owner{os.urandom(4).hex()}@example.com", password_hash="x")
+        s.add(user)
+        s.flush()
+        start = datetime.datetime(2030, 1, 1)
+        event = db.Event(owner_id=user.id, name="test", start_at=start,
+                         end_at=start + datetime.timedelta(hours=6))
+        s.add(event)
+        s.flush()
+        return event.id
+
+
+@pytest.fixture(scope="session")
+def app(db):
+    import app as app_module
+    return app_module.create_app({"TESTING": True, "JOB_RUNNER": "off"})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def mockrpc(db):
+    """bench/mockrpc.py 를 HTTP 로 띄우고 chain 기본 클라이언트로 지정. (url, MockChain) 반환"""
+    import chain
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+    import mockrpc as mock_module
+    url, mock, server = mock_module.start()
+    chain.set_client(chain.RpcClient([url]))
+    yield url, mock
+    chain.set_client(None)
+    server.shutdown()
+
+
+def auth_headers(app, user_id: int) -> dict:
+    import jwt
+    return {"Authorization": "Bearer " + jwt.encode({"user_id": user_id}, app.config["SECRET_KEY"],
+                                                    algorithm="HS256")}
+
+
+@pytest.fixture
+def owner_headers(app, db, event_id):
+    """event_id 소유자의 Authorization 헤더"""
+    with db.session_scope() as s:
+        return auth_headers(app, s.get(db.Event, event_id).owner_id)
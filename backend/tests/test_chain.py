@@ -0,0 +1,51 @@
+# test_chain.py — 서명 + eth_sendRawTransaction 1회 (bench/mockrpc.py HTTP 노드 상대로)
+import pytest
+from eth_account import Account
+
+import chain
+
+KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"  # Hardhat 계정 #0
+TO = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+
+
+def test_send_transaction_signs_and_broadcasts(mockrpc):
+    _, mock = mockrpc
+    tx_hash, tx = chain.send_transaction(KEY, TO, "0x12345678")
+    raw = mock.raw_txs[tx_hash]
+    assert raw.startswith("0x")
+    assert Account.recover_transaction(raw) == Account.from_key(KEY).address
+    assert tx["nonce"] == 0
+    assert chain.wait_for_receipt(tx_hash, timeout=5, poll=0.01)["status"] == "0x1"
+
+
+def _client(mock, error):
+    """eth_sendRawTransaction 을 error 로 한 번 거부하는 transport"""
+    state = {"sends": 0}
+
+    def transport(url, payload, timeout):
+        if isinstance(payload, dict) and payload["method"] == "eth_sendRawTransaction":
+            state["sends"] += 1
+            mock.transport(url, payload, timeout)  # 노드에는 들어감 (already known 재현용)
+            if state["sends"] == 1:
+                return {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": -32000, "message": error}}
+        return mock.transport(url, payload, timeout)
+    return chain.RpcClient(["mock"], transport=transport), state
+
+
+def test_already_known_is_not_sent_twice(mockrpc):
+    _, mock = mockrpc
+    client, state = _client(mock, "already known")
+    key = "0x7c852118294e51e653712a81e05800f419141751be58f605c371e15141b007a6"  # Hardhat 계정 #3
+    tx_hash, tx = chain.send_transaction(key, TO, "0x12345678", client=client)
+    assert state["sends"] == 1 and tx_hash in mock.raw_txs and tx["nonce"] == 0
+
+
+def test_failed_send_releases_nonce(mockrpc):
+    _, mock = mockrpc
+    client, _ = _client(mock, "upstream 502")
+    key = "0x47e179ec197488593b187f80a00eb0da91f1b9d0b13f8733639f19c30a34926a"  # Hardhat 계정 #4
+    address = Account.from_key(key).address
+    with pytest.raises(chain.RpcError):
+        chain.send_transaction(key, TO, "0x12345678", client=client)
+    # 구멍 없이 같은 nonce 를 다시 씀
+    assert chain.send_transaction(key, TO, "0x12345678", client=client)[1]["nonce"] == mock.nonces.get(address.lower(), 0)
@@ -0,0 +1,38 @@
+# test_dedup.py — 필터는 백그라운드에서 적재되고(그동안은 DB 로 판정), email 중복은 정규화 해시로 찾는지
+import threading
+import time
+
+import dedup
+
+
+def _wait_for_filter(event_id):
+    for _ in range(200):
+        if event_id not in dedup._rebuilding:
+            return dedup._filters.get(event_id)[0]
+        time.sleep(0.01)
+    raise AssertionError("filter not warmed")
+
+
+def test_duplicate_email_matches_stored_case(db, event_id):
+    with db.session_scope() as s:
+        s.add(db.Entry(event_id=event_id, email="Mixed@Example.com", status=db.EntryStatus.valid))
+    # 필터 준비 전(None)이든 후든 같은 답
+    assert dedup.check(event_id, "mixed@example.com", None) == "duplicate_email"
+    _wait_for_filter(event_id)
+    assert dedup.check(event_id, "mixed@example.com", None) == "duplicate_email"
+    assert dedup.check(event_id, "other@example.com", None) is None
+
+
+def test_expired_filter_is_served_while_rebuilding(db, event_id, monkeypatch):
+    assert dedup.get_filter(event_id) is None  # 첫 사용: 요청 스레드는 기다리지 않음
+    old = _wait_for_filter(event_id)
+
+    release = threading.Event()
+    warm = dedup._warm
+    monkeypatch.setattr(dedup, "_warm", lambda *a: release.wait(5) and warm(*a))
+    monkeypatch.setattr(dedup, "DEDUP_TTL", 0)
+    assert dedup.get_filter(event_id) is old  # 만료됐지만 새 필터 준비 전까지 그대로
+    dedup.remember(event_id, "late@example.com", None)  # 적재 중에 들어온 값
+    release.set()
+    new = _wait_for_filter(event_id)
+    assert new is not old and dedup.email_key("late@example.com") in new
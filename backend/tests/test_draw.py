@@ -0,0 +1,47 @@
+# test_draw.py — 온체인 래플은 컨트랙트 규칙을 재현해 검증만 하고 winners 를 덮어쓰지 않는다
+from sqlalchemy import func, select, update
+
+import draw
+
+CONTRACT = "0x5fbdb2315678afecb367f032d93f642f64180aa3"
+
+
+def test_contract_winners_probe_linearly():
+    seed = draw.seed_bytes("0x1234")
+    entrants = [f"0x{i:040x}" for i in range(5)]
+    winners = draw.contract_winners(entrants, seed, 5)
+    assert sorted(winners) == entrants  # 전원 당첨이면 중복 없이 모두
+
+
+def test_onchain_event_is_verified_not_redrawn(db, event_id):
+    entrants = ["0x" + f"{i + 1:02x}" * 20 for i in range(6)]
+    word = "0x" + "ab" * 32
+    with db.session_scope() as s:
+        s.execute(update(db.Event).where(db.Event.id == event_id).values(
+            consumer_contract_address=CONTRACT, onchain_raffle_id=3, randomness_value=word))
+        prize = db.Prize(event_id=event_id, name="p", winners_count=2)
+        s.add(prize)
+        # 인덱서가 Entered(totalEntrants) 로 기록한 컨트랙트 배열 위치
+        entries = [db.Entry(event_id=event_id, wallet_address=a, status=db.EntryStatus.valid, onchain_index=i)
+                   for i, a in enumerate(entrants)]
+        s.add_all(entries)
+        s.flush()
+        by_wallet = {e.wallet_address: e.id for e in entries}
+        # 인덱서가 WinnersDrawn 으로 넣었을 당첨자
+        for addr in draw.contract_winners(entrants, draw.seed_bytes(word), 2):
+            s.add(db.Winner(event_id=event_id, prize_id=prize.id, entry_id=by_wallet[addr]))
+
+    assert draw.draw_event(event_id)["verified"] is True
+    # randomness_value 가 저장 값과 다르면 다른 당첨자가 계산되어 불일치
+    with db.session_scope() as s:
+        s.execute(update(db.Event).where(db.Event.id == event_id).values(randomness_value="0x" + "cd" * 32))
+    assert draw.verify_onchain(event_id)["verified"] is False
+
+    # 응모자 배열에 빈 자리가 있으면(인덱서가 덜 따라잡음) 판단 보류, 저장된 당첨자는 그대로
+    with db.session_scope() as s:
+        s.execute(update(db.Entry).where(db.Entry.wallet_address == entrants[2]).values(onchain_index=None))
+    result = draw.verify_onchain(event_id)
+    assert result["verified"] is None and result["reason"] == "entrants_incomplete"
+    with db.session_scope() as s:
+        assert s.execute(select(func.count()).select_from(db.Winner)
+                         .where(db.Winner.event_id == event_id)).scalar() == 2
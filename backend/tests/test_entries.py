@@ -0,0 +1,38 @@
+# test_entries.py — 공개 응모가 응모 기간 밖이나 과도한 추가 항목을 거절하는지
+import datetime
+import os
+
+import pytest
+from sqlalchemy import update
+
+import entries
+
+
+@pytest.fixture
+def open_event(db, event_id):
+    now = datetime.datetime.utcnow()
+    with db.session_scope() as s:
+        s.execute(update(db.Event).where(db.Event.id == event_id).values(
+            status=db.EventStatus.open, start_at=now - datetime.timedelta(hours=1),
+            end_at=now + datetime.timedelta(hours=1)))
+    return event_id
+
+
+def _entry(**extra):
+    return {"nickname": "n", "wallet_address": "0x" + os.urandom(20).hex(), **extra}
+
+
+def test_entry_before_start_is_rejected(db, event_id):
+    # conftest 이벤트는 2030 년 시작
+    with pytest.raises(entries.EntryError, match="not started"):
+        entries.validate(event_id, _entry())
+
+
+def test_entry_metadata_is_limited(open_event):
+    values = entries.validate(open_event, _entry(team="blue"))
+    assert values["entry_metadata"] == {"team": "blue"}
+    too_many = {f"k{i}": "v" for i in range(entries.ENTRY_METADATA_MAX_KEYS + 1)}
+    with pytest.raises(entries.EntryError, match="too_many_fields"):
+        entries.validate(open_event, _entry(**too_many))
+    with pytest.raises(entries.EntryError, match="field_too_long"):
+        entries.validate(open_event, _entry(note="x" * (entries.ENTRY_METADATA_MAX_VALUE_LEN + 1)))
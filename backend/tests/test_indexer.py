@@ -0,0 +1,127 @@
+# test_indexer.py — WinnersDrawn 의 randomWord 를 구하지 못한 로그만 건너뛰고 나머지는 반영되는지,
+# reorg 로 되감은 블록 이후의 기록이 되돌려지는지, 시작 블록 없이 첫 동기화를 거부하는지
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+import chain
+import draw
+import indexer
+
+CONTRACT = "0x5fbdb2315678afecb367f032d93f642f64180aa3"
+WORD = "ab" * 32
+
+
+def _client(tx_inputs: dict) -> chain.RpcClient:
+    """eth_getTransactionByHash 는 tx_inputs 에 있는 것만, 과거 블록 eth_call 은 아카이브가 없는 노드처럼 실패"""
+    def answer(p):
+        method, params = p["method"], p["params"]
+        if method == "eth_getBlockByNumber":
+            return {"result": {"timestamp": hex(1_900_000_000), "hash": "0x00"}}
+        if method == "eth_getTransactionByHash" and params[0] in tx_inputs:
+            return {"result": {"to": CONTRACT, "input": tx_inputs[params[0]]}}
+        if method == "eth_getTransactionByHash":
+            return {"result": None}
+        return {"error": {"code": -32000, "message": "missing trie node"}}
+
+    def transport(url, payload, timeout=None):
+        return [{"jsonrpc": "2.0", "id": p["id"], **answer(p)} for p in payload]
+    return chain.RpcClient(["http://mock"], transport=transport)
+
+
+def _drawn(raffle_id, tx_hash, winner):
+    return {"name": "WinnersDrawn", "contract": CONTRACT, "raffle_id": raffle_id, "block_number": 10,
+            "log_index": raffle_id, "tx_hash": tx_hash, "winners": [winner]}
+
+
+def _onchain_event(db, raffle_id, **kw):
+    with db.session_scope() as s:
+        owner = db.User(email=f"idx{raffle_id}@example.com", password_hash="x")
+        s.add(owner)
+        s.flush()
+        event = db.Event(owner_id=owner.id, name="e", start_at=datetime.datetime(2030, 1, 1),
+                         end_at=datetime.datetime(2030, 1, 2), consumer_contract_address=CONTRACT,
+                         onchain_raffle_id=raffle_id, **kw)
+        s.add(event)
+        s.flush()
+        s.add(db.Prize(event_id=event.id, name="p", winners_count=1))
+        return event.id
+
+
+def test_missing_random_word_degrades_per_log(db):
+    ids = []
+    for raffle_id in (11, 12):
+        event_id = _onchain_event(db, raffle_id, randomness_value="0x01")
+        with db.session_scope() as s:
+            s.add(db.Entry(event_id=event_id, wallet_address="0x" + f"{raffle_id:02x}" * 20,
+                           status=db.EntryStatus.valid))
+        ids.append(event_id)
+
+    fulfil = indexer.FULFILL_SELECTOR + f"{7:064x}" + WORD
+    items = [_drawn(11, "0xaa", "0x" + "0b" * 20), _drawn(12, "0xbb", "0x" + "0c" * 20)]
+    with db.session_scope() as s:
+        indexer.apply_logs(s, items, _client({"0xaa": fulfil}))
+
+    with db.session_scope() as s:
+        rows = dict(s.execute(select(db.Event.id, db.Event.randomness_value).where(db.Event.id.in_(ids))).all())
+        status = set(s.execute(select(db.Event.status).where(db.Event.id.in_(ids))).scalars())
+        winners = s.execute(select(db.Winner.event_id).where(db.Winner.event_id.in_(ids))).scalars().all()
+    assert rows[ids[0]] == "0x" + WORD  # 이행 트랜잭션 입력에서
+    assert rows[ids[1]] == "0x01"  # 못 구함 → 기존 값 유지
+    assert status == {db.EventStatus.drawn}
+    assert sorted(winners) == ids
+
+
+def test_unwind_reverts_orphaned_blocks(db):
+    event_id = _onchain_event(db, 13, status=db.EventStatus.open)
+    user = indexer.to_checksum_address("0x" + "0d" * 20)
+    base = {"contract": CONTRACT, "raffle_id": 13, "tx_hash": "0x" + "cc" * 32}
+    items = [
+        {**base, "name": "Entered", "block_number": 20, "log_index": 0, "user": user, "total": 1},
+        {**base, "name": "Locked", "block_number": 21, "log_index": 0, "total": 1},
+        {**base, "name": "VRFRequested", "block_number": 21, "log_index": 1, "request_id": 5,
+         "tx_hash": "0x" + "dd" * 32},
+        {**base, "name": "WinnersDrawn", "block_number": 22, "log_index": 0, "winners": [user]},
+    ]
+    with db.session_scope() as s:
+        indexer.apply_logs(s, items, _client({}))
+
+    def state():
+        with db.session_scope() as s:
+            return (s.get(db.Event, event_id).status,
+                    s.execute(select(db.VRFRequest.status).where(db.VRFRequest.event_id == event_id)).scalars().all(),
+                    s.execute(select(db.Winner.id).where(db.Winner.event_id == event_id)).scalars().all(),
+                    s.execute(select(db.Entry.status).where(db.Entry.event_id == event_id)).scalars().all())
+
+    assert state()[0] == db.EventStatus.drawn and len(state()[2]) == 1
+    with db.session_scope() as s:
+        assert draw.load_onchain_entrants(s, event_id) == [user]
+    with db.session_scope() as s:
+        indexer.unwind(s, 21)  # WinnersDrawn 블록만 버려짐
+    assert state() == (db.EventStatus.drawing, [db.VRFStatus.requested], [], [db.EntryStatus.valid])
+    with db.session_scope() as s:
+        indexer.unwind(s, 19)  # 응모/요청까지 버려짐
+    assert state() == (db.EventStatus.closed, [], [], [db.EntryStatus.pending])
+
+
+def test_first_sync_requires_start_block(db, monkeypatch):
+    monkeypatch.setattr(indexer, "INDEXER_START_BLOCK", None)
+    monkeypatch.setattr(indexer, "CONTRACT_ADDRESS", CONTRACT)
+    client = chain.RpcClient(["http://mock"], transport=lambda url, payload, timeout=None:
+                             {"jsonrpc": "2.0", "id": payload["id"], "result": hex(100_000)})
+    with pytest.raises(RuntimeError, match="INDEXER_START_BLOCK"):
+        indexer.sync_once(client)
+
+
+def test_late_fulfilment_of_expired_request(db):
+    event_id = _onchain_event(db, 14, status=db.EventStatus.drawing)
+    with db.session_scope() as s:
+        # 스케줄러 expire_vrf 가 시간 초과로 failed 표시한 요청
+        s.add(db.VRFRequest(event_id=event_id, request_id="9", status=db.VRFStatus.failed))
+    item = {**_drawn(14, "0x" + "ee" * 32, "0x" + "0e" * 20), "block_number": 30}
+    with db.session_scope() as s:
+        indexer.apply_logs(s, [item], _client({}))
+    with db.session_scope() as s:
+        status = s.execute(select(db.VRFRequest.status).where(db.VRFRequest.event_id == event_id)).scalar()
+    assert status == db.VRFStatus.fulfilled
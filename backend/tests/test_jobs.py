@@ -0,0 +1,43 @@
+# test_jobs.py — 긴 핸들러 실행 중 heartbeat, 재시도하지 않는 실패(JobFailed)
+import time
+
+import jobs
+
+
+def _job(db, job_id):
+    with db.session_scope() as s:
+        job = s.get(db.Job, job_id)
+        return job.status, job.heartbeat_at, job.error_message
+
+
+def _claim(job_id):
+    assert jobs._claim_next("test-worker") == job_id
+
+
+def test_heartbeat_while_handler_runs(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SEC", 0.05)
+    seen = {}
+
+    @jobs.job_handler("test_long_step")
+    def long_step(ctx):
+        seen["start"] = _job(db, ctx.job_id)[1]
+        time.sleep(1.2)  # set_progress 없이 오래 걸리는 한 단계
+        seen["later"] = _job(db, ctx.job_id)[1]
+
+    job_id = jobs.enqueue("test_long_step")
+    _claim(job_id)
+    jobs.run_job(job_id)
+    assert seen["later"] > seen["start"]
+    assert _job(db, job_id)[0] == db.JobStatus.succeeded
+
+
+def test_job_failed_is_not_retried(db):
+    @jobs.job_handler("test_bad_input")
+    def bad_input(ctx):
+        raise jobs.JobFailed("unknown csv columns: x")
+
+    job_id = jobs.enqueue("test_bad_input", max_attempts=3)
+    _claim(job_id)
+    jobs.run_job(job_id)
+    status, _, error = _job(db, job_id)
+    assert status == db.JobStatus.failed and error == "unknown csv columns: x"
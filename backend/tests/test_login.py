@@ -0,0 +1,32 @@
+# test_login.py — 기본 해시 방식, 가입 직후 로그인, X-Real-IP 는 믿을 수 있는 프록시에서만
+import os
+
+import pytest
+
+import app as app_module
+import passwords
+
+
+@pytest.fixture
+def throttled_ips(monkeypatch):
+    seen = []
+    monkeypatch.setattr(passwords, "throttle", lambda ip, email=None: seen.append(ip))
+    return seen
+
+
+def test_register_then_login_uses_werkzeug_scrypt(db, client, throttled_ips):
+    creds = {"email": f"u{os.urandom(4).hex()}@example.com", "password": "correct horse"}
+    assert client.post("/api/register", json=creds).status_code == 201
+    with db.session_scope() as s:
+        stored = s.query(db.User.password_hash).filter_by(email=creds["email"]).scalar()
+    assert stored.startswith("scrypt:32768:8:1$") and not passwords.needs_rehash(stored)
+    assert client.post("/api/login", json=creds).status_code == 200
+
+
+@pytest.mark.parametrize("trusted, expected", [([], "10.0.0.5"), (["10.0.0.0/8"], "203.0.113.7")])
+def test_real_ip_only_from_trusted_proxy(client, throttled_ips, monkeypatch, trusted, expected):
+    monkeypatch.setattr(app_module, "TRUSTED_PROXIES", trusted)
+    app_module._proxy_networks.clear()
+    client.post("/api/login", json={"email": "nobody@example.com", "password": "x"},
+                headers={"X-Real-IP": "203.0.113.7"}, environ_base={"REMOTE_ADDR": "10.0.0.5"})
+    assert throttled_ips[-1] == expected
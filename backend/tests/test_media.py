@@ -0,0 +1,34 @@
+# test_media.py — 경품 이미지: 잘못된 폼은 파일을 남기지 않고, X-Accel 응답은 이미지 Content-Type
+import io
+import os
+
+import storage
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def _media_files():
+    if not os.path.isdir(storage.MEDIA_DIR):
+        return []
+    return [n for _, _, names in os.walk(storage.MEDIA_DIR) for n in names]
+
+
+def test_bad_winners_count_leaves_no_file(client, event_id, owner_headers):
+    before = _media_files()
+    resp = client.post("/api/prizes", headers=owner_headers, content_type="multipart/form-data", data={
+        "event_id": str(event_id), "name": "p", "winners_count": "two",
+        "image": (io.BytesIO(PNG + b"bad-form"), "p.png")})
+    assert resp.status_code == 400
+    assert _media_files() == before
+
+
+def test_accel_redirect_has_image_content_type(client, event_id, owner_headers, monkeypatch):
+    resp = client.post("/api/prizes", headers=owner_headers, content_type="multipart/form-data", data={
+        "event_id": str(event_id), "name": "p", "winners_count": "1",
+        "image": (io.BytesIO(PNG), "p.png")})
+    assert resp.status_code == 201
+    name = os.path.basename(resp.get_json()["image_path"])
+    monkeypatch.setattr(storage, "MEDIA_X_ACCEL", True)
+    resp = client.get(f"/api/media/{name}")
+    assert resp.headers["X-Accel-Redirect"].endswith(name)
+    assert resp.mimetype == "image/png"
@@ -0,0 +1,45 @@
+# test_models_sqlite.py — sqlite 에서 create_all / 생성 컬럼 / 체크 제약 / 기존 스키마 migrate 가 동작하는지
+import hashlib
+import tempfile
+
+from sqlalchemy import create_engine, event, inspect, select
+
+
+def test_email_hash_generated_column(db, event_id):
+    with db.session_scope() as s:
+        s.add(db.Entry(event_id=event_id, nickname="n", email="Foo@Example.com",
+                       wallet_address="0x" + "1" * 40, status=db.EntryStatus.valid))
+    expected = hashlib.sha256(b"foo@example.com").digest()
+    with db.session_scope() as s:
+        assert s.execute(select(db.Entry.email_hash).where(db.Entry.event_id == event_id)).scalar() == expected
+
+
+def test_read_engine_has_sqlite_functions(db, event_id):
+    # READ_DATABASE_URL 이 별도 sqlite 엔진 → 가상 컬럼 계산에 SHA2/UNHEX 등록이 필요
+    assert db.read_engine is not db.engine
+    with db.session_scope() as s:
+        s.add(db.Entry(event_id=event_id, nickname="r", email="reader@example.com",
+                       wallet_address="0x" + "2" * 40, status=db.EntryStatus.valid))
+    with db.read_session_scope() as s:
+        digest = s.execute(select(db.Entry.email_hash).where(db.Entry.email == "reader@example.com")).scalar()
+    assert digest == hashlib.sha256(b"reader@example.com").digest()
+
+
+def test_migrate_adds_missing_column_and_indexes(db):
+    eng = create_engine(f"sqlite:///{tempfile.mkdtemp()}/old.db")
+    event.listen(eng, "connect", db._sqlite_functions)
+    with eng.begin() as conn:
+        db.Base.metadata.create_all(bind=conn)
+        # onchain_raffle_id 도입 이전 스키마로 되돌림
+        for name in ("idx_events_contract_raffle", "idx_events_owner_created", "idx_prizes_event_created"):
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+        conn.exec_driver_sql("ALTER TABLE events DROP COLUMN onchain_raffle_id")
+
+    for _ in range(2):  # 두 번째 실행은 아무것도 안 함
+        with eng.begin() as conn:
+            db.migrate(conn)
+
+    insp = inspect(eng)
+    assert "onchain_raffle_id" in {c["name"] for c in insp.get_columns("events")}
+    assert {"idx_events_contract_raffle", "idx_events_owner_created"} <= {i["name"] for i in insp.get_indexes("events")}
+    assert "idx_prizes_event_created" in {i["name"] for i in insp.get_indexes("prizes")}
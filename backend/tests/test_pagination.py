@@ -0,0 +1,34 @@
+# test_pagination.py — 같은 초에 생긴 행이 많아도 sqlite 에서 커서가 끝까지 진행하는지
+import datetime
+
+import pytest
+from sqlalchemy import literal_column, select, update
+
+from pagination import decode_cursor, keyset_page
+
+
+def _all_pages(db, event_id, limit=2):
+    stmt = select(db.Entry.id, db.Entry.created_at).where(db.Entry.event_id == event_id)
+    seen, cursor = [], None
+    for _ in range(10):
+        with db.read_session_scope() as s:
+            rows, next_cursor = keyset_page(s, stmt, db.Entry.created_at, db.Entry.id, cursor, limit)
+        seen += [r.id for r in rows]
+        if not next_cursor:
+            break
+        cursor = decode_cursor(next_cursor)
+    return seen
+
+
+# CURRENT_TIMESTAMP 로 저장된 값('...:SS') / ORM 이 datetime 으로 넣은 값('...:SS.000000')
+@pytest.mark.parametrize("created_at", [literal_column("'2030-01-01 12:00:00'"),
+                                        datetime.datetime(2030, 1, 1, 12, 0, 0)])
+def test_cursor_advances_within_same_second(db, event_id, created_at):
+    with db.session_scope() as s:
+        for i in range(5):
+            s.add(db.Entry(event_id=event_id, nickname=f"p{i}", email=f"p{i}@example.com",
+                           status=db.EntryStatus.valid))
+        s.flush()
+        s.execute(update(db.Entry).where(db.Entry.event_id == event_id).values(created_at=created_at))
+    seen = _all_pages(db, event_id)
+    assert len(seen) == 5 and seen == sorted(seen, reverse=True)
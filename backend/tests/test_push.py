@@ -0,0 +1,28 @@
+# test_push.py — 스레드 모드 SSE 는 프로세스당 상한을 넘으면 503, 연결이 닫히면 슬롯 반환
+import push
+
+
+def test_thread_stream_cap(client, event_id, monkeypatch):
+    monkeypatch.setattr(push, "thread_slots", push.StreamSlots(1, "thread"))
+    first = client.get(f"/api/events/{event_id}/stream", buffered=False)
+    assert first.status_code == 200
+    assert next(first.response).startswith(b"retry:")
+
+    busy = client.get(f"/api/events/{event_id}/stream")
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == str(push.PUSH_BUSY_RETRY)
+
+    first.close()
+    assert push.thread_slots.open == 0
+    second = client.get(f"/api/events/{event_id}/stream", buffered=False)
+    assert second.status_code == 200
+    second.close()
+
+
+def test_release_is_idempotent():
+    slots = push.StreamSlots(1, "async")
+    release = slots.acquire()
+    assert slots.acquire() is None
+    release()
+    release()
+    assert slots.open == 0
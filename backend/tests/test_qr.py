@@ -0,0 +1,32 @@
+# test_qr.py — /api/events/<id>/qr: 없는 이벤트 404, 크기 제한, 렌더링 없는 304
+import os
+
+import qr
+
+
+def test_unknown_event_is_404(client):
+    assert client.get("/api/events/999999/qr").status_code == 404
+
+
+def test_size_is_clamped(client, event_id):
+    resp = client.get(f"/api/events/{event_id}/qr?size=100000")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == f'"{qr.cache_key(event_id, qr.QR_MAX_SIZE, "png")}"'
+
+
+def test_not_modified_skips_render(client, event_id, monkeypatch):
+    etag = client.get(f"/api/events/{event_id}/qr?format=svg").headers["ETag"]
+    monkeypatch.setattr(qr, "get_qr", lambda *a, **k: (_ for _ in ()).throw(AssertionError("rendered")))
+    resp = client.get(f"/api/events/{event_id}/qr?format=svg", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+
+def test_disk_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr, "QR_CACHE_DIR", str(tmp_path))
+    for i in range(5):
+        path = qr._disk_path(qr.cache_key(i), "png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x")
+    assert qr.prune_disk(max_files=2) == 3
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 2
@@ -0,0 +1,57 @@
+# test_relayer.py — 서명 응모를 enterWithSig 로 서명·배치 전송하는지 (bench/mockrpc.py 상대로)
+import json
+import os
+import time
+
+import rlp
+from eth_account import Account
+from eth_keys import keys
+
+import relayer
+import sigverify
+
+SPONSOR_KEY = "0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d"  # Hardhat 계정 #1
+CONTRACT = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+
+
+def _seed_signed(db, event_id, n):
+    domain_sep = sigverify.domain_separator(sigverify.RAFFLE_NAME, sigverify.RAFFLE_VERSION, 31337, CONTRACT)
+    deadline = int(time.time()) + 3600
+    with db.session_scope() as s:
+        s.get(db.Event, event_id).consumer_contract_address = CONTRACT
+        for _ in range(n):
+            pk = keys.PrivateKey(os.urandom(32))
+            user = pk.public_key.to_checksum_address()
+            # eth_keys 서명은 v 가 0/1
+            sig = pk.sign_msg_hash(sigverify.entry_digest(domain_sep, user, 1, 0, deadline)).to_bytes()
+            signature = db.Signature(event_id=event_id, wallet_address=user, signature="0x" + sig.hex(),
+                                     signature_type=db.SignatureType.eth_signTypedData_v4, chain_id=31337,
+                                     message=json.dumps({"user": user, "raffleId": 1, "nonce": 0,
+                                                         "deadline": deadline}))
+            s.add(signature)
+            s.flush()
+            s.add(db.Entry(event_id=event_id, wallet_address=user, signature_id=signature.id,
+                           status=db.EntryStatus.valid))
+
+
+def test_relay_event_signs_and_broadcasts(db, event_id, mockrpc):
+    _, mock = mockrpc
+    mock.calls["0x" + relayer.ENTERED_SELECTOR.hex()] = 0
+    mock.calls["0x" + relayer.NONCES_SELECTOR.hex()] = 0
+    _seed_signed(db, event_id, 3)
+
+    totals = relayer.relay_event(event_id, relayer.sponsors([SPONSOR_KEY]))
+
+    assert totals["sent"] == 3 and totals["send_failed"] == 0
+    assert len(mock.raw_txs) == 3
+    for raw in mock.raw_txs.values():
+        assert Account.recover_transaction(raw) == Account.from_key(SPONSOR_KEY).address
+        data = rlp.decode(bytes.fromhex(raw[2:]))[5]  # legacy tx: [nonce, gasPrice, gas, to, value, data, ...]
+        assert data[:4] == relayer.ENTER_SELECTOR and data[4 + 5 * 32 + 64] in (27, 28)
+
+
+def test_encode_enter_normalises_v():
+    sig = "0x" + "11" * 64 + "01"
+    data = bytes.fromhex(relayer.encode_enter(CONTRACT, 0, 1, sig)[2:])
+    # selector(4) + user/nonce/deadline/offset/length(5*32) + r||s(64) 다음이 v
+    assert data[4 + 5 * 32 + 64] == 28
@@ -0,0 +1,96 @@
+# test_scheduler.py — lock 트랜잭션을 전송하기 전에 pending 으로 기록하는지, 거부된 전송은 failed 로 남는지,
+# 진행할 수 없는 이벤트가 후보 창에서 빠지는지
+import datetime
+import os
+import sys
+
+import pytest
+from sqlalchemy import select
+
+import chain
+import scheduler
+
+KEY = "0x5de4111afa1a4b94908f83103eb1f1706367c2e68ca870fc3d73ff3c5e3c8b18"  # Hardhat 계정 #2 (nonce 테스트 분리)
+NOW = datetime.datetime(2030, 1, 2)
+
+
+@pytest.fixture
+def mock_chain():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+    import mockrpc
+    return mockrpc.MockChain(calls={scheduler.PHASE_SELECTOR: scheduler.PHASE_ENTER,
+                                    scheduler.RAFFLE_ID_SELECTOR: 1})
+
+
+@pytest.fixture
+def closed_event(db, event_id):
+    with db.session_scope() as s:
+        event = s.get(db.Event, event_id)
+        event.status = db.EventStatus.closed
+        # 이벤트마다 다른 컨트랙트 (scheduler 는 컨트랙트당 현재 라운드 이벤트 1개만 진행)
+        event.consumer_contract_address = "0x" + os.urandom(20).hex()
+        event.onchain_raffle_id = 1
+    return event_id
+
+
+def _tx_statuses(db, event_id):
+    with db.session_scope() as s:
+        return s.execute(select(db.TxLog.status).where(db.TxLog.event_id == event_id)).scalars().all()
+
+
+def _client(mock_chain, on_send):
+    def transport(url, payload, timeout):
+        for req in payload if isinstance(payload, list) else [payload]:
+            if req["method"] == "eth_sendRawTransaction":
+                rejected = on_send()
+                if rejected:
+                    return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32000, "message": rejected}}
+        return mock_chain.transport(url, payload, timeout)
+    return chain.RpcClient(["mock"], transport=transport)
+
+
+def test_lock_is_recorded_before_broadcast(db, closed_event, mock_chain):
+    seen = []
+    client = _client(mock_chain, lambda: seen.append(_tx_statuses(db, closed_event)))
+    sched = scheduler.Scheduler(private_key=KEY, client=client)
+
+    assert sched.tick(NOW)["sent"] == 1
+    assert seen == [[db.TxStatus.pending]]
+    # 영수증 전이라 다음 틱은 같은 단계를 다시 보내지 않음
+    assert sched.tick(NOW)["sent"] == 0
+    assert len(mock_chain.raw_txs) == 1
+
+
+def test_rejected_send_is_marked_failed(db, closed_event, mock_chain):
+    client = _client(mock_chain, lambda: "insufficient funds for gas * price + value")
+    sched = scheduler.Scheduler(private_key=KEY, client=client)
+
+    assert sched.tick(NOW)["sent"] == 0
+    assert _tx_statuses(db, closed_event) == [db.TxStatus.failed]
+    # 재시도 간격(SCHEDULER_RETRY_DELAY) 전에는 다시 보내지 않음
+    assert sched.tick(NOW)["sent"] == 0
+
+
+def _closed_copy(db, event_id, **values):
+    with db.session_scope() as s:
+        src = s.get(db.Event, event_id)
+        event = db.Event(owner_id=src.owner_id, name="copy", start_at=src.start_at, end_at=src.end_at,
+                         status=db.EventStatus.closed, **values)
+        s.add(event)
+        s.flush()
+        return event.id
+
+
+def test_stuck_events_leave_the_candidate_window(db, closed_event, mock_chain, monkeypatch):
+    monkeypatch.setattr(scheduler, "CONTRACT_ADDRESS", None)
+    no_contract = _closed_copy(db, closed_event, consumer_contract_address=None)
+    # 컨트랙트는 이미 2 라운드 → raffleId 1 이벤트는 더 진행할 수 없음
+    mock_chain.calls[scheduler.RAFFLE_ID_SELECTOR] = 2
+    sched = scheduler.Scheduler(private_key=KEY, client=_client(mock_chain, lambda: None))
+
+    ids = {e["event_id"] for e in scheduler._candidates(NOW)}
+    assert closed_event in ids and no_contract not in ids
+    assert sched.tick(NOW)["sent"] == 0
+    assert closed_event in sched._skip
+    assert closed_event not in {e["event_id"] for e in scheduler._candidates(NOW, frozenset(sched._skip))}
+
@@ -0,0 +1,85 @@
+# test_sigverify.py — enterWithSig 서명 검증: 이벤트별 도메인/raffleId, low-s, sqlite 에서의 페이지 단위 반영
+import json
+import time
+
+from eth_account import Account
+from sqlalchemy import update
+
+import sigverify
+
+KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"  # Hardhat 계정 #0
+CONTRACT = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+
+
+def _sign(raffle_id: int, nonce: int, contract: str = CONTRACT) -> tuple:
+    acct = Account.from_key(KEY)
+    msg = {"user": acct.address, "raffleId": raffle_id, "nonce": nonce, "deadline": int(time.time()) + 3600}
+    signed = Account.sign_typed_data(
+        KEY,
+        {"name": sigverify.RAFFLE_NAME, "version": sigverify.RAFFLE_VERSION,
+         "chainId": sigverify.CHAIN_ID, "verifyingContract": contract},
+        {"Entry": [{"name": "user", "type": "address"}, {"name": "raffleId", "type": "uint256"},
+                   {"name": "nonce", "type": "uint256"}, {"name": "deadline", "type": "uint256"}]},
+        msg)
+    return acct.address, json.dumps(msg), "0x" + bytes(signed.signature).hex()
+
+
+def _flip_s(signature: str) -> str:
+    v, r, s = sigverify.split_signature(signature)
+    high = sigverify.SECP256K1_N - s
+    return "0x" + (r.to_bytes(32, "big") + high.to_bytes(32, "big") + bytes([28 - v])).hex()
+
+
+def _verify(item, raffle_id=7, contract=CONTRACT):
+    domain = sigverify.domain_separator(sigverify.RAFFLE_NAME, sigverify.RAFFLE_VERSION,
+                                        sigverify.CHAIN_ID, contract)
+    return next(sigverify.verify_batch([item], workers=1, domain_sep=domain, raffle_id=raffle_id))[0]
+
+
+def test_valid_signature():
+    wallet, message, signature = _sign(7, 0)
+    assert _verify((1, None, wallet, message, signature))[2]
+
+
+def test_raffle_and_domain_are_checked():
+    wallet, message, signature = _sign(8, 0)
+    assert _verify((1, None, wallet, message, signature))[3] == "raffle_mismatch"
+    wallet, message, signature = _sign(7, 0, contract="0x" + "1" * 40)
+    assert _verify((1, None, wallet, message, signature))[3] == "bad_sig"
+
+
+def test_high_s_is_rejected():
+    wallet, message, signature = _sign(7, 0)
+    high = _flip_s(signature)
+    # 같은 주소로 복원되지만 컨트랙트는 거부하는 서명
+    assert sigverify.recover(sigverify.entry_digest(
+        sigverify.domain_separator(sigverify.RAFFLE_NAME, sigverify.RAFFLE_VERSION, sigverify.CHAIN_ID, CONTRACT),
+        wallet, 7, 0, json.loads(message)["deadline"]), high) == wallet
+    assert _verify((1, None, wallet, message, high))[3] == "high_s"
+
+
+def test_raw_v_is_rejected():
+    wallet, message, signature = _sign(7, 0)
+    raw_v = signature[:-2] + "%02x" % (int(signature[-2:], 16) - 27)
+    # 복원은 되지만 컨트랙트의 ECDSA 는 v 0/1 을 거부
+    assert _verify((1, None, wallet, message, raw_v))[3] == "bad_v"
+
+
+def test_verify_event_pages_on_sqlite(db, event_id, monkeypatch):
+    # 페이지 크기보다 많은 응모 → 읽기 페이지 사이사이 UPDATE 가 끼어도 잠기지 않아야 함
+    with db.session_scope() as s:
+        s.execute(update(db.Event).where(db.Event.id == event_id)
+                  .values(consumer_contract_address=CONTRACT, onchain_raffle_id=7))
+        for nonce in range(5):
+            wallet, message, signature = _sign(7 if nonce != 4 else 9, nonce)
+            sig = db.Signature(event_id=event_id, wallet_address=wallet, message=message, signature=signature)
+            s.add(sig)
+            s.flush()
+            s.add(db.Entry(event_id=event_id, nickname=f"n{nonce}", email=f"s{nonce}@example.com",
+                           wallet_address=None, signature_id=sig.id, status=db.EntryStatus.pending))
+    pending, batch = sigverify._pending_items, sigverify.verify_batch
+    monkeypatch.setattr(sigverify, "_pending_items", lambda eid: pending(eid, page_size=2))
+    monkeypatch.setattr(sigverify, "verify_batch", lambda items, workers, **kw: batch(items, workers, 2, **kw))
+    totals = sigverify.verify_event_signatures(event_id, workers=1)
+    assert (totals["valid"], totals["invalid"]) == (4, 1)
+    assert totals["reasons"] == {"raffle_mismatch": 1}
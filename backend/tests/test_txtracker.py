@@ -0,0 +1,69 @@
+# test_txtracker.py — 영수증 폴러가 창을 돌려 가며 조회하는지, 노드가 모르는 오래된 tx 를 failed 로 두는지
+import datetime
+import os
+import sys
+
+import pytest
+from sqlalchemy import func, select
+
+import chain
+import txtracker
+
+OLD = datetime.datetime.utcnow() - datetime.timedelta(seconds=txtracker.TX_DROP_SEC + 60)
+
+
+@pytest.fixture
+def mock_chain():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+    import mockrpc
+    return mockrpc.MockChain()
+
+
+def _client(mock_chain, asked):
+    def transport(url, payload, timeout):
+        for req in payload if isinstance(payload, list) else [payload]:
+            if req["method"] == "eth_getTransactionReceipt":
+                asked.append(req["params"][0])
+        return mock_chain.transport(url, payload, timeout)
+    return chain.RpcClient(["mock"], transport=transport)
+
+
+def _pending(db, n, tx_type, created_at=None):
+    hashes = ["0x" + os.urandom(32).hex() for _ in range(n)]
+    with db.session_scope() as s:
+        for h in hashes:
+            s.add(db.TxLog(tx_hash=h, chain_id=31337, tx_type=tx_type, status=db.TxStatus.pending,
+                           from_address="0x" + "11" * 20, to_address="0x" + "22" * 20,
+                           **({"created_at": created_at} if created_at else {})))
+    return hashes
+
+
+def _statuses(db, hashes):
+    with db.session_scope() as s:
+        return dict(s.execute(select(db.TxLog.tx_hash, db.TxLog.status).where(db.TxLog.tx_hash.in_(hashes))).all())
+
+
+def test_poll_window_rotates_past_stuck_txs(db, mock_chain):
+    stuck = _pending(db, 5, db.TxType.other)
+    with db.session_scope() as s:
+        total = s.scalar(select(func.count()).where(db.TxLog.status == db.TxStatus.pending))
+    asked = []
+    client = _client(mock_chain, asked)
+    # 앞쪽 2건만 반복 조회하지 않고, 한 바퀴 안에 모든 pending 을 한 번씩 봄
+    for _ in range(total // 2 + 1):
+        txtracker.poll_once(client, limit=2)
+    assert set(stuck) <= set(asked)
+
+
+def test_dropped_txs_are_marked_failed(db, mock_chain):
+    dropped = _pending(db, 2, db.TxType.distribute_prize, created_at=OLD)
+    relayed = _pending(db, 1, db.TxType.record_entry, created_at=OLD)
+    recent = _pending(db, 1, db.TxType.request_randomness)
+    client = _client(mock_chain, [])
+    txtracker._cursor = 0
+    txtracker.poll_once(client, limit=10_000)
+
+    statuses = _statuses(db, dropped + relayed + recent)
+    assert [statuses[h] for h in dropped] == [db.TxStatus.failed] * 2
+    # record_entry 는 bump_stuck 몫, 최근 tx 는 아직 기다림
+    assert statuses[relayed[0]] == statuses[recent[0]] == db.TxStatus.pending
@@ -0,0 +1,212 @@
+# txtracker.py — 트랜잭션 전송 후 tx_logs 기록 + 단일 폴러가 영수증을 배치 조회해 반영
+from __future__ import annotations
+import datetime
+import logging
+import os
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert, select, update
+
+import chain
+from models import session_scope, TxLog, TxStatus, TxType
+
+log = logging.getLogger("txtracker")
+
+TX_POLL_INTERVAL = float(os.environ.get("TX_POLL_INTERVAL", "2"))
+TX_POLL_BATCH = int(os.environ.get("TX_POLL_BATCH", "200"))
+# 영수증 없이 이 시간(초)이 지났고 노드도 모르는(eth_getTransactionByHash == null) tx 는 dropped → failed.
+# relayer 의 record_entry 는 bump_stuck 이 같은 nonce 로 교체하므로 제외
+TX_DROP_SEC = float(os.environ.get("TX_DROP_SEC", "900"))
+
+# 확정된 TxLog 정보(dict)를 받는 콜백 (캐시 무효화 등)
+_listeners: List[Callable[[dict], None]] = []
+
+
+def on_confirmed(fn: Callable[[dict], None]):
+    _listeners.append(fn)
+    return fn
+
+
+def submit(private_key: str, contract_fn, tx_type: TxType, event_id: Optional[int] = None,
+           prize_id: Optional[int] = None, entry_id: Optional[int] = None,
+           metadata: Optional[dict] = None) -> str:
+    """컨트랙트 함수 호출 전송 → pending TxLog 기록 후 tx hash 즉시 반환"""
+    tx_hash, tx = chain.send_contract_tx(private_key, contract_fn)
+    record_pending(tx_hash, tx, tx_type, event_id, prize_id, entry_id, metadata)
+    return tx_hash
+
+
+def pending_values(tx_hash: str, tx: dict, tx_type: TxType, event_id=None, prize_id=None, entry_id=None,
+                   metadata: Optional[dict] = None) -> dict:
+    # 재전송(수수료 인상)에 필요한 값도 남겨 둠
+    meta = {"nonce": tx["nonce"], "gas": tx["gas"], "data": tx["data"], "value": tx.get("value", 0),
+            **(metadata or {})}
+    return dict(
+        tx_hash=tx_hash, chain_id=tx["chainId"], tx_type=tx_type, status=TxStatus.pending,
+        from_address=tx["from"], to_address=tx["to"], gas_price_wei=tx["gasPrice"],
+        event_id=event_id, prize_id=prize_id, entry_id=entry_id, tx_metadata=meta,
+    )
+
+
+def record_pending(tx_hash: str, tx: dict, tx_type: TxType, event_id=None, prize_id=None, entry_id=None,
+                   metadata: Optional[dict] = None):
+    record_pending_many([pending_values(tx_hash, tx, tx_type, event_id, prize_id, entry_id, metadata)])
+
+
+def mark_failed(tx_hash: str, error: str):
+    """전송 단계에서 거부된(체인에 올라가지 않은) pending 기록을 failed 로"""
+    with session_scope() as s:
+        s.execute(update(TxLog).where(TxLog.tx_hash == tx_hash, TxLog.status == TxStatus.pending)
+                  .values(status=TxStatus.failed, error_message=error[:500]))
+
+
+def record_pending_many(rows: List[dict]):
+    """pending_values() 목록을 다중 행 INSERT 1번으로 기록 (relayer 배치 전송용)"""
+    if rows:
+        with session_scope() as s:
+            s.execute(insert(TxLog.__table__), rows)
+
+
+def tx_to_dict(t: TxLog) -> dict:
+    return {
+        'tx_hash': t.tx_hash,
+        'chain_id': t.chain_id,
+        'tx_type': t.tx_type.value,
+        'status': t.status.value,
+        'event_id': t.event_id,
+        'from': t.from_address,
+        'to': t.to_address,
+        'block_number': t.block_number,
+        'block_timestamp': t.block_timestamp,
+        'gas_used': t.gas_used,
+        'gas_price_wei': str(t.gas_price_wei) if t.gas_price_wei is not None else None,
+        'fee_wei': str(t.fee_wei) if t.fee_wei is not None else None,
+        'error': t.error_message,
+        'created_at': t.created_at,
+    }
+
+
+# -------------------------
+# 영수증 폴러
+# -------------------------
+# 다음 조회를 시작할 tx_logs.id. 확정되지 않는 tx 가 앞쪽에 쌓여도 창이 한 바퀴씩 돌며 전부 조회됨
+_cursor = 0
+_cursor_lock = threading.Lock()
+
+
+def _pending_window(limit: int) -> list:
+    global _cursor
+    with _cursor_lock:
+        after = _cursor
+    query = (select(TxLog.id, TxLog.tx_hash, TxLog.event_id, TxLog.tx_type, TxLog.to_address, TxLog.created_at)
+             .where(TxLog.status == TxStatus.pending).order_by(TxLog.id).limit(limit))
+    with session_scope() as s:
+        pending = s.execute(query.where(TxLog.id > after)).all()
+        if not pending and after:
+            pending = s.execute(query).all()  # 끝까지 돌았으면 처음부터
+    with _cursor_lock:
+        _cursor = pending[-1].id if len(pending) == limit else 0
+    return pending
+
+
+def _expire_dropped(unconfirmed: list, client: chain.RpcClient) -> int:
+    """오래된 미확정 tx 중 노드 mempool 에도 없는 것을 failed 로"""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=TX_DROP_SEC)
+    old = [p for p in unconfirmed
+           if p.tx_type != TxType.record_entry and p.created_at and p.created_at < cutoff]
+    if not old:
+        return 0
+    txs = client.batch([("eth_getTransactionByHash", [p.tx_hash]) for p in old], raise_errors=False)
+    dropped = [p.id for p, tx in zip(old, txs) if tx is None]
+    if dropped:
+        with session_scope() as s:
+            s.execute(update(TxLog).where(TxLog.id.in_(dropped), TxLog.status == TxStatus.pending)
+                      .values(status=TxStatus.failed,
+                              error_message=f"dropped: no receipt and unknown to node after {int(TX_DROP_SEC)}s"))
+        log.warning("%d pending tx(s) dropped from the mempool, marked failed", len(dropped))
+    return len(dropped)
+
+
+def poll_once(client: Optional[chain.RpcClient] = None, limit: int = TX_POLL_BATCH) -> int:
+    """pending 트랜잭션 영수증을 배치 1~2회로 조회해 반영. 확정된 건수 반환"""
+    client = client or chain.get_client()
+    pending = _pending_window(limit)
+    if not pending:
+        return 0
+    receipts = client.batch([("eth_getTransactionReceipt", [p.tx_hash]) for p in pending], raise_errors=False)
+    done = [(p, r) for p, r in zip(pending, receipts) if isinstance(r, dict) and r]
+    _expire_dropped([p for p, r in zip(pending, receipts) if r is None], client)
+    if not done:
+        return 0
+    blocks = sorted({r["blockNumber"] for _, r in done})
+    block_data = client.batch([("eth_getBlockByNumber", [b, False]) for b in blocks], raise_errors=False)
+    timestamps = {
+        b: datetime.datetime.utcfromtimestamp(int(d["timestamp"], 16))
+        for b, d in zip(blocks, block_data) if isinstance(d, dict) and d
+    }
+
+    confirmed = []
+    with session_scope() as s:
+        for p, r in done:
+            gas_used = int(r["gasUsed"], 16)
+            price = int(r.get("effectiveGasPrice") or "0x0", 16) or None
+            values = {
+                "status": TxStatus.success if int(r["status"], 16) == 1 else TxStatus.failed,
+                "block_number": int(r["blockNumber"], 16),
+                "block_timestamp": timestamps.get(r["blockNumber"]),
+                "gas_used": gas_used,
+                "fee_wei": gas_used * price if price else None,
+            }
+            if price:
+                values["gas_price_wei"] = price
+            if values["status"] is TxStatus.failed:
+                values["error_message"] = "reverted"
+            n = s.execute(update(TxLog).where(TxLog.id == p.id, TxLog.status == TxStatus.pending)
+                          .values(**values)).rowcount
+            if n:
+                confirmed.append({"tx_hash": p.tx_hash, "event_id": p.event_id, "tx_type": p.tx_type,
+                                  "to": p.to_address, "status": values["status"],
+                                  "block_number": values["block_number"]})
+    for info in confirmed:
+        for fn in _listeners:
+            try:
+                fn(info)
+            except Exception as e:
+                log.warning("tx listener failed: %s", e)
+    return len(confirmed)
+
+
+class ReceiptPoller:
+    def __init__(self, interval: float = TX_POLL_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="tx-poller", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                # 한 번에 다 못 읽었으면 쉬지 않고 이어서
+                if poll_once() >= TX_POLL_BATCH:
+                    continue
+            except Exception as e:
+                log.warning("receipt poll failed: %s", e)
+            self._stop.wait(self.interval)
+
+
+_poller: Optional[ReceiptPoller] = None
+
+
+def start_poller() -> ReceiptPoller:
+    global _poller
+    if _poller is None:
+        _poller = ReceiptPoller().start()
+    return _poller
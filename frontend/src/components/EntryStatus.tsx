@@ -3,6 +3,7 @@ import { Users, Clock, Trophy, ExternalLink, Copy, CheckCircle, Eye, StopCircle
 import Layout, { Card, Button } from './Layout';
 import { useEvent } from '../contexts/EventContext';
 import { useNavigate } from 'react-router-dom';
+import { subscribeEventStream } from '../services/api';
 
 const EntryStatus = () => {
   const navigate = useNavigate();
@@ -12,8 +13,7 @@ const EntryStatus = () => {
   const [showWarning, setShowWarning] = useState(false);
   const [copySuccess, setCopySuccess] = useState(false);
   
-  // 더미 데이터
-  const [entryCount, setEntryCount] = useState(1247);
+  const [entryCount, setEntryCount] = useState(0);
   
   // 이벤트 종료 시간 계산
   const getEventEndTime = () => {
@@ -33,20 +33,21 @@ const EntryStatus = () => {
     entryUrl: 'https://monad.app/entry/abc123'
   };
 
-  // 1초마다 현재 시간 업데이트하고 가끔 응모자 수도 증가
+  // 1초마다 현재 시간 업데이트 (화면 시계용, 서버 호출 없음)
   useEffect(() => {
-    const timer = setInterval(() => {
-      setCurrentTime(new Date());
-      
-      // 5초마다 랜덤하게 응모자 수 증가
-      if (Math.random() < 0.2) {
-        setEntryCount(prev => prev + Math.floor(Math.random() * 3) + 1);
-      }
-    }, 1000);
-
+    const timer = setInterval(() => setCurrentTime(new Date()), 1000);
     return () => clearInterval(timer);
   }, []);
 
+  // 응모자 수는 서버 push(SSE)로 수신
+  const eventId = (eventData as any)?.id;
+  useEffect(() => {
+    if (!eventId) return;
+    return subscribeEventStream(Number(eventId), {
+      onEntries: ({ count }) => setEntryCount(count),
+    });
+  }, [eventId]);
+
   const getTimeRemaining = () => {
     const endTime = new Date(eventStatus.endTime);
     const now = currentTime;
@@ -3,13 +3,20 @@ import { Trophy, Medal, Award, Download, RotateCcw } from 'lucide-react';
 import Layout, { GridContainer, GridItem, Card, Button } from './Layout';
 import { useEvent } from '../contexts/EventContext';
 import { useNavigate } from 'react-router-dom';
+import { prizeImageSrc } from '../services/api';
 
 const FinalResults = () => {
   const navigate = useNavigate();
   const [isDarkMode, setIsDarkMode] = useState(false);
   
-  // 더미 결과 데이터
-  const results = [
+  // 더미 결과 데이터 (API 연동 시 prizeImage 는 원본, prizeThumb 는 경품의 thumb_url)
+  const results: {
+    rank: number;
+    prizeName: string;
+    prizeImage: string;
+    prizeThumb?: string | null;
+    winners: { number: number; name: string }[];
+  }[] = [
     {
       rank: 1,
       prizeName: 'iPhone 15 Pro Max',
@@ -143,8 +150,12 @@ const FinalResults = () => {
               <div className="text-center">
                 <div className="w-20 h-20 mx-auto rounded-lg overflow-hidden shadow-md border border-gray-200 dark:border-gray-700 mb-3">
                   <img
-                    src={prize.prizeImage}
+                    src={prizeImageSrc({ thumb_url: prize.prizeThumb, image_url: prize.prizeImage })}
                     alt={prize.prizeName}
+                    width={80}
+                    height={80}
+                    loading="lazy"
+                    decoding="async"
                     className="w-full h-full object-cover"
                     onError={(e) => {
                       const target = e.target as HTMLImageElement;
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Users, Clock, Hourglass, QrCode } from 'lucide-react';
 import Layout, { GridContainer, GridItem, Card } from './Layout';
 import { useLocation } from 'react-router-dom';
+import { subscribeEventStream } from '../services/api';
 
 const QRPage = () => {
   const [isDarkMode, setIsDarkMode] = useState(false);
@@ -12,7 +13,7 @@ const QRPage = () => {
   const eventId = location.state?.eventId;
 
   // 실제 이벤트 데이터 (더미 제거, 추후 API 연동 가능)
-  const [entryCount, setEntryCount] = useState(1247);
+  const [entryCount, setEntryCount] = useState(0);
   const [eventData] = useState({
     eventName: '이벤트',
     endDate: '2025-01-31',
@@ -30,20 +31,20 @@ const QRPage = () => {
     }
   }, [eventId]);
   
-  // 1초마다 현재 시간 업데이트하고 가끔 응모자 수도 증가
+  // 1초마다 현재 시간 업데이트 (화면 시계용, 서버 호출 없음)
   useEffect(() => {
-    const timer = setInterval(() => {
-      setCurrentTime(new Date());
-      
-      // 3초마다 랜덤하게 응모자 수 증가
-      if (Math.random() < 0.33) {
-        setEntryCount(prev => prev + Math.floor(Math.random() * 2) + 1);
-      }
-    }, 1000);
-
+    const timer = setInterval(() => setCurrentTime(new Date()), 1000);
     return () => clearInterval(timer);
   }, []);
 
+  // 응모자 수는 서버 push(SSE)로 수신
+  useEffect(() => {
+    if (!eventId) return;
+    return subscribeEventStream(Number(eventId), {
+      onEntries: ({ count }) => setEntryCount(count),
+    });
+  }, [eventId]);
+
   const getTimeRemaining = () => {
     const endTime = new Date(`${eventData.endDate}T${eventData.endTime}:00`);
     const now = currentTime;
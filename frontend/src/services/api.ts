@@ -10,6 +10,17 @@ export interface User {
   wallet_address?: string;
 }
 
+export interface Prize {
+  id: number;
+  name: string;
+  winners_count: number;
+  description?: string;
+  image_path?: string;
+  // 내용 주소 이미지 URL (원본 / 작은 WebP 썸네일)
+  image_url?: string | null;
+  thumb_url?: string | null;
+}
+
 export interface LoginResponse {
   token: string;
   user: User;
@@ -76,7 +87,7 @@ export async function createPrize(token: string, data: {
 }
 
 // 경품 목록 조회
-export async function getPrizes(token: string, event_id: number) {
+export async function getPrizes(token: string, event_id: number): Promise<Prize[]> {
   const res = await axios.get(`${API_BASE_URL}/prizes`, {
     params: { event_id },
     headers: { Authorization: `Bearer ${token}` }
@@ -96,3 +107,67 @@ export async function getEventCsvFields(token: string, eventId: number) {
   });
   return res.data.fields;
 }
+
+// 경품 목록/결과 화면용 이미지: 썸네일 → 원본 → fallback 순
+export function prizeImageSrc(prize: Pick<Prize, 'image_url' | 'thumb_url'>, fallback = ''): string {
+  return prize.thumb_url || prize.image_url || fallback;
+}
+
+// 실시간 알림 (SSE): 응모자 수 / 상태·VRF 진행 / 당첨자 발표
+export interface EntryCountUpdate {
+  count: number;
+  valid: number;
+  cap: number | null;
+}
+
+export interface EventStateUpdate {
+  status: string;
+  vrf: 'requested' | 'fulfilled' | null;
+}
+
+export interface WinnersUpdate {
+  count: number;
+  winners: { prize_id: number; prize_name: string; nickname: string | null; wallet: string | null }[];
+}
+
+export interface EventStreamHandlers {
+  onEntries?: (update: EntryCountUpdate) => void;
+  onState?: (update: EventStateUpdate) => void;
+  onWinners?: (update: WinnersUpdate) => void;
+}
+
+// 서버가 연결 상한으로 거절(503)하면 EventSource 는 재시도하지 않으므로 이 간격 뒤 직접 다시 연결
+const STREAM_BUSY_RETRY_MS = 30000;
+
+// 구독 해제 함수를 반환 (useEffect cleanup 에서 호출). 끊기면 EventSource 가 자동 재연결
+export function subscribeEventStream(eventId: number, handlers: EventStreamHandlers): () => void {
+  let source: EventSource | null = null;
+  let retryTimer: ReturnType<typeof setTimeout> | null = null;
+  let closed = false;
+
+  const connect = () => {
+    const es = new EventSource(`${API_BASE_URL}/events/${eventId}/stream`);
+    const listen = <T>(kind: string, handler?: (update: T) => void) => {
+      if (handler) {
+        es.addEventListener(kind, (e) => handler(JSON.parse((e as MessageEvent).data)));
+      }
+    };
+    listen('entries', handlers.onEntries);
+    listen('state', handlers.onState);
+    listen('winners', handlers.onWinners);
+    es.onerror = () => {
+      // 네트워크 끊김은 브라우저가 재연결(CONNECTING), HTTP 오류 응답이면 CLOSED
+      if (es.readyState === EventSource.CLOSED && !closed) {
+        retryTimer = setTimeout(connect, STREAM_BUSY_RETRY_MS);
+      }
+    };
+    source = es;
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    if (retryTimer) clearTimeout(retryTimer);
+    source?.close();
+  };
+}